@@ -0,0 +1,92 @@
+"""
+Control de admisión para la API del grafo LangGraph.
+
+Limita cuántos turnos se ejecutan a la vez y cuántos pueden esperar un lugar.
+Cuando la cola está llena (o la espera supera el timeout) el pedido se rechaza
+enseguida con un tiempo sugerido de reintento, en lugar de acumularse hasta
+que el cliente corte por timeout.
+"""
+
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator
+
+
+class AdmissionRejected(Exception):
+    """El pedido no fue admitido por sobrecarga"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Servicio sobrecargado ({reason}), reintentar en {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Cantidad acotada de turnos en curso con una cola de espera acotada"""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, retry_after: int):
+        """
+        Args:
+            max_in_flight: Turnos que pueden ejecutarse a la vez
+            max_queue: Turnos que pueden esperar un lugar libre
+            queue_timeout: Segundos máximos de espera en la cola
+            retry_after: Segundos sugeridos al cliente para reintentar
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        # Métricas
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.queued_total = 0
+        self.total_queue_time = 0.0
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Ocupar un lugar durante el bloque o lanzar AdmissionRejected"""
+        if self._semaphore.locked() or self.queued:
+            if self.queued >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise AdmissionRejected("cola llena", self.retry_after)
+
+            self.queued += 1
+            self.queued_total += 1
+            start_time = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise AdmissionRejected("timeout en cola", self.retry_after)
+            finally:
+                self.queued -= 1
+                self.total_queue_time += time.perf_counter() - start_time
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de admisión"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "queued_total": self.queued_total,
+            "avg_queue_ms": (self.total_queue_time / self.queued_total * 1000) if self.queued_total else 0.0,
+        }
@@ -18,6 +18,7 @@ from .validate_message_agent import ValidateMessageAgent
 from .evaluate_close_agent import EvaluateCloseAgent
 from .confirmation_agent import ConfirmationAgent
 from .end_conversation_agent import EndConversationAgent
+from .turn_analyzer_agent import TurnAnalyzerAgent
 from .agent_config import *
 from .agent_utils import *
 
@@ -32,6 +33,7 @@ __all__ = [
     "EvaluateCloseAgent",
     "ConfirmationAgent",
     "EndConversationAgent",
+    "TurnAnalyzerAgent",
     # Configuraciones
     "SUMMARIZER_AGENT_CONFIG",
     # Utilidades
@@ -9,8 +9,20 @@ from prompts import (
     SUMMARIZER_AGENT_CONFIG
 )
 
+# Presupuesto de tokens del historial por agente (sin contar el prompt de sistema):
+# history_tokens para la ventana completa y message_tokens para cada respuesta
+# anterior del asistente. Los clasificadores solo necesitan el mensaje del usuario
+# y un poco de la respuesta previa para entender preguntas de seguimiento.
+CONTEXT_BUDGETS = {
+    "validate_message": {"history_tokens": 150, "message_tokens": 60},
+    "turn_analyzer": {"history_tokens": 300, "message_tokens": 120},
+    "profesor": {"history_tokens": 1500, "message_tokens": 400},
+    "profesor_openai": {"history_tokens": 1500, "message_tokens": 400},
+}
+
 # Re-exportar las configuraciones para mantener compatibilidad
 __all__ = [
     "PROFESOR_AGENT_CONFIG",
-    "SUMMARIZER_AGENT_CONFIG"
+    "SUMMARIZER_AGENT_CONFIG",
+    "CONTEXT_BUDGETS"
 ]
@@ -5,8 +5,15 @@ Este módulo contiene funciones auxiliares que pueden ser utilizadas
 por diferentes agentes.
 """
 
+import threading
 from typing import Dict, Any, List
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
+
+# Estimación de tokens sin tokenizer: ~4 caracteres por token en español
+CHARS_PER_TOKEN = 4
+# Tokens de formato por mensaje (rol y separadores del chat)
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = " […]"
 
 def build_system_prompt(base_prompt: str, summary: str = None) -> str:
     """
@@ -75,6 +82,31 @@ def extract_text_from_content(content: Any) -> str:
     except Exception:
         return str(content)
 
+def extract_chunk_text(content: Any) -> str:
+    """Extrae solo el texto de un chunk de streaming (str o lista de bloques).
+    
+    A diferencia de extract_text_from_content, no hace fallback a str(content):
+    los chunks sin texto (eventos de herramientas, anotaciones) devuelven "".
+    
+    Args:
+        content: Contenido del chunk (AIMessageChunk.content)
+        
+    Returns:
+        Texto del chunk o string vacío
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        text_parts: list[str] = []
+        for block in content:
+            if isinstance(block, str):
+                text_parts.append(block)
+            elif isinstance(block, dict) and isinstance(block.get("text"), str):
+                if block.get("type", "text") == "text":
+                    text_parts.append(block["text"])
+        return "".join(text_parts)
+    return ""
+
 def extract_response_content(response) -> str:
     """
     Extraer el contenido de la respuesta del modelo de forma segura.
@@ -131,3 +163,100 @@ def count_messages(state: Dict[str, Any]) -> int:
     """
     messages = state.get("messages", [])
     return len(messages) if isinstance(messages, list) else 0
+
+def estimate_tokens(text: str) -> int:
+    """Tokens aproximados de un texto (~4 caracteres por token)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def message_tokens(message: BaseMessage) -> int:
+    """Tokens aproximados de un mensaje, con el formato del chat"""
+    return estimate_tokens(extract_text_from_content(getattr(message, "content", message))) + MESSAGE_OVERHEAD_TOKENS
+
+def truncate_message(message: BaseMessage, max_tokens: int) -> BaseMessage:
+    """Copia del mensaje recortada a max_tokens (en el último espacio), o el mismo si ya entra"""
+    text = extract_text_from_content(message.content)
+    if estimate_tokens(text) <= max_tokens:
+        return message
+    cut = text[:max_tokens * CHARS_PER_TOKEN]
+    if " " in cut:
+        cut = cut[:cut.rfind(" ")]
+    return message.model_copy(update={"content": cut.rstrip() + TRUNCATION_MARKER})
+
+def fit_messages_to_budget(messages: List[BaseMessage], history_tokens: int, max_message_tokens: int) -> tuple[List[BaseMessage], int, int]:
+    """
+    Ventana más reciente del historial que entra en un presupuesto de tokens.
+    
+    El último mensaje (el del usuario) se conserva completo aunque supere el
+    presupuesto. Hacia atrás, las respuestas del asistente más largas que
+    max_message_tokens se recortan y los mensajes se agregan mientras entren;
+    desde el primero que no entra se descarta el resto (lo cubre el resumen).
+    
+    Args:
+        messages: Historial de la conversación
+        history_tokens: Presupuesto de tokens para el historial
+        max_message_tokens: Tokens máximos de cada respuesta anterior del asistente
+    
+    Returns:
+        (ventana, mensajes descartados, mensajes recortados)
+    """
+    if not messages:
+        return [], 0, 0
+    window = [messages[-1]]
+    remaining = history_tokens - message_tokens(messages[-1])
+    truncated = 0
+    for message in reversed(messages[:-1]):
+        candidate = message if isinstance(message, HumanMessage) else truncate_message(message, max_message_tokens)
+        tokens = message_tokens(candidate)
+        if tokens > remaining:
+            break
+        truncated += candidate is not message
+        window.append(candidate)
+        remaining -= tokens
+    window.reverse()
+    return window, len(messages) - len(window), truncated
+
+class ContextStats:
+    """Tokens de entrada enviados al modelo por agente y mensajes descartados o recortados"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, int]] = {}
+    
+    def _agent(self, agent_name: str) -> Dict[str, int]:
+        return self._agents.setdefault(
+            agent_name, {"calls": 0, "input_tokens": 0, "max_input_tokens": 0, "prefix_tokens": 0, "dropped": 0, "truncated": 0}
+        )
+    
+    def record_sent(self, agent_name: str, tokens: int, prefix_tokens: int = 0):
+        """Registrar una llamada al modelo con sus tokens de entrada (y los del prefijo fijo cacheable)"""
+        with self._lock:
+            stats = self._agent(agent_name)
+            stats["calls"] += 1
+            stats["input_tokens"] += tokens
+            stats["prefix_tokens"] += prefix_tokens
+            stats["max_input_tokens"] = max(stats["max_input_tokens"], tokens)
+    
+    def record_window(self, agent_name: str, dropped: int, truncated: int):
+        """Registrar los mensajes que el presupuesto dejó afuera o recortó"""
+        with self._lock:
+            stats = self._agent(agent_name)
+            stats["dropped"] += dropped
+            stats["truncated"] += truncated
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                agent_name: {
+                    **stats,
+                    "avg_input_tokens": round(stats["input_tokens"] / stats["calls"]) if stats["calls"] else 0,
+                    "cacheable_prefix_ratio": round(stats["prefix_tokens"] / stats["input_tokens"], 3) if stats["input_tokens"] else 0.0,
+                }
+                for agent_name, stats in self._agents.items()
+            }
+
+# Métricas globales de contexto
+_context_stats = ContextStats()
+
+def get_context_stats() -> ContextStats:
+    """Obtener las métricas globales de tokens de entrada por agente"""
+    return _context_stats
@@ -6,11 +6,16 @@ y gestión de timestamps para todos los agentes.
 """
 
 import time
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 from log_manager import get_log_manager
 from datetime import datetime
-from .agent_utils import extract_text_from_content
+from langchain_core.messages import AIMessage, SystemMessage
+from prompts.registry import get_prompt_registry
+from prompts.summarizer_prompts import WINDOW_SUMMARY_PROMPT
+from .agent_utils import extract_text_from_content, fit_messages_to_budget, message_tokens, estimate_tokens, get_context_stats, truncate_message
+from .response_cache import get_response_cache
 
 class BaseAgent(ABC):
     """Clase base abstracta para todos los agentes"""
@@ -20,6 +25,10 @@ class BaseAgent(ABC):
         self.model = model
         self.agent_name = agent_name
         self.log_manager = get_log_manager()
+        # Prompts de sistema precompilados por tipo de pregunta
+        self.prompts = get_prompt_registry()
+        # Hash de los prompts del agente: los clasificadores lo definen para usar el caché de respuestas
+        self.prompt_hash = None
     
     def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Método principal que ejecuta el agente con logging automático"""
@@ -51,11 +60,124 @@ class BaseAgent(ABC):
             self.log_manager.log_error(self.agent_name, e, state)
             raise
     
+    async def ainvoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de invoke(): mismo logging, pero sin bloquear el event loop"""
+        start_time = time.time()
+        
+        try:
+            # Log del estado antes de ejecutar
+            self.log_manager.log_before_agent(self.agent_name, state)
+            
+            # Ejecutar la lógica específica del agente (async)
+            result = await self._aprocess_state(state)
+            
+            # Asegurar que el resultado tenga timestamp
+            if isinstance(result, dict) and "updated_at" not in result:
+                result["updated_at"] = datetime.now()
+            
+            # Extraer la respuesta para el logging
+            response_text = self._extract_response_text(result)
+            
+            # Log del estado después de ejecutar
+            processing_time = time.time() - start_time
+            self.log_manager.log_after_agent(self.agent_name, result, processing_time, response_text)
+            
+            return result
+            
+        except Exception as e:
+            # Log de error
+            processing_time = time.time() - start_time
+            self.log_manager.log_error(self.agent_name, e, state)
+            raise
+    
     @abstractmethod
     def _process_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Método abstracto que cada agente debe implementar"""
         pass
     
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state()
+        
+        Los agentes que llaman a un modelo deben sobreescribirlo usando model.ainvoke.
+        Por defecto ejecuta la versión sync en un thread para no bloquear el event loop.
+        """
+        return await asyncio.to_thread(self._process_state, state)
+    
+    def _response_cache_key(self, key_parts: tuple):
+        """Caché y clave de la llamada, o (None, None) si el agente no usa caché"""
+        cache = get_response_cache()
+        if cache is None or self.prompt_hash is None or not key_parts:
+            return None, None
+        cache.register_prompts(self.agent_name, self.prompt_hash)
+        model_name = getattr(self.model, "model_name", None) or getattr(self.model, "model", "") or ""
+        return cache, cache.make_key(self.agent_name, self.prompt_hash, str(model_name), *key_parts)
+    
+    def _lookup_cached_response(self, key_parts: tuple):
+        """Caché, clave y respuesta guardada (o None) de la llamada"""
+        cache, key = self._response_cache_key(key_parts)
+        cached = cache.get(self.agent_name, key) if cache is not None else None
+        return cache, key, cached
+    
+    def _build_context(self, system_message, history: list, summary: str = "") -> list:
+        """Prompt de sistema más la ventana del historial que entra en el presupuesto del agente
+        
+        Los agentes sin presupuesto en CONTEXT_BUDGETS (o con CONTEXT_WINDOWING_ENABLED
+        en false) reciben el historial completo. Si la ventana descarta mensajes y hay
+        `summary`, se agrega al final del prompt de sistema (recortado al presupuesto del
+        historial) para no perder el contexto viejo. El Profesor ya lo trae en su prompt.
+        """
+        from config import Config
+        from .agent_config import CONTEXT_BUDGETS
+        
+        budget = CONTEXT_BUDGETS.get(self.agent_name)
+        if budget is None or not Config.CONTEXT_WINDOWING_ENABLED:
+            return [system_message] + list(history)
+        window, dropped, truncated = fit_messages_to_budget(history, budget["history_tokens"], budget["message_tokens"])
+        get_context_stats().record_window(self.agent_name, dropped, truncated)
+        if dropped and summary:
+            summary_message = truncate_message(SystemMessage(content=summary.strip()), budget["history_tokens"])
+            system_message = system_message.model_copy(update={
+                "content": system_message.content + WINDOW_SUMMARY_PROMPT.format(summary=summary_message.content)
+            })
+        return [system_message] + window
+    
+    def _record_input_tokens(self, messages):
+        """Registrar los tokens de entrada de una llamada al modelo y los de su prefijo fijo"""
+        prefix_tokens = 0
+        if messages and isinstance(messages[0], SystemMessage):
+            prefix_tokens = estimate_tokens(self.prompts.static_prefix(self.agent_name, messages[0].content))
+        get_context_stats().record_sent(
+            self.agent_name, sum(message_tokens(message) for message in messages), prefix_tokens
+        )
+    
+    def _invoke_model_cached(self, messages, *key_parts):
+        """model.invoke con caché de respuestas (la clave son las entradas normalizadas de la llamada)"""
+        cache, key, cached = self._lookup_cached_response(key_parts)
+        if cached is not None:
+            return AIMessage(content=cached)
+        self._record_input_tokens(messages)
+        response = self.model.invoke(messages)
+        if cache is not None:
+            cache.put(self.agent_name, self.prompt_hash, key, extract_text_from_content(response.content))
+        return response
+    
+    async def _ainvoke_model_cached(self, messages, *key_parts):
+        """Versión async de _invoke_model_cached() usando model.ainvoke
+        
+        El caché consulta y escribe SQLite de forma sync (con su lock), así que se
+        usa desde un thread para no frenar el event loop.
+        """
+        cache, key, cached = await asyncio.to_thread(self._lookup_cached_response, key_parts)
+        if cached is not None:
+            return AIMessage(content=cached)
+        self._record_input_tokens(messages)
+        response = await self.model.ainvoke(messages)
+        if cache is not None:
+            await asyncio.to_thread(
+                cache.put, self.agent_name, self.prompt_hash, key, extract_text_from_content(response.content)
+            )
+        return response
+    
     def _prepare_prompt_text(self, messages) -> str:
         """Preparar el texto del prompt para logging"""
         return "\n".join([f"{msg.type}: {msg.content}" for msg in messages])
@@ -0,0 +1,283 @@
+"""
+Circuit breaker por proveedor y failover entre Groq y OpenAI.
+
+Cuando Groq limita o se degrada, todos los nodos que lo usan fallan o se
+cuelgan hasta el timeout, y cada turno termina en un 500. Con el failover:
+
+- CircuitBreaker lleva una ventana de las últimas llamadas al proveedor. Se
+  abre si la tasa de errores o la de llamadas lentas supera su umbral (con un
+  mínimo de llamadas en la ventana).
+- Abierto, las llamadas van directo al modelo de respaldo del otro proveedor
+  sin esperar al timeout. Pasado `open_seconds` pasa a half-open y deja pasar
+  algunas llamadas de prueba: si salen bien se cierra, si no vuelve a abrirse.
+- FailoverChatModel envuelve el modelo del agente: usa el principal si el
+  breaker lo permite y el respaldo si está abierto o si la llamada falla.
+
+Los nodos con streaming (profesor, confirmation, end_conversation) usan
+`streamed=True`: la llamada al principal se hace con stream() y, si falla
+después de emitir el primer chunk, el error se propaga en vez de pasar al
+respaldo (el cliente ya recibió parte de la respuesta y vería el texto del
+respaldo pegado detrás). Solo se hace failover si falla antes del primer chunk.
+
+El breaker de Groq lo comparten los clasificadores cortos y las generaciones
+largas, así que la latencia que cuenta como "lenta" depende del tipo de llamada:
+la llamada completa en los clasificadores, el tiempo hasta el primer chunk en
+los nodos con streaming y ninguna en las generaciones largas sin streaming
+(summarizer), que solo cuentan errores.
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+from langchain_core.messages import AIMessage, message_chunk_to_message
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Breaker con umbrales de tasa de errores y de llamadas lentas, y prueba half-open"""
+
+    def __init__(self, name: str, error_rate: float = 0.5, slow_call_seconds: float = 5.0,
+                 slow_rate: float = 0.5, window: int = 20, min_calls: int = 10,
+                 open_seconds: float = 30.0, half_open_probes: int = 1):
+        """
+        Args:
+            name: Proveedor ("groq", "openai")
+            error_rate: Fracción de errores en la ventana que abre el circuito
+            slow_call_seconds: Latencia a partir de la cual una llamada cuenta como lenta
+            slow_rate: Fracción de llamadas lentas en la ventana que abre el circuito
+            window: Últimas llamadas consideradas
+            min_calls: Llamadas mínimas en la ventana antes de evaluar los umbrales
+            open_seconds: Tiempo abierto antes de probar en half-open
+            half_open_probes: Llamadas de prueba simultáneas en half-open
+        """
+        self.name = name
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        # (falló, fue lenta) de cada llamada reciente
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        # Métricas
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """¿Se puede llamar al proveedor? (en half-open solo las llamadas de prueba)"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state, self._probes = HALF_OPEN, 0
+                print(f"[CircuitBreaker] {self.name}: half-open, probando el proveedor")
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def record_success(self, latency: Optional[float]):
+        """Llamada exitosa; latency None = no se evalúa como lenta (generaciones largas)"""
+        self._record(failed=False, slow=latency is not None and latency >= self.slow_call_seconds)
+
+    def record_failure(self):
+        self._record(failed=True, slow=False)
+
+    def record_cancelled(self):
+        """Llamada cancelada (p. ej. perdió un hedge): no cuenta, pero libera la prueba half-open"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def _record(self, failed: bool, slow: bool):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    print(f"[CircuitBreaker] {self.name}: cerrado, el proveedor respondió bien")
+                return
+            if self.state == OPEN:
+                # Llamada que empezó antes de abrirse el circuito
+                return
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) < self.min_calls:
+                return
+            errors = sum(1 for outcome in self._outcomes if outcome[0]) / len(self._outcomes)
+            slow_calls = sum(1 for outcome in self._outcomes if outcome[1]) / len(self._outcomes)
+            if errors >= self.error_rate or slow_calls >= self.slow_rate:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+        print(f"[CircuitBreaker] {self.name}: abierto por {self.open_seconds}s, usando el respaldo")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "error_rate": round(sum(1 for outcome in self._outcomes if outcome[0]) / calls, 3) if calls else 0.0,
+                "slow_rate": round(sum(1 for outcome in self._outcomes if outcome[1]) / calls, 3) if calls else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class PartialStreamError(Exception):
+    """El principal falló después de emitir chunks al cliente (no se puede pasar al respaldo)"""
+
+
+class FailoverChatModel:
+    """Modelo de chat que pasa al respaldo si el breaker del proveedor está abierto o la llamada falla"""
+
+    def __init__(self, primary, fallback, breaker: CircuitBreaker, streamed: bool = False,
+                 long_generation: bool = False):
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker
+        # El nodo reenvía los tokens al cliente: no hacer failover después del primer chunk
+        # (y la latencia lenta se mide hasta el primer chunk)
+        self.streamed = streamed
+        # Generación larga sin streaming: su duración no indica un proveedor lento
+        self.long_generation = long_generation
+        self.failovers = 0
+
+    def __getattr__(self, name: str):
+        # Solo se llama para atributos que el wrapper no tiene (model_name, temperature, ...)
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def _failover(self, error: Optional[Exception]):
+        self.failovers += 1
+        if error is not None:
+            print(f"[Failover] Error en {self.breaker.name}: {error}, usando el respaldo")
+
+    def _slow_latency(self, total: float, first_chunk: Optional[float]) -> Optional[float]:
+        """Latencia que se compara con el umbral de llamada lenta del breaker"""
+        if self.streamed:
+            return first_chunk if first_chunk is not None else total
+        return None if self.long_generation else total
+
+    def _stream_primary(self, messages, *args, **kwargs):
+        """stream() del principal juntando los chunks; propaga el error si ya emitió alguno
+
+        Devuelve (mensaje, segundos hasta el primer chunk).
+        """
+        start_time = time.perf_counter()
+        response = None
+        first_chunk = None
+        try:
+            for chunk in self.primary.stream(messages, *args, **kwargs):
+                if response is None:
+                    first_chunk = time.perf_counter() - start_time
+                response = chunk if response is None else response + chunk
+        except Exception as e:
+            if response is not None:
+                raise PartialStreamError(e) from e
+            raise
+        message = message_chunk_to_message(response) if response is not None else AIMessage(content="")
+        return message, first_chunk
+
+    async def _astream_primary(self, messages, *args, **kwargs):
+        """Versión async de _stream_primary()"""
+        start_time = time.perf_counter()
+        response = None
+        first_chunk = None
+        try:
+            async for chunk in self.primary.astream(messages, *args, **kwargs):
+                if response is None:
+                    first_chunk = time.perf_counter() - start_time
+                response = chunk if response is None else response + chunk
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if response is not None:
+                raise PartialStreamError(e) from e
+            raise
+        message = message_chunk_to_message(response) if response is not None else AIMessage(content="")
+        return message, first_chunk
+
+    def invoke(self, messages, *args, **kwargs):
+        if self.breaker.allow():
+            start_time = time.perf_counter()
+            try:
+                if self.streamed:
+                    response, first_chunk = self._stream_primary(messages, *args, **kwargs)
+                else:
+                    response, first_chunk = self.primary.invoke(messages, *args, **kwargs), None
+            except PartialStreamError as e:
+                self.breaker.record_failure()
+                print(f"[Failover] Error en {self.breaker.name} a mitad del stream: {e.__cause__}, sin respaldo")
+                raise e.__cause__
+            except Exception as e:
+                self.breaker.record_failure()
+                self._failover(e)
+            else:
+                self.breaker.record_success(self._slow_latency(time.perf_counter() - start_time, first_chunk))
+                return response
+        else:
+            self._failover(None)
+        return self.fallback.invoke(messages, *args, **kwargs)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        if self.breaker.allow():
+            start_time = time.perf_counter()
+            try:
+                if self.streamed:
+                    response, first_chunk = await self._astream_primary(messages, *args, **kwargs)
+                else:
+                    response, first_chunk = await self.primary.ainvoke(messages, *args, **kwargs), None
+            except asyncio.CancelledError:
+                self.breaker.record_cancelled()
+                raise
+            except PartialStreamError as e:
+                self.breaker.record_failure()
+                print(f"[Failover] Error en {self.breaker.name} a mitad del stream: {e.__cause__}, sin respaldo")
+                raise e.__cause__
+            except Exception as e:
+                self.breaker.record_failure()
+                self._failover(e)
+            else:
+                self.breaker.record_success(self._slow_latency(time.perf_counter() - start_time, first_chunk))
+                return response
+        else:
+            self._failover(None)
+        return await self.fallback.ainvoke(messages, *args, **kwargs)
+
+
+def breaker_from_config(name: str) -> CircuitBreaker:
+    """Breaker del proveedor con los umbrales de Config"""
+    from config import Config
+
+    return CircuitBreaker(
+        name,
+        error_rate=Config.BREAKER_ERROR_RATE,
+        slow_call_seconds=Config.BREAKER_SLOW_CALL_SECONDS,
+        slow_rate=Config.BREAKER_SLOW_RATE,
+        window=Config.BREAKER_WINDOW,
+        min_calls=Config.BREAKER_MIN_CALLS,
+        open_seconds=Config.BREAKER_OPEN_SECONDS,
+        half_open_probes=Config.BREAKER_HALF_OPEN_PROBES
+    )
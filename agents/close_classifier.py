@@ -0,0 +1,125 @@
+"""
+Clasificador por reglas de la respuesta a la confirmación para EvaluateCloseAgent.
+
+En waiting_confirmation la respuesta más común es corta y sin ambigüedad
+("sí", "perfecto", "dale", "no sé"). Este módulo la clasifica con las mismas
+decisiones de EVALUATE_CLOSE_PROMPT:
+
+- "end_conversation": solo afirmaciones ("sí, perfecto", "correcto, gracias")
+- "profesor": preguntas o pedidos de explicación ("¿qué significa?", "tengo dudas")
+- "confirmation": indecisión sin pregunta ("no sé", "mmm", "puede ser")
+
+Si el mensaje mezcla señales ("sí, pero...") o no encaja en ningún grupo
+devuelve None y decide el LLM.
+
+Corpus de verificación:
+
+    python -m agents.close_classifier
+"""
+
+import re
+from typing import Optional, List, Tuple
+
+from .reason_parser import normalize
+
+_AFFIRMATIONS = [
+    "si", "sii", "siii", "sip", "correcto", "perfecto", "dale", "ok", "okay", "okey", "de acuerdo",
+    "confirmo", "confirmado", "exacto", "exactamente", "listo", "claro", "claro que si", "asi es",
+    "esta bien", "todo bien", "genial", "bueno", "buenisimo", "excelente", "afirmativo", "obvio",
+    "por supuesto", "me parece bien", "va", "joya", "eso", "tal cual", "estoy de acuerdo",
+]
+# Cortesías que no cambian el sentido de la afirmación
+_COURTESIES = ["gracias", "muchas gracias", "mil gracias", "genial gracias"]
+_HESITATIONS = [
+    "no se", "no estoy seguro", "no estoy segura", "no lo se", "mmm", "mm", "hmm", "eh",
+    "tal vez", "quizas", "capaz", "puede ser", "no se si", "dejame pensar", "lo tengo que pensar",
+]
+
+# Preguntas o pedidos de más información (van al profesor)
+_QUESTION_PATTERN = re.compile(
+    r"[?¿]|\b(que es|que significa|como|por que|porque|cual|cuanto|explica\w*|duda|dudas|"
+    r"pregunta|no entiendo|no entendi|mas info\w*|contame|decime)\b"
+)
+# Palabras que contradicen o condicionan una afirmación ("sí, pero...")
+_CONTRAST_PATTERN = re.compile(r"\b(pero|aunque|sin embargo|cambiar|cambio|mejor|otra|otro|no)\b")
+
+
+def _phrase_pattern(phrases: List[str]) -> re.Pattern:
+    alternatives = "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+    return re.compile(r"\b(?:" + alternatives + r")\b")
+
+
+_AFFIRMATION_PATTERN = _phrase_pattern(_AFFIRMATIONS)
+_COURTESY_PATTERN = _phrase_pattern(_COURTESIES)
+_HESITATION_PATTERN = _phrase_pattern(_HESITATIONS)
+
+
+def _only(pattern: re.Pattern, text: str) -> bool:
+    """El texto está formado solo por frases del patrón (más puntuación y emojis)"""
+    if not pattern.search(text):
+        return False
+    rest = pattern.sub(" ", text)
+    return not re.search(r"\w", rest)
+
+
+def classify_close(user_message: str) -> Optional[str]:
+    """Decidir sin LLM el siguiente paso tras la pregunta de confirmación
+
+    Returns:
+        "end_conversation", "profesor", "confirmation" o None si es ambiguo
+    """
+    if not isinstance(user_message, str):
+        return None
+    text = normalize(user_message)
+    if not text:
+        return None
+    if _QUESTION_PATTERN.search(text):
+        return "profesor"
+    if _only(_HESITATION_PATTERN, text):
+        return "confirmation"
+    if _CONTRAST_PATTERN.search(text):
+        return None
+    without_courtesies = _COURTESY_PATTERN.sub(" ", text)
+    if _only(_AFFIRMATION_PATTERN, without_courtesies):
+        return "end_conversation"
+    return None
+
+
+# Ejemplos del prompt (y casos que deben ir al LLM con None)
+EXAMPLES: List[Tuple[str, Optional[str]]] = [
+    ("sí, perfecto", "end_conversation"),
+    ("Sí", "end_conversation"),
+    ("correcto", "end_conversation"),
+    ("perfecto!", "end_conversation"),
+    ("dale", "end_conversation"),
+    ("de acuerdo, muchas gracias", "end_conversation"),
+    ("sí, confirmo 👍", "end_conversation"),
+    ("así es", "end_conversation"),
+    ("¿puedes explicarme más?", "profesor"),
+    ("tengo dudas", "profesor"),
+    ("qué significa renta", "profesor"),
+    ("sí, pero ¿cómo se calcula?", "profesor"),
+    ("no sé", "confirmation"),
+    ("mmm", "confirmation"),
+    ("puede ser", "confirmation"),
+    ("sí, pero prefiero otra opción", None),
+    ("no", None),
+    ("quiero cambiar a duración", None),
+    ("el otro día lo vi en la tele", None),
+]
+
+
+def main():
+    failures = 0
+    for message, expected in EXAMPLES:
+        result = classify_close(message)
+        if result != expected:
+            failures += 1
+            print(f"FALLA {message!r} -> {result} (esperado {expected})")
+    resolved = sum(1 for _, expected in EXAMPLES if expected is not None)
+    print(f"{len(EXAMPLES) - failures}/{len(EXAMPLES)} ejemplos OK ({resolved} se resuelven sin LLM)")
+    return failures
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if main() else 0)
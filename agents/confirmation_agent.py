@@ -8,7 +8,8 @@ y necesita confirmar su elección antes de continuar.
 from typing import Dict, Any
 from langchain_core.messages import SystemMessage, HumanMessage
 from .base_agent import BaseAgent
-from prompts.confirmation_prompts import CONFIRMATION_PROMPT
+from prompts.confirmation_prompts import CONFIRMATION_USER_PROMPT
+from prompts.registry import question_text
 
 class ConfirmationAgent(BaseAgent):
     """Agente que pide confirmación de la razón del usuario"""
@@ -26,13 +27,11 @@ class ConfirmationAgent(BaseAgent):
         """Inicializar el agente confirmador solo una vez"""
         if not self._initialized:
             # Configurar el modelo específico para el confirmador
-            from langchain_groq import ChatGroq
-            from config import Config
+            from .model_clients import get_model_clients
 
             # Crear modelo específico del confirmador
-            self.model = ChatGroq(
-                api_key=Config.GROQ_API_KEY,
-                model=Config.GROQ_MODEL,
+            self.model = get_model_clients().chat_groq(
+                streamed=True,    # Sus tokens van al cliente: sin failover a mitad del stream
                 temperature=0.7,  # Temperatura media para respuestas más naturales
                 max_tokens=500    # Respuestas más largas para confirmaciones
             )
@@ -47,47 +46,47 @@ class ConfirmationAgent(BaseAgent):
         """Implementación del método abstracto requerido por BaseAgent"""
         print("---Confirmation Node---")
         
-        # Obtener la razón del usuario del estado
-        reason = state.get("reason", "")
+        messages_for_analysis = self._build_messages(state)
         
-        # Obtener el tipo de pregunta actual y resolverlo a texto legible
-        current_question = state.get("question", "")
+        # Usar el modelo para generar la confirmación
+        self._record_input_tokens(messages_for_analysis)
+        response = self.model.invoke(messages_for_analysis)
         
-        # Importar el mapping para resolver la pregunta
-        from prompts.greeting_prompts import GREETING_BY_TYPE
+        return self._build_result(response)
+
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---Confirmation Node---")
         
-        # Resolver pregunta actual a texto legible
-        question_text = ""
-        if current_question:
-            mapping = GREETING_BY_TYPE.get(current_question)
-            if isinstance(mapping, dict):
-                # Si el mapping tiene "question", usar ese campo
-                question_text = mapping.get("question", current_question)
-            elif isinstance(mapping, str):
-                question_text = mapping
-            else:
-                question_text = current_question
+        messages_for_analysis = self._build_messages(state)
         
-        if not question_text:
-            question_text = "tu plan de retiro"
+        # Usar el modelo para generar la confirmación
+        self._record_input_tokens(messages_for_analysis)
+        response = await self.model.ainvoke(messages_for_analysis)
         
-        print(f"[Confirmation] Pregunta: {question_text}")
+        return self._build_result(response)
+
+    def _build_messages(self, state: Dict[str, Any]) -> list:
+        """Armar el prompt de confirmación a partir del estado"""
+        # Obtener la razón del usuario del estado
+        reason = state.get("reason", "")
+        
+        # Obtener el tipo de pregunta actual
+        current_question = state.get("question", "")
+        
+        print(f"[Confirmation] Pregunta: {question_text(current_question) or 'tu plan de retiro'}")
         print(f"[Confirmation] Razón: {reason}")
         
-        # Crear el prompt de confirmación con contexto
-        confirmation_prompt = CONFIRMATION_PROMPT.format(
-            question=question_text,
-            reason=reason
-        )
+        # Prompt precompilado para la pregunta; la elección del usuario va en el mensaje humano
+        confirmation_prompt = self.prompts.plan("confirmation", current_question).system_prefix
         
         # Preparar mensajes para el modelo
         system_message = SystemMessage(content=confirmation_prompt)
-        human_message = HumanMessage(content="Por favor confirma mi elección")
-        messages_for_analysis = [system_message, human_message]
-        
-        # Usar el modelo para generar la confirmación
-        response = self.model.invoke(messages_for_analysis)
-        
+        human_message = HumanMessage(content=CONFIRMATION_USER_PROMPT.format(reason=reason))
+        return [system_message, human_message]
+
+    def _build_result(self, response) -> Dict[str, Any]:
+        """Armar el resultado del nodo a partir de la respuesta del modelo"""
         # Crear mensaje de confirmación
         from langchain_core.messages import AIMessage
         confirmation_message = AIMessage(content=response.content)
@@ -0,0 +1,274 @@
+"""
+Recuperación local de pasajes del documento del dominio para el Profesor.
+
+Reemplaza la herramienta file_search de la Responses API (un salto remoto en
+cada turno del Profesor) por un índice BM25 local:
+
+- El documento (`doc de info del dominio.md`) se divide en pasajes por sus
+  encabezados (#, ## y ###); cada pasaje lleva la etiqueta de sección más
+  cercana ([CONCEPTO], [MECANISMO], [RETORNOS], ...) y el camino de títulos.
+- El índice se construye al iniciar y se persiste en un archivo binario que
+  se abre con mmap: los términos se cargan en un dict y los postings y textos
+  se leen del mapa solo cuando se usan. Si cambia el documento (hash SHA-256
+  en el encabezado) el índice se reconstruye.
+- Los top-k pasajes se inyectan en el prompt de sistema del Profesor.
+
+Uso:
+    python -m agents.domain_retrieval build
+    python -m agents.domain_retrieval search "¿qué es el interés compuesto?"
+"""
+
+import os
+import re
+import sys
+import math
+import mmap
+import heapq
+import struct
+import hashlib
+from typing import Dict, List, Optional, NamedTuple
+
+from .reason_parser import normalize
+
+INDEX_MAGIC = b"GDIX"
+INDEX_VERSION = 1
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Formatos binarios (little-endian)
+_HEADER = struct.Struct("<4sI32sIId")  # magic, versión, sha256 del documento, pasajes, términos, largo promedio
+_DOC_ENTRY = struct.Struct("<QII")     # offset del texto, bytes del texto, tokens del pasaje
+_TERM_ENTRY = struct.Struct("<QIQI")   # offset del término, bytes del término, offset de postings, df
+_POSTING = struct.Struct("<II")        # pasaje, frecuencia del término
+
+_HEADING = re.compile(r"^(#{1,3})\s+(.*)$")
+_TAG = re.compile(r"^\[([^\]]+)\]\s*(.*)$")
+_FIELD_SEPARATOR = "\x1f"
+
+_STOPWORDS = {
+    "a", "al", "algo", "ante", "como", "con", "cual", "cuando", "de", "del", "desde", "donde", "e", "el",
+    "ella", "en", "entre", "era", "es", "esa", "ese", "eso", "esta", "este", "esto", "fue", "ha", "hay",
+    "la", "las", "le", "les", "lo", "los", "me", "mi", "mas", "muy", "no", "o", "para", "pero", "por",
+    "que", "se", "si", "sin", "sobre", "su", "sus", "te", "tu", "un", "una", "uno", "unos", "unas", "y", "ya",
+}
+
+
+class Passage(NamedTuple):
+    """Pasaje del documento con su etiqueta de sección"""
+    tag: str
+    title: str
+    text: str
+    score: float = 0.0
+
+
+def tokenize(text: str) -> List[str]:
+    """Términos del texto: normalizado, sin palabras vacías y con plurales simples recortados"""
+    terms = []
+    for word in re.findall(r"\w+", normalize(text)):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("es") and word[-3] in "nrlsdzj":
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def chunk_document(text: str) -> List[Passage]:
+    """Dividir el documento en pasajes por encabezados #, ## y ###"""
+    passages = []
+    titles: Dict[int, str] = {}
+    tags: Dict[int, str] = {}
+    level, body = 0, []
+
+    def flush():
+        content = "\n".join(body).strip()
+        if level and content:
+            tag = next((tags[depth] for depth in range(level, 0, -1) if tags.get(depth)), "")
+            title = " > ".join(titles[depth] for depth in range(1, level + 1) if titles.get(depth))
+            passages.append(Passage(tag, title, content))
+
+    for line in text.splitlines():
+        match = _HEADING.match(line)
+        if not match:
+            body.append(line)
+            continue
+        flush()
+        level, body = len(match.group(1)), []
+        tag_match = _TAG.match(match.group(2).strip())
+        tags[level] = tag_match.group(1) if tag_match else ""
+        titles[level] = (tag_match.group(2) if tag_match else match.group(2)).strip()
+        for depth in range(level + 1, 4):
+            titles.pop(depth, None)
+            tags.pop(depth, None)
+    flush()
+    return passages
+
+
+def document_digest(doc_path: str) -> bytes:
+    with open(doc_path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def build_index(doc_path: str, index_path: str) -> int:
+    """Construir el índice BM25 del documento y escribirlo en index_path
+
+    Returns:
+        Cantidad de pasajes indexados
+    """
+    with open(doc_path, "r", encoding="utf-8") as f:
+        passages = chunk_document(f.read())
+
+    postings: Dict[str, List[tuple]] = {}
+    lengths = []
+    for doc_id, passage in enumerate(passages):
+        # El título también se indexa: muchas preguntas repiten el encabezado
+        terms = tokenize(f"{passage.title} {passage.text}")
+        lengths.append(len(terms))
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc_id, tf))
+
+    docs_blob = [_FIELD_SEPARATOR.join(passage[:3]).encode("utf-8") for passage in passages]
+    terms = sorted(postings)
+    terms_blob = [term.encode("utf-8") for term in terms]
+
+    # Layout: encabezado | tabla de pasajes | tabla de términos | textos | términos | postings
+    offset = _HEADER.size + _DOC_ENTRY.size * len(passages) + _TERM_ENTRY.size * len(terms)
+    doc_entries = []
+    for blob, length in zip(docs_blob, lengths):
+        doc_entries.append(_DOC_ENTRY.pack(offset, len(blob), length))
+        offset += len(blob)
+    term_offsets = []
+    for blob in terms_blob:
+        term_offsets.append(offset)
+        offset += len(blob)
+    term_entries = []
+    for term, blob, term_offset in zip(terms, terms_blob, term_offsets):
+        term_entries.append(_TERM_ENTRY.pack(term_offset, len(blob), offset, len(postings[term])))
+        offset += _POSTING.size * len(postings[term])
+
+    avgdl = sum(lengths) / len(lengths) if lengths else 0.0
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, document_digest(doc_path), len(passages), len(terms), avgdl))
+        f.writelines(doc_entries)
+        f.writelines(term_entries)
+        f.writelines(docs_blob)
+        f.writelines(terms_blob)
+        for term in terms:
+            f.write(b"".join(_POSTING.pack(doc_id, tf) for doc_id, tf in postings[term]))
+    os.replace(tmp_path, index_path)
+    return len(passages)
+
+
+class DomainIndex:
+    """Índice BM25 abierto con mmap"""
+
+    def __init__(self, index_path: str):
+        with open(index_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.digest, self.num_docs, num_terms, self.avgdl = _HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{index_path} no es un índice del dominio v{INDEX_VERSION}")
+        self._docs = [
+            _DOC_ENTRY.unpack_from(self._mmap, _HEADER.size + _DOC_ENTRY.size * doc_id)
+            for doc_id in range(self.num_docs)
+        ]
+        terms_start = _HEADER.size + _DOC_ENTRY.size * self.num_docs
+        self._terms: Dict[str, tuple] = {}
+        for position in range(num_terms):
+            term_offset, term_len, postings_offset, df = _TERM_ENTRY.unpack_from(
+                self._mmap, terms_start + _TERM_ENTRY.size * position
+            )
+            term = self._mmap[term_offset:term_offset + term_len].decode("utf-8")
+            self._terms[term] = (postings_offset, df)
+
+    @classmethod
+    def load_or_build(cls, doc_path: str, index_path: str) -> "DomainIndex":
+        """Abrir el índice; reconstruirlo si falta, es de otra versión o el documento cambió"""
+        digest = document_digest(doc_path)
+        if os.path.exists(index_path):
+            try:
+                index = cls(index_path)
+                if index.digest == digest:
+                    return index
+                index.close()
+            except (ValueError, struct.error) as e:
+                print(f"[DomainRetrieval] Índice inválido, se reconstruye: {e}")
+        count = build_index(doc_path, index_path)
+        print(f"[DomainRetrieval] Índice construido: {count} pasajes en {index_path}")
+        return cls(index_path)
+
+    def passage(self, doc_id: int, score: float = 0.0) -> Passage:
+        text_offset, text_len, _ = self._docs[doc_id]
+        tag, title, text = self._mmap[text_offset:text_offset + text_len].decode("utf-8").split(_FIELD_SEPARATOR, 2)
+        return Passage(tag, title, text, score)
+
+    def search(self, query: str, k: int) -> List[Passage]:
+        """Los k pasajes con mayor puntaje BM25 (solo los que comparten algún término)"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            postings_offset, df = entry
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in _POSTING.iter_unpack(self._mmap[postings_offset:postings_offset + _POSTING.size * df]):
+                length_norm = 1 - BM25_B + BM25_B * self._docs[doc_id][2] / self.avgdl
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [self.passage(doc_id, score) for doc_id, score in best]
+
+    def close(self):
+        self._mmap.close()
+
+
+def format_passages(passages: List[Passage]) -> str:
+    """Pasajes como texto para el prompt del Profesor"""
+    return "\n\n".join(f"[{passage.tag}] {passage.title}\n{passage.text}" for passage in passages)
+
+
+# Instancia global del índice (None si la recuperación local está deshabilitada)
+_domain_index = None
+_domain_index_loaded = False
+
+def get_domain_index() -> Optional[DomainIndex]:
+    """Obtener el índice del dominio (se construye la primera vez si hace falta)"""
+    global _domain_index, _domain_index_loaded
+    if not _domain_index_loaded:
+        from config import Config
+
+        if Config.LOCAL_RETRIEVAL_ENABLED:
+            try:
+                _domain_index = DomainIndex.load_or_build(Config.DOMAIN_DOC_PATH, Config.DOMAIN_INDEX_PATH)
+            except OSError as e:
+                print(f"[DomainRetrieval] No se pudo cargar el índice, el Profesor responde sin pasajes: {e}")
+        _domain_index_loaded = True
+    return _domain_index
+
+
+def main(argv: List[str]) -> int:
+    from config import Config
+
+    if not argv or argv[0] not in ("build", "search"):
+        print(__doc__)
+        return 1
+    if argv[0] == "build":
+        count = build_index(Config.DOMAIN_DOC_PATH, Config.DOMAIN_INDEX_PATH)
+        print(f"{count} pasajes indexados en {Config.DOMAIN_INDEX_PATH}")
+        return 0
+    index = DomainIndex.load_or_build(Config.DOMAIN_DOC_PATH, Config.DOMAIN_INDEX_PATH)
+    for passage in index.search(" ".join(argv[1:]), Config.DOMAIN_RETRIEVAL_TOP_K):
+        print(f"{passage.score:6.2f}  [{passage.tag}] {passage.title}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
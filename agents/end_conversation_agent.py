@@ -5,10 +5,13 @@ Este agente finaliza la conversación cuando el usuario ha confirmado
 su elección y está listo para terminar.
 """
 
-from typing import Dict, Any, Literal
+from typing import Dict, Any, Literal, Optional
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from .base_agent import BaseAgent
-from prompts.end_conversation_prompts import END_CONVERSATION_PROMPT
+from prompts.end_conversation_prompts import END_CONVERSATION_USER_PROMPT
+
+# Mensaje usado cuando faltan pregunta o razón para personalizar la despedida
+GENERIC_END_MESSAGE = "Perfecto, has completado tu consulta. ¡Que tengas un excelente día!"
 
 class EndConversationAgent(BaseAgent):
     """Agente que finaliza la conversación"""
@@ -26,13 +29,11 @@ class EndConversationAgent(BaseAgent):
         """Inicializar el agente end conversation solo una vez"""
         if not self._initialized:
             # Configurar el modelo específico para el end conversation
-            from langchain_groq import ChatGroq
-            from config import Config
+            from .model_clients import get_model_clients
 
             # Crear modelo específico del end conversation con parámetros optimizados
-            self.model = ChatGroq(
-                api_key=Config.GROQ_API_KEY,
-                model=Config.GROQ_MODEL,
+            self.model = get_model_clients().chat_groq(
+                streamed=True,    # Sus tokens van al cliente: sin failover a mitad del stream
                 temperature=0.7,  # Temperatura media para mensajes más naturales
                 max_tokens=400    # Respuestas más largas para despedida
             )
@@ -47,14 +48,48 @@ class EndConversationAgent(BaseAgent):
         """Implementación del método abstracto requerido por BaseAgent"""
         print("---End Conversation Node---")
         
-        # Obtener el estado actual
-        current_status = state.get("status", "")
+        if not self._should_process(state):
+            return state
         
-        # Solo procesar si el estado es "confirmed"
-        if current_status != "confirmed":
-            print(f"[EndConversation] Estado actual '{current_status}' no es 'confirmed', retornando sin cambios")
+        messages_for_analysis = self._build_messages(state)
+        if messages_for_analysis is None:
+            end_message = GENERIC_END_MESSAGE
+        else:
+            # Usar el modelo para generar el mensaje
+            self._record_input_tokens(messages_for_analysis)
+            response = self.model.invoke(messages_for_analysis)
+            end_message = response.content
+
+        return self._finish_conversation(state, end_message)
+
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---End Conversation Node---")
+        
+        if not self._should_process(state):
             return state
         
+        messages_for_analysis = self._build_messages(state)
+        if messages_for_analysis is None:
+            end_message = GENERIC_END_MESSAGE
+        else:
+            # Usar el modelo para generar el mensaje
+            self._record_input_tokens(messages_for_analysis)
+            response = await self.model.ainvoke(messages_for_analysis)
+            end_message = response.content
+
+        return self._finish_conversation(state, end_message)
+
+    def _should_process(self, state: Dict[str, Any]) -> bool:
+        """Solo se procesa si el estado es 'confirmed'"""
+        current_status = state.get("status", "")
+        if current_status != "confirmed":
+            print(f"[EndConversation] Estado actual '{current_status}' no es 'confirmed', retornando sin cambios")
+            return False
+        return True
+
+    def _build_messages(self, state: Dict[str, Any]) -> Optional[list]:
+        """Armar el prompt de despedida, o None si corresponde el mensaje genérico"""
         # Obtener información del estado
         current_question = state.get("question", "")
         reason = state.get("reason", "")
@@ -62,23 +97,18 @@ class EndConversationAgent(BaseAgent):
         # Si no hay pregunta o razón, crear mensaje genérico
         if not current_question or not reason:
             print(f"[EndConversation] Faltan pregunta o razón, creando mensaje genérico")
-            end_message = "Perfecto, has completado tu consulta. ¡Que tengas un excelente día!"
-        else:
-            # Crear el prompt para generar mensaje de despedida personalizado
-            end_prompt = END_CONVERSATION_PROMPT.format(
-                current_question=current_question,
-                reason=reason
-            )
+            return None
 
-            # Preparar mensajes para el modelo
-            system_message = SystemMessage(content=end_prompt)
-            human_message = HumanMessage(content="Genera un mensaje de despedida personalizado")
-            messages_for_analysis = [system_message, human_message]
-            
-            # Usar el modelo para generar el mensaje
-            response = self.model.invoke(messages_for_analysis)
-            end_message = response.content
+        # Prompt precompilado para la pregunta; la opción elegida va en el mensaje humano
+        end_prompt = self.prompts.plan("end_conversation", current_question).system_prefix
+
+        # Preparar mensajes para el modelo
+        system_message = SystemMessage(content=end_prompt)
+        human_message = HumanMessage(content=END_CONVERSATION_USER_PROMPT.format(reason=reason))
+        return [system_message, human_message]
 
+    def _finish_conversation(self, state: Dict[str, Any], end_message: str) -> Dict[str, Any]:
+        """Marcar la conversación como finalizada y agregar la despedida"""
         # Crear mensaje de despedida
         farewell_message = AIMessage(content=end_message)
         
@@ -5,10 +5,11 @@ Este agente evalúa si la conversación está lista para cerrar
 y decide el siguiente paso basado en el estado actual del usuario.
 """
 
-from typing import Dict, Any, Literal
+from typing import Dict, Any, Literal, Optional
 from langchain_core.messages import SystemMessage, HumanMessage
 from .base_agent import BaseAgent
-from prompts.evaluate_close_prompts import EVALUATE_CLOSE_PROMPT
+from .close_classifier import classify_close
+from .reason_parser import normalize
 
 class EvaluateCloseAgent(BaseAgent):
     """Agente que evalúa si la conversación está lista para cerrar"""
@@ -26,13 +27,12 @@ class EvaluateCloseAgent(BaseAgent):
         """Inicializar el agente evaluate close solo una vez"""
         if not self._initialized:
             # Configurar el modelo específico para el evaluate close
-            from langchain_groq import ChatGroq
+            from .model_clients import get_model_clients
             from config import Config
 
             # Crear modelo específico del evaluate close con parámetros optimizados
-            self.model = ChatGroq(
-                api_key=Config.GROQ_API_KEY,
-                model=Config.GROQ_MODEL,
+            self.model = get_model_clients().chat_groq(
+                hedge="evaluate_close",  # Llamada corta e idempotente: duplicado si tarda
                 temperature=0.1,  # Baja temperatura para decisiones consistentes
                 max_tokens=300    # Respuestas concisas para decisiones
             )
@@ -40,6 +40,12 @@ class EvaluateCloseAgent(BaseAgent):
             # Llamar al constructor padre con el modelo configurado
             super().__init__(self.model, "evaluate_close")
 
+            # Camino rápido: afirmaciones, dudas y preguntas claras se clasifican con reglas
+            self.rules_enabled = Config.CLOSE_CLASSIFIER_ENABLED
+
+            # Respuestas del modelo cacheadas por (pregunta, razón, mensaje normalizado)
+            self.prompt_hash = self.prompts.agent_hash("evaluate_close")
+
             # Marcar como inicializado
             self._initialized = True
 
@@ -76,13 +82,53 @@ class EvaluateCloseAgent(BaseAgent):
         """Implementación del método abstracto requerido por BaseAgent"""
         print("---Evaluate Close Node---")
         
+        messages_for_analysis = self._prepare_analysis(state)
+        if messages_for_analysis is None:
+            return state
+        
+        analyzed = self._analyzed_decision(state)
+        if analyzed is not None:
+            return self._apply_decision(state, *analyzed)
+        
+        decision = self._classify_with_rules(messages_for_analysis)
+        if decision is not None:
+            return self._apply_decision(state, decision, "rules")
+        
+        # Usar el modelo para decidir
+        response = self._invoke_model_cached(messages_for_analysis, *self._cache_parts(state, messages_for_analysis))
+        
+        return self._apply_decision(state, self._parse_decision_response(response.content), "llm")
+
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---Evaluate Close Node---")
+        
+        messages_for_analysis = self._prepare_analysis(state)
+        if messages_for_analysis is None:
+            return state
+        
+        analyzed = self._analyzed_decision(state)
+        if analyzed is not None:
+            return self._apply_decision(state, *analyzed)
+        
+        decision = self._classify_with_rules(messages_for_analysis)
+        if decision is not None:
+            return self._apply_decision(state, decision, "rules")
+        
+        # Usar el modelo para decidir
+        response = await self._ainvoke_model_cached(messages_for_analysis, *self._cache_parts(state, messages_for_analysis))
+        
+        return self._apply_decision(state, self._parse_decision_response(response.content), "llm")
+
+    def _prepare_analysis(self, state: Dict[str, Any]) -> Optional[list]:
+        """Armar los mensajes para el modelo, o None si no hay que llamarlo"""
         # Obtener el estado actual
         current_status = state.get("status", "")
         
         # Solo procesar si el estado es "waiting_confirmation"
         if current_status != "waiting_confirmation":
             print(f"[EvaluateClose] Estado actual '{current_status}' no es 'waiting_confirmation', retornando sin cambios")
-            return state
+            return None
         
         # Obtener información del estado
         current_question = state.get("question", "")
@@ -92,19 +138,16 @@ class EvaluateCloseAgent(BaseAgent):
         if not current_question or not reason:
             print(f"[EvaluateClose] Faltan pregunta o razón, yendo al profesor")
             state["status"] = "exploring"
-            return state
+            return None
 
-        # Crear el prompt para decidir el siguiente paso
-        decision_prompt = EVALUATE_CLOSE_PROMPT.format(
-            current_question=current_question,
-            reason=reason
-        )
+        # Prompt precompilado para decidir el siguiente paso
+        decision_prompt = self.prompts.plan("evaluate_close").system_prefix
 
         # Preparar mensajes para el modelo
         system_message = SystemMessage(content=decision_prompt)
         messages = state.get("messages", [])
         if not messages:
-            return state
+            return None
 
         # Obtener el último mensaje del usuario
         user_message = ""
@@ -114,18 +157,37 @@ class EvaluateCloseAgent(BaseAgent):
             user_message = last_message.content
 
         if not user_message:
-            return state
+            return None
 
-        messages_for_analysis = [system_message, user_message]
-        
-        # Usar el modelo para decidir
-        response = self.model.invoke(messages_for_analysis)
-        
-        # Parsear la decisión
-        decision = self._parse_decision_response(response.content)
+        return [system_message, user_message]
 
+    def _cache_parts(self, state: Dict[str, Any], messages_for_analysis: list) -> tuple:
+        """Entradas de la llamada: pregunta, razón y mensaje del usuario normalizado"""
+        return state.get("question", ""), state.get("reason", ""), normalize(messages_for_analysis[-1])
+
+    def _analyzed_decision(self, state: Dict[str, Any]) -> Optional[tuple]:
+        """Decisión ya tomada por el TurnAnalyzer para este mismo mensaje (decision, fuente)"""
+        analysis = state.get("turn_analysis")
+        messages = state.get("messages", [])
+        if not analysis or not analysis.get("decision") or not messages:
+            return None
+        if analysis.get("message_id") != getattr(messages[-1], "id", None):
+            return None
+        return analysis["decision"], analysis.get("source", "turn_analyzer")
+
+    def _classify_with_rules(self, messages_for_analysis: list) -> Optional[str]:
+        """Decidir sin LLM (None si la respuesta es ambigua y hay que consultar al modelo)"""
+        if not self.rules_enabled:
+            return None
+        # El último elemento del análisis es el mensaje del usuario
+        return classify_close(messages_for_analysis[-1])
+
+    def _apply_decision(self, state: Dict[str, Any], decision: str, source: str) -> Dict[str, Any]:
+        """Aplicar la decisión (de las reglas o del modelo) al estado"""
+        state["close_source"] = source
+        
         # Log del resultado
-        print(f"[EvaluateClose] Decisión tomada: {decision}")
+        print(f"[EvaluateClose] Decisión tomada: {decision} ({source})")
         
         # Aplicar la decisión al estado
         if decision == "confirmation":
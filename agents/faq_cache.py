@@ -0,0 +1,186 @@
+"""
+Caché por similitud de respuestas del Profesor para preguntas frecuentes.
+
+Buena parte del tráfico del Profesor son las mismas pocas preguntas por tipo
+de pregunta ("¿qué diferencia hay entre renta y monto final?", "¿qué es el
+interés compuesto?"), y cada una paga una llamada completa a la Responses API
+con file_search. Este caché:
+
+- Representa cada pregunta con MinHash sobre 4-gramas de caracteres del texto
+  normalizado (sin acentos, signos ni palabras vacías), solo CPU.
+- Busca por tipo de pregunta y sirve la respuesta guardada si la similitud
+  estimada supera el umbral.
+- Guarda solo respuestas de turnos sin resumen (la respuesta no depende del
+  contexto previo) a mensajes que son preguntas autocontenidas.
+- Tiene tamaño acotado por tipo (LRU) y registra una muestra de aciertos en
+  un JSONL de auditoría para revisar falsos positivos del umbral.
+"""
+
+import re
+import json
+import zlib
+import random
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, NamedTuple
+
+from .reason_parser import normalize
+
+# Cantidad de funciones de hash del MinHash (error estándar ~ 1/sqrt(NUM_PERM))
+NUM_PERM = 64
+SHINGLE_SIZE = 4
+_PRIME = (1 << 61) - 1
+
+_STOPWORDS = {
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "al", "a", "en", "y", "o", "e",
+    "que", "me", "te", "se", "lo", "le", "mi", "tu", "es", "por", "para", "con", "hay", "entre",
+    "podes", "puedes", "podrias", "explicar", "explicame", "explicas", "decir", "decime", "bien",
+    "hola", "profe", "porfa", "favor", "sobre", "mas",
+}
+_INTERROGATIVE = re.compile(r"[?¿]|^(que|como|cual|cuales|cuanto|cuanta|por que|cuando|donde|explica\w*)\b")
+
+# Mínimo de palabras con contenido: "¿y eso?" depende del contexto y no se cachea
+MIN_CONTENT_WORDS = 2
+
+_rng = random.Random(0)
+_HASH_PARAMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def content_words(text: str) -> List[str]:
+    """Palabras con contenido del texto normalizado"""
+    words = re.findall(r"\w+", normalize(text))
+    return [word for word in words if word not in _STOPWORDS]
+
+
+def minhash(text: str) -> Optional[tuple]:
+    """Firma MinHash de los 4-gramas de caracteres (None si el texto no tiene contenido)"""
+    joined = " ".join(content_words(text))
+    if not joined:
+        return None
+    shingles = {joined[i:i + SHINGLE_SIZE] for i in range(max(1, len(joined) - SHINGLE_SIZE + 1))}
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    return tuple(min((a * value + b) % _PRIME for value in hashes) for a, b in _HASH_PARAMS)
+
+
+def similarity(signature: tuple, other: tuple) -> float:
+    """Jaccard estimado entre dos firmas"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+
+class _FaqEntry(NamedTuple):
+    question: str
+    signature: tuple
+    answer: str
+
+
+class FaqAnswerCache:
+    """Respuestas del Profesor por tipo de pregunta, buscadas por similitud MinHash"""
+
+    def __init__(self, threshold: float, max_per_type: int, audit_rate: float, audit_path: Optional[str]):
+        """
+        Args:
+            threshold: Similitud mínima (Jaccard estimado) para servir una respuesta
+            max_per_type: Preguntas guardadas por tipo de pregunta (LRU)
+            audit_rate: Fracción de aciertos que se registra para auditar el umbral
+            audit_path: JSONL de auditoría (None = no registrar)
+        """
+        self.threshold = threshold
+        self.max_per_type = max_per_type
+        self.audit_rate = audit_rate
+        self.audit_path = audit_path
+        self._entries: Dict[str, "OrderedDict[tuple, _FaqEntry]"] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.audited = 0
+
+    @classmethod
+    def from_config(cls) -> Optional["FaqAnswerCache"]:
+        """Crear el caché con los valores de Config (None si está deshabilitado)"""
+        from config import Config
+
+        if not Config.FAQ_CACHE_ENABLED:
+            return None
+        return cls(
+            threshold=Config.FAQ_CACHE_THRESHOLD,
+            max_per_type=Config.FAQ_CACHE_MAX_PER_TYPE,
+            audit_rate=Config.FAQ_CACHE_AUDIT_RATE,
+            audit_path=Config.FAQ_CACHE_AUDIT_PATH or None
+        )
+
+    def is_cacheable(self, message: str) -> bool:
+        """Pregunta autocontenida: interrogativa y con suficientes palabras de contenido"""
+        if not isinstance(message, str):
+            return False
+        return bool(_INTERROGATIVE.search(normalize(message))) and len(content_words(message)) >= MIN_CONTENT_WORDS
+
+    def lookup(self, question_type: str, message: str) -> Optional[str]:
+        """Respuesta guardada para una pregunta similar del mismo tipo, o None"""
+        if not self.is_cacheable(message):
+            return None
+        signature = minhash(message)
+        best: Optional[_FaqEntry] = None
+        best_score = 0.0
+        with self._lock:
+            entries = self._entries.get(question_type or "", {})
+            for entry in entries.values():
+                score = similarity(signature, entry.signature)
+                if score > best_score:
+                    best, best_score = entry, score
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            entries.move_to_end(best.signature)
+            self.hits += 1
+        if self.audit_path and self._rng.random() < self.audit_rate:
+            self._audit(question_type, message, best, best_score)
+        return best.answer
+
+    def store(self, question_type: str, message: str, answer: str):
+        """Guardar la respuesta del modelo a una pregunta autocontenida"""
+        if not answer or not self.is_cacheable(message):
+            return
+        signature = minhash(message)
+        with self._lock:
+            entries = self._entries.setdefault(question_type or "", OrderedDict())
+            entries[signature] = _FaqEntry(message, signature, answer)
+            entries.move_to_end(signature)
+            while len(entries) > self.max_per_type:
+                entries.popitem(last=False)
+            self.stored += 1
+
+    def _audit(self, question_type: str, message: str, entry: _FaqEntry, score: float):
+        """Registrar un acierto para revisar a mano si fue un falso positivo"""
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "question_type": question_type,
+            "query": message,
+            "matched_question": entry.question,
+            "similarity": round(score, 3),
+            "threshold": self.threshold,
+        }
+        try:
+            with open(self.audit_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.audited += 1
+        except OSError as e:
+            print(f"[FaqCache] No se pudo escribir la auditoría: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del caché"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = {question_type: len(entries) for question_type, entries in self._entries.items()}
+        return {
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stored": self.stored,
+            "audited": self.audited,
+            "entries": entries,
+        }
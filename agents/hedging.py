@@ -0,0 +1,197 @@
+"""
+Requests "hedged" para las llamadas cortas de clasificación.
+
+El p99 de los turnos lo dominan colas ocasionales de varios segundos en las
+llamadas a Groq de ValidateReason y EvaluateClose, que son chicas e
+idempotentes. HedgedChatModel envuelve el modelo del agente:
+
+- Si la llamada no volvió después de un retardo (percentil configurable de
+  las latencias recientes del modelo), manda un duplicado, al mismo modelo o
+  a uno alternativo de otro proveedor.
+- Se queda con la primera respuesta y cancela la otra (en la versión sync la
+  perdedora no se puede interrumpir: termina en su thread y se descarta).
+- La fracción de llamadas con duplicado tiene un tope; se cuentan los
+  duplicados enviados, los que ganaron y los que el tope no dejó enviar.
+
+Expone invoke/ainvoke y delega el resto de los atributos (model_name, ...)
+al modelo principal, así el caché de respuestas y los agentes no cambian.
+"""
+
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional
+
+# Threads para las llamadas sync con duplicado (principal + duplicado por llamada)
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+# Latencias necesarias antes de usar el percentil en lugar del retardo inicial
+MIN_SAMPLES = 20
+
+
+def _succeeded(task) -> bool:
+    """¿La llamada terminó bien? (cancelled() primero: exception() de una cancelada lanza CancelledError)"""
+    return not task.cancelled() and task.exception() is None
+
+
+class HedgedChatModel:
+    """Modelo de chat que manda un duplicado si la respuesta tarda más que el percentil"""
+
+    def __init__(self, primary, alternate=None, percentile: float = 0.95, initial_delay: float = 1.0,
+                 min_delay: float = 0.2, max_rate: float = 0.1, window: int = 200):
+        """
+        Args:
+            primary: Modelo principal
+            alternate: Modelo para el duplicado (None = el mismo principal)
+            percentile: Percentil de las latencias recientes usado como retardo
+            initial_delay: Retardo en segundos mientras no hay suficientes latencias
+            min_delay: Retardo mínimo en segundos
+            max_rate: Fracción máxima de llamadas recientes con duplicado
+            window: Llamadas recientes consideradas para el percentil y el tope
+        """
+        self.primary = primary
+        self.alternate = alternate
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_rate = max_rate
+        self._latencies: deque = deque(maxlen=window)
+        self._recent_hedges: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        # Métricas
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.capped = 0
+
+    def __getattr__(self, name: str):
+        # Solo se llama para atributos que el wrapper no tiene (model_name, temperature, ...)
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def hedge_delay(self) -> float:
+        """Segundos a esperar antes de mandar el duplicado"""
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))])
+
+    def _start_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def _record(self, latency: float, hedged: bool):
+        with self._lock:
+            self._latencies.append(latency)
+            self._recent_hedges.append(hedged)
+
+    def _allow_hedge(self) -> bool:
+        """Respetar el tope de duplicados sobre las llamadas recientes
+
+        La tasa se calcula sobre las llamadas registradas (no sobre el tamaño de la
+        ventana); con menos de MIN_SAMPLES se toma MIN_SAMPLES para no duplicar todo al arrancar.
+        """
+        with self._lock:
+            samples = max(len(self._recent_hedges), MIN_SAMPLES)
+            if sum(self._recent_hedges) + 1 > self.max_rate * samples:
+                self.capped += 1
+                return False
+            self.hedged += 1
+            return True
+
+    def _won(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def invoke(self, messages, *args, **kwargs):
+        """invoke con duplicado tardío en otro thread"""
+        self._start_call()
+        start_time = time.perf_counter()
+        primary = _executor.submit(contextvars.copy_context().run, self.primary.invoke, messages, *args, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_delay())
+        if done or not self._allow_hedge():
+            result = primary.result()
+            self._record(time.perf_counter() - start_time, False)
+            return result
+
+        model = self.alternate or self.primary
+        hedge = _executor.submit(contextvars.copy_context().run, model.invoke, messages, *args, **kwargs)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = done.pop()
+            if _succeeded(winner) or not pending:
+                break
+        # La latencia del principal se registra como cota inferior si perdió
+        self._record(time.perf_counter() - start_time, True)
+        if winner is hedge and _succeeded(winner):
+            self._won()
+        return winner.result()
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        """ainvoke con duplicado tardío; la llamada perdedora se cancela"""
+        self._start_call()
+        start_time = time.perf_counter()
+        primary = asyncio.ensure_future(self.primary.ainvoke(messages, *args, **kwargs))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay())
+            if done or not self._allow_hedge():
+                result = await primary
+                self._record(time.perf_counter() - start_time, False)
+                return result
+
+            model = self.alternate or self.primary
+            hedge = asyncio.ensure_future(model.ainvoke(messages, *args, **kwargs))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = done.pop()
+                if _succeeded(winner) or not pending:
+                    break
+            self._record(time.perf_counter() - start_time, True)
+            if winner is hedge and _succeeded(winner):
+                self._won()
+            return winner.result()
+        finally:
+            # Cancelar la perdedora (o ambas si se canceló el turno)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Llamadas, duplicados, victorias del duplicado y retardo actual"""
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "capped": self.capped,
+                "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+                "delay_ms": round(delay * 1000),
+                "alternate": self.alternate is not None,
+            }
+
+
+def hedge_from_config(primary, alternate=None) -> Optional[HedgedChatModel]:
+    """Envolver el modelo con los parámetros de Config (None si el hedging está deshabilitado)"""
+    from config import Config
+
+    if not Config.HEDGE_ENABLED:
+        return None
+    return HedgedChatModel(
+        primary,
+        alternate=alternate,
+        percentile=Config.HEDGE_PERCENTILE,
+        initial_delay=Config.HEDGE_INITIAL_DELAY_MS / 1000,
+        min_delay=Config.HEDGE_MIN_DELAY_MS / 1000,
+        max_rate=Config.HEDGE_MAX_RATE,
+        window=Config.HEDGE_WINDOW
+    )
@@ -0,0 +1,268 @@
+"""
+Fábrica de clientes de modelos con transporte HTTP compartido.
+
+Cada agente singleton creaba su propio ChatGroq o ChatOpenAI, y con ellos un
+pool de conexiones propio: conexiones TCP, handshakes TLS y keep-alive
+separados para lo que en realidad son dos hosts (Groq y OpenAI). Esta fábrica
+mantiene un httpx.Client y un httpx.AsyncClient por proveedor, con pool y
+keep-alive configurables, timeouts de conexión y lectura, y HTTP/2 si está
+instalado `h2`. Todos los agentes piden sus modelos acá.
+
+Las conexiones nuevas, los handshakes TLS y las requests se cuentan con la
+extensión "trace" de httpcore; la tasa de reuso se expone en /health.
+"""
+
+import threading
+from typing import Dict, Any, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (HTTP/2 en httpx)
+except ImportError:
+    h2 = None
+
+PROVIDERS = ("groq", "openai")
+
+
+class TransportStats:
+    """Requests, conexiones nuevas y handshakes TLS de un proveedor"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def record(self, event_name: str):
+        """Contar un evento de httpcore ("connection.start_tls.complete", ...)"""
+        if event_name.endswith("send_request_headers.started"):
+            with self._lock:
+                self.requests += 1
+        elif event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(0, self.requests - self.connections)
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0,
+            }
+
+
+class ModelClients:
+    """Clientes HTTP compartidos por proveedor y constructores de ChatGroq/ChatOpenAI"""
+
+    def __init__(self, max_connections: int, max_keepalive: int, keepalive_expiry: float,
+                 connect_timeout: float, read_timeout: float, http2: bool):
+        """
+        Args:
+            max_connections: Conexiones máximas por pool
+            max_keepalive: Conexiones ociosas que se mantienen abiertas
+            keepalive_expiry: Segundos que una conexión ociosa sigue abierta
+            connect_timeout: Timeout de conexión (incluye el handshake TLS)
+            read_timeout: Timeout de lectura de la respuesta
+            http2: Usar HTTP/2 si `h2` está instalado
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http2 = http2 and h2 is not None
+        self.stats = {provider: TransportStats() for provider in PROVIDERS}
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+        # Modelos con hedging por agente (métricas en /health)
+        self.hedged_models: Dict[str, Any] = {}
+        # Circuit breaker por proveedor (se crean con los umbrales de Config al primer uso)
+        self.breakers: Dict[str, Any] = {}
+
+    def http_client(self, provider: str) -> httpx.Client:
+        """Cliente sync compartido del proveedor"""
+        with self._lock:
+            if provider not in self._clients:
+                stats = self.stats[provider]
+
+                def trace(event_name: str, info: Dict[str, Any]):
+                    stats.record(event_name)
+
+                def add_trace(request: httpx.Request):
+                    request.extensions["trace"] = trace
+
+                self._clients[provider] = httpx.Client(
+                    limits=self.limits, timeout=self.timeout, http2=self.http2,
+                    event_hooks={"request": [add_trace]}
+                )
+            return self._clients[provider]
+
+    def http_async_client(self, provider: str) -> httpx.AsyncClient:
+        """Cliente async compartido del proveedor"""
+        with self._lock:
+            if provider not in self._async_clients:
+                stats = self.stats[provider]
+
+                async def trace(event_name: str, info: Dict[str, Any]):
+                    stats.record(event_name)
+
+                async def add_trace(request: httpx.Request):
+                    request.extensions["trace"] = trace
+
+                self._async_clients[provider] = httpx.AsyncClient(
+                    limits=self.limits, timeout=self.timeout, http2=self.http2,
+                    event_hooks={"request": [add_trace]}
+                )
+            return self._async_clients[provider]
+
+    def chat_groq(self, hedge: Optional[str] = None, streamed: bool = False, long_generation: bool = False, **kwargs):
+        """ChatGroq con el modelo de Config y los clientes compartidos de Groq
+
+        Con FAILOVER_ENABLED pasa a OpenAI si el circuito de Groq está abierto.
+
+        Args:
+            hedge: Nombre del agente para activar el hedging (llamadas cortas e idempotentes)
+            streamed: El nodo reenvía los tokens al cliente (sin failover a mitad del stream;
+                para el breaker cuenta el tiempo hasta el primer token)
+            long_generation: Generación larga sin streaming (su duración no cuenta como llamada lenta)
+            **kwargs: Parámetros de ChatGroq (temperature, max_tokens, ...)
+        """
+        from langchain_groq import ChatGroq
+        from config import Config
+
+        params = dict(kwargs)
+        kwargs.setdefault("api_key", Config.GROQ_API_KEY)
+        kwargs.setdefault("model", Config.GROQ_MODEL)
+        model = ChatGroq(
+            timeout=self.timeout,
+            http_client=self.http_client("groq"),
+            http_async_client=self.http_async_client("groq"),
+            **kwargs
+        )
+        if Config.FAILOVER_ENABLED:
+            fallback = self._openai(model=Config.FAILOVER_OPENAI_MODEL or None, **params)
+            model = self._with_failover("groq", model, fallback, streamed=streamed, long_generation=long_generation)
+        if hedge:
+            alternate = self._openai(**params) if Config.HEDGE_ALTERNATE_PROVIDER else None
+            model = self._hedged(hedge, model, alternate)
+        return model
+
+    def chat_openai(self, failover: bool = False, **kwargs):
+        """ChatOpenAI con el modelo de Config y los clientes compartidos de OpenAI
+
+        Args:
+            failover: Pasar a Groq si el circuito de OpenAI está abierto (solo para
+                llamadas de chat simples, sin herramientas ni Responses API)
+            **kwargs: Parámetros de ChatOpenAI (temperature, max_tokens, ...)
+        """
+        from config import Config
+
+        params = dict(kwargs)
+        for key in ("api_key", "model"):
+            params.pop(key, None)
+        model = self._openai(**kwargs)
+        if failover and Config.FAILOVER_ENABLED:
+            fallback = self._groq(model=Config.FAILOVER_GROQ_MODEL or None, **params)
+            model = self._with_failover("openai", model, fallback)
+        return model
+
+    def _groq(self, model: Optional[str] = None, **kwargs):
+        from langchain_groq import ChatGroq
+        from config import Config
+
+        return ChatGroq(
+            api_key=Config.GROQ_API_KEY,
+            model=model or Config.GROQ_MODEL,
+            timeout=self.timeout,
+            http_client=self.http_client("groq"),
+            http_async_client=self.http_async_client("groq"),
+            **kwargs
+        )
+
+    def _openai(self, **kwargs):
+        import os
+        from langchain_openai import ChatOpenAI
+        from config import Config
+
+        if not kwargs.get("model"):
+            kwargs["model"] = Config.OPENAI_MODEL or "gpt-4o-mini"
+        kwargs.setdefault("api_key", Config.OPENAI_API_KEY or os.getenv("OPENAI_API_KEY", ""))
+        return ChatOpenAI(
+            timeout=self.timeout,
+            http_client=self.http_client("openai"),
+            http_async_client=self.http_async_client("openai"),
+            **kwargs
+        )
+
+    def breaker(self, provider: str):
+        """Circuit breaker del proveedor"""
+        from .circuit_breaker import breaker_from_config
+
+        with self._lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = breaker_from_config(provider)
+            return self.breakers[provider]
+
+    def _with_failover(self, provider: str, model, fallback, streamed: bool = False, long_generation: bool = False):
+        from .circuit_breaker import FailoverChatModel
+
+        return FailoverChatModel(model, fallback, self.breaker(provider), streamed=streamed, long_generation=long_generation)
+
+    def _hedged(self, name: str, model, alternate):
+        """Envolver el modelo con hedging si está habilitado"""
+        from .hedging import hedge_from_config
+
+        hedged = hedge_from_config(model, alternate)
+        if hedged is None:
+            return model
+        self.hedged_models[name] = hedged
+        return hedged
+
+    async def aclose(self):
+        """Cerrar los pools de conexiones"""
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+            async_clients, self._async_clients = list(self._async_clients.values()), {}
+        for client in clients:
+            client.close()
+        for client in async_clients:
+            await client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Reuso de conexiones y handshakes por proveedor"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive": self.limits.max_keepalive_connections,
+            **{provider: stats.get_stats() for provider, stats in self.stats.items()},
+            "hedging": {name: model.get_stats() for name, model in self.hedged_models.items()},
+            "breakers": {provider: breaker.get_stats() for provider, breaker in self.breakers.items()},
+        }
+
+
+# Instancia global de la fábrica
+_model_clients = None
+
+def get_model_clients() -> ModelClients:
+    """Obtener la fábrica global de clientes de modelos"""
+    global _model_clients
+    if _model_clients is None:
+        from config import Config
+
+        _model_clients = ModelClients(
+            max_connections=Config.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive=Config.HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            connect_timeout=Config.HTTP_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=Config.HTTP_READ_TIMEOUT_SECONDS,
+            http2=Config.HTTP2_ENABLED
+        )
+    return _model_clients
@@ -8,6 +8,7 @@ con un enfoque educativo, profesional y didáctico.
 from typing import Dict, Any
 from langchain_core.messages import SystemMessage, HumanMessage
 from .base_agent import BaseAgent
+from prompts import PROFESOR_WITH_SUMMARY_PROMPT
 
 class ProfesorAgent(BaseAgent):
     """Agente que responde como un profesor experto en finanzas personales"""
@@ -25,13 +26,11 @@ class ProfesorAgent(BaseAgent):
         """Inicializar el agente profesor solo una vez"""
         if not self._initialized:
             # Configurar el modelo específico para el profesor
-            from langchain_groq import ChatGroq
-            from config import Config
+            from .model_clients import get_model_clients
             
             # Crear modelo específico del profesor con parámetros optimizados
-            self.model = ChatGroq(
-                api_key=Config.GROQ_API_KEY,
-                model=Config.GROQ_MODEL,
+            self.model = get_model_clients().chat_groq(
+                streamed=True,    # Sus tokens van al cliente: sin failover a mitad del stream
                 temperature=0.2,  # Más preciso para explicaciones
                 max_tokens=800    # Respuestas detalladas
             )
@@ -46,24 +45,40 @@ class ProfesorAgent(BaseAgent):
         """Procesar el estado y responder como un profesor"""
         print("---Profesor Node---")
         
-        # Importar la configuración del agente profesor
-        from prompts import PROFESOR_AGENT_CONFIG, PROFESOR_WITH_SUMMARY_PROMPT
-        from prompts.profesor_prompts import PROFESOR_BASE_BY_TYPE
-        from prompts.greeting_prompts import GREETING_BY_TYPE
+        messages = self._build_messages(state)
         
+        # Usar el modelo propio del agente (ya configurado en __init__)
+        self._record_input_tokens(messages)
+        response = self.model.invoke(messages)
+        
+        # Retornar el resultado
+        return {
+            "messages": [response]
+            # updated_at se maneja automáticamente en BaseAgent
+        }
+    
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---Profesor Node---")
+        
+        messages = self._build_messages(state)
+        
+        # Usar el modelo propio del agente (ya configurado en __init__)
+        self._record_input_tokens(messages)
+        response = await self.model.ainvoke(messages)
+        
+        # Retornar el resultado
+        return {
+            "messages": [response]
+        }
+    
+    def _build_messages(self, state: Dict[str, Any]) -> list:
+        """Armar el prompt del profesor (sistema + historial) y loguearlo"""
         # Get summary if it exists
         summary = state.get("summary", "")
-        # Resolver cuestión legible (si la pregunta es enum key)
-        current_question = state.get("question", "")
-        readable_question = GREETING_BY_TYPE.get(current_question, current_question)
         
-        # Seleccionar base por tipo de pregunta (fallback a base genérica)
-        base_template = PROFESOR_BASE_BY_TYPE.get(current_question, PROFESOR_AGENT_CONFIG['base_prompt'])
-        # Rellenar plantilla con la pregunta legible si aplica
-        try:
-            base_filled = base_template.format(question=readable_question)
-        except Exception:
-            base_filled = base_template
+        # Base precompilada por tipo de pregunta (fallback a base genérica)
+        base_filled = self.prompts.plan("profesor", state.get("question", "")).system_prefix
 
         # Create system message with summary context if available
         if summary:
@@ -76,8 +91,8 @@ class ProfesorAgent(BaseAgent):
         
         system_message = SystemMessage(content=system_content)
         
-        # Prepare messages for the model
-        messages = [system_message] + state["messages"]
+        # Prepare messages for the model (las respuestas viejas quedan cubiertas por el resumen)
+        messages = self._build_context(system_message, state["messages"])
         
         # Preparar el prompt completo para logging
         prompt_text = self._prepare_prompt_text(messages)
@@ -85,11 +100,4 @@ class ProfesorAgent(BaseAgent):
         # Log del prompt completo
         self._log_prompt(state, prompt_text)
         
-        # Usar el modelo propio del agente (ya configurado en __init__)
-        response = self.model.invoke(messages)
-        
-        # Retornar el resultado
-        return {
-            "messages": [response]
-            # updated_at se maneja automáticamente en BaseAgent
-        }
+        return messages
@@ -7,8 +7,11 @@ utilizando el modelo de ChatGPT (OpenAI) en lugar de Groq.
 
 from typing import Dict, Any
 import os
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import SystemMessage, AIMessage
 from .base_agent import BaseAgent
+from .faq_cache import FaqAnswerCache
+from .domain_retrieval import get_domain_index, format_passages
+from prompts import PROFESOR_WITH_SUMMARY_PROMPT, PROFESOR_WITH_CONTEXT_PROMPT
 
 
 class ProfesorOpenAIAgent(BaseAgent):
@@ -27,7 +30,7 @@ class ProfesorOpenAIAgent(BaseAgent):
         """Inicializar el agente profesor (OpenAI) solo una vez"""
         if not self._initialized:
             # Configurar el modelo específico para el profesor con OpenAI
-            from langchain_openai import ChatOpenAI
+            from .model_clients import get_model_clients
             try:
                 from config import Config
             except Exception:
@@ -42,7 +45,7 @@ class ProfesorOpenAIAgent(BaseAgent):
             ) or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
             # Crear modelo específico del profesor con parámetros optimizados
-            self.model = ChatOpenAI(
+            self.model = get_model_clients().chat_openai(
                  api_key=api_key,
                  model=model_name,
                  temperature=0.2,  # Más preciso para explicaciones
@@ -59,6 +62,13 @@ class ProfesorOpenAIAgent(BaseAgent):
             # Guardar como lista para herramientas (si está disponible)
             self.vector_store_ids = [vector_store_id] if vector_store_id else []
 
+            # Índice local del documento del dominio (None = file_search remoto)
+            self.domain_index = get_domain_index()
+            self.top_k = getattr(Config, "DOMAIN_RETRIEVAL_TOP_K", 3) if Config else 3
+
+            # Caché por similitud de preguntas frecuentes (None si está deshabilitado)
+            self.faq_cache = FaqAnswerCache.from_config()
+
             # Llamar al constructor padre con el modelo configurado
             super().__init__(self.model, "profesor_openai")
 
@@ -69,40 +79,86 @@ class ProfesorOpenAIAgent(BaseAgent):
         """Procesar el estado y responder como un profesor (OpenAI)"""
         print("---Profesor (OpenAI) Node---")
 
-        # Importar la configuración del agente profesor
-        from prompts import PROFESOR_AGENT_CONFIG, PROFESOR_WITH_SUMMARY_PROMPT
-        from prompts.profesor_prompts import PROFESOR_BASE_BY_TYPE
-        from prompts.greeting_prompts import GREETING_BY_TYPE
+        cached_answer = self._lookup_faq(state)
+        if cached_answer is not None:
+            return self._build_result(AIMessage(content=cached_answer))
+
+        messages = self._build_messages(state)
+
+        # Usar el modelo propio del agente (ya configurado en __init__)
+        self._record_input_tokens(messages)
+        response = self.model.invoke(messages, **self._invoke_kwargs())
+
+        result = self._build_result(response)
+        self._store_faq(state, result)
+        return result
+
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---Profesor (OpenAI) Node---")
+
+        cached_answer = self._lookup_faq(state)
+        if cached_answer is not None:
+            return self._build_result(AIMessage(content=cached_answer))
+
+        messages = self._build_messages(state)
+
+        # Usar el modelo propio del agente (ya configurado en __init__)
+        self._record_input_tokens(messages)
+        response = await self.model.ainvoke(messages, **self._invoke_kwargs())
+
+        result = self._build_result(response)
+        self._store_faq(state, result)
+        return result
+
+    def _last_user_message(self, state: Dict[str, Any]) -> str:
+        from .agent_utils import extract_text_from_content
+        messages = state.get("messages", [])
+        return extract_text_from_content(getattr(messages[-1], "content", "")) if messages else ""
+
+    def _lookup_faq(self, state: Dict[str, Any]):
+        """Respuesta del caché de preguntas frecuentes para el último mensaje, o None"""
+        if self.faq_cache is None:
+            return None
+        answer = self.faq_cache.lookup(state.get("question", ""), self._last_user_message(state))
+        if answer is not None:
+            print("[Profesor] Respuesta servida desde el caché de preguntas frecuentes")
+        return answer
+
+    def _store_faq(self, state: Dict[str, Any], result: Dict[str, Any]):
+        """Guardar la respuesta si no depende del resumen de la conversación"""
+        if self.faq_cache is None or state.get("summary"):
+            return
+        self.faq_cache.store(
+            state.get("question", ""), self._last_user_message(state), result["messages"][-1].content
+        )
 
+    def _build_messages(self, state: Dict[str, Any]) -> list:
+        """Armar el prompt del profesor (sistema + historial) y loguearlo"""
         # Get summary if it exists
         summary = state.get("summary", "")
-        # Resolver cuestión legible (si la pregunta es enum key)
-        current_question = state.get("question", "")
-        readable_question = GREETING_BY_TYPE.get(current_question, current_question)
 
-        # Seleccionar base por tipo de pregunta (fallback a base genérica)
-        base_template = PROFESOR_BASE_BY_TYPE.get(
-            current_question, PROFESOR_AGENT_CONFIG['base_prompt']
-        )
-        # Rellenar plantilla con la pregunta legible si aplica
-        try:
-            base_filled = base_template.format(question=readable_question)
-        except Exception:
-            base_filled = base_template
+        # Base precompilada por tipo de pregunta (fallback a base genérica)
+        system_content = self.prompts.plan("profesor_openai", state.get("question", "")).system_prefix
 
-        # Create system message with summary context if available
+        # Lo variable va después del prefijo fijo: el resumen (cambia cada varios turnos)
+        # y al final los pasajes (cambian en cada turno)
         if summary:
             system_content = PROFESOR_WITH_SUMMARY_PROMPT.format(
-                base_prompt=base_filled,
+                base_prompt=system_content,
                 summary=summary,
             )
-        else:
-            system_content = base_filled
+        passages = self._retrieve_passages(state)
+        if passages:
+            system_content = PROFESOR_WITH_CONTEXT_PROMPT.format(
+                base_prompt=system_content,
+                passages=format_passages(passages),
+            )
 
         system_message = SystemMessage(content=system_content)
 
-        # Prepare messages for the model
-        messages = [system_message] + state["messages"]
+        # Prepare messages for the model (las respuestas viejas quedan cubiertas por el resumen)
+        messages = self._build_context(system_message, state["messages"])
 
         # Preparar el prompt completo para logging
         prompt_text = self._prepare_prompt_text(messages)
@@ -110,26 +166,44 @@ class ProfesorOpenAIAgent(BaseAgent):
         # Log del prompt completo
         self._log_prompt(state, prompt_text)
 
-
-        # Usar el modelo propio del agente (ya configurado en __init__)
-        response = self.model.invoke(
-            messages,
-            tools=[{
-                "type": "file_search",
-                "vector_store_ids": ["vs_68d9c8f01e0c8191b2d3642556f08071"]
-            }],
-        )
-
+        return messages
+
+    def _retrieve_passages(self, state: Dict[str, Any]) -> list:
+        """Top-k pasajes del índice local para el último mensaje (o el tipo de pregunta si no hay coincidencias)"""
+        if self.domain_index is None:
+            return []
+        passages = self.domain_index.search(self._last_user_message(state), self.top_k)
+        if not passages:
+            passages = self.domain_index.search((state.get("question") or "").replace("_", " "), self.top_k)
+        return passages
+
+    def _invoke_kwargs(self) -> Dict[str, Any]:
+        """Con recuperación local el contexto ya va en el prompt: sin herramientas"""
+        if self.domain_index is not None:
+            return {}
+        tools = self._build_tools()
+        return {"tools": tools} if tools else {}
+
+    def _build_tools(self) -> list:
+        """Herramientas de la Responses API (file_search sobre el vector store configurado)"""
+        if not self.vector_store_ids:
+            return []
+        return [{
+            "type": "file_search",
+            "vector_store_ids": self.vector_store_ids
+        }]
+
+    def _build_result(self, response) -> Dict[str, Any]:
+        """Armar el resultado del nodo a partir de la respuesta del modelo"""
         # Extraer el texto de la respuesta de forma segura
         from .agent_utils import extract_text_from_content
         response_text = extract_text_from_content(getattr(response, "content", response))
 
         # Crear mensaje de respuesta limpio
-        from langchain_core.messages import AIMessage
         response_message = AIMessage(content=response_text)
 
         # Retornar el resultado
         return {
             "messages": [response_message],
             "last_agent": "profesor"  # Consistente con otros agentes
-        }
\ No newline at end of file
+        }
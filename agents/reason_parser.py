@@ -0,0 +1,381 @@
+"""
+Parser determinístico de respuestas numéricas en español para ValidateReasonAgent.
+
+Las preguntas de tipo de objetivo, montos, renta, aportes y duración se
+responden casi siempre con un dato concreto ("10 millones", "USD 5000",
+"3000 por mes", "una década", "Renta"). Convertirlo en número no necesita un
+LLM: este módulo lo resuelve con reglas y devuelve el mismo "reason" que
+piden los prompts de prompts/validate_reason_prompts.py.
+
+Solo contesta cuando está seguro. Ante preguntas del usuario, negaciones,
+varios montos distintos, rangos ("entre 10 y 15 años", "2 o 3 años"),
+porcentajes, números compuestos en palabras ("dos mil quinientos", "un millón
+y medio"), números sueltos sin moneda ni multiplicador ("tengo 2 autos") o
+falta de periodicidad devuelve None y el agente sigue con el LLM como antes.
+
+Corpus de verificación (los ejemplos de los prompts más casos ambiguos):
+
+    python -m agents.reason_parser
+"""
+
+import re
+import unicodedata
+from typing import NamedTuple, Optional, List, Tuple
+
+# Año de referencia de los prompts para "hasta 2040" (ver REASON_DETECTION_OBJETIVO_DURACION)
+REFERENCE_YEAR = 2024
+
+
+class ReasonParse(NamedTuple):
+    """Resultado del parser: mismo contrato que el JSON del LLM"""
+    has_response: bool
+    reason: Optional[str]
+
+
+_NO_RESPONSE = ReasonParse(False, None)
+
+# Respuestas que los prompts marcan como inválidas para cualquier pregunta
+_VAGUE_ANSWERS = {
+    "no se", "ni idea", "no lo se", "tengo dudas", "dudas", "uh", "ok", "okay", "bien",
+    "gracias", "despues veo", "veremos", "lo que pueda", "mas adelante", "cuando pueda",
+    "estoy confundido", "estoy confundida",
+}
+
+# "nada/cero/0" vale 0 en monto_inicial y aporte_mensual
+_ZERO_ANSWERS = {"0", "cero", "nada", "ninguno", "nada por ahora", "no tengo", "no tengo nada", "no puedo aportar"}
+
+# Señales de que el usuario pregunta o duda en vez de contestar
+_QUESTION_PATTERN = re.compile(
+    r"[?¿]|\b(que es|como|cual|cuanto|cuanta|conviene|deberia|recomend\w*|explica\w*|no se|quizas|tal vez|capaz)\b"
+)
+_NEGATION_PATTERN = re.compile(r"\b(no|ni|nunca|tampoco)\b")
+
+_UNIT_WORDS = {
+    "uno": 1, "un": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6,
+    "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "quince": 15, "veinte": 20, "treinta": 30,
+    "cuarenta": 40, "cincuenta": 50, "sesenta": 60, "setenta": 70, "ochenta": 80, "noventa": 90,
+    "cien": 100, "quinientos": 500, "medio": 0.5,
+}
+_MULTIPLIERS = {
+    "k": 1_000, "mil": 1_000, "m": 1_000_000, "mm": 1_000_000, "millon": 1_000_000, "millones": 1_000_000,
+}
+_CURRENCY_PATTERN = re.compile(r"\b(usd|us\$|u\$s|dolares|dolar|dls)\b|\$")
+
+_NUMBER = r"(?P<number>\d+(?:[.,]\d+)*|" + "|".join(sorted(_UNIT_WORDS, key=len, reverse=True)) + r")"
+_MULTIPLIER = r"(?:\s*(?P<multiplier>millones|millon|mil|mm|m|k)\b)?"
+_AMOUNT_PATTERN = re.compile(r"(?<![\w.,])" + _NUMBER + _MULTIPLIER)
+
+# Dos números seguidos (con unidad y conector opcionales), porcentajes, "entre" e "y medio":
+# rangos y compuestos que las reglas no interpretan bien
+_NUMBER_TOKEN = r"(?<![\w.,])(?:\d+(?:[.,]\d+)*(?!\d)|(?:" + "|".join(sorted(_UNIT_WORDS, key=len, reverse=True)) + r")\b)"
+_NUMBER_UNIT = r"(?:millones|millon|mil|mm|m|k|anos|ano|meses|mes|decadas|decada|dolares|dolar|usd)\b"
+_AMBIGUOUS_PATTERN = re.compile(
+    r"%|\bpor ciento\b|\bentre\b|\by medi[oa]\b|"
+    + _NUMBER_TOKEN + r"\s*(?:" + _NUMBER_UNIT + r")?\s*(?:(?:a|al|o|y|-)\s*)?(?:usd\s*|\$\s*)?" + _NUMBER_TOKEN
+)
+
+_MONTHLY_PATTERN = re.compile(r"\b(por mes|al mes|x mes|cada mes|mensual|mensuales|mensualmente|/\s*mes)\b|/\s*mes")
+_ANNUAL_PATTERN = re.compile(r"\b(por ano|al ano|x ano|cada ano|anual|anuales|anualmente)\b|/\s*ano")
+_TIME_UNIT_PATTERN = re.compile(r"^\s*(anos|ano|meses|mes|decadas|decada)\b")
+
+_TIPO_OBJETIVO_KEYWORDS = {
+    "Monto final": re.compile(r"\b(monto final|monto objetivo|cantidad final|acumular|acumulado|juntar|monto)\b"),
+    "Renta": re.compile(r"\b(renta|ingreso mensual|ingresos mensuales|cobrar)\b"),
+    "Duración": re.compile(r"\b(duracion|plazo|tiempo)\b"),
+}
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin acentos y con espacios simples ("Duración" -> "duracion")"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", text).strip(" .!")
+
+
+def parse_reason(question: Optional[str], user_message: str) -> Optional[ReasonParse]:
+    """Resolver la respuesta sin LLM
+
+    Args:
+        question: Tipo de pregunta (valor de QuestionType)
+        user_message: Último mensaje del usuario
+
+    Returns:
+        ReasonParse si el resultado es seguro, None si hay que consultar al LLM
+    """
+    parser = _PARSERS_BY_QUESTION.get(question or "")
+    if parser is None or not isinstance(user_message, str):
+        return None
+    text = normalize(user_message)
+    if not text:
+        return None
+    if text in _VAGUE_ANSWERS:
+        return _NO_RESPONSE
+    if _QUESTION_PATTERN.search(text):
+        return None
+    return parser(text)
+
+
+def _parse_number(raw: str) -> Optional[float]:
+    """Número con separadores en estilo español o inglés ("10.000", "1,5", "1.000.000")"""
+    if raw in _UNIT_WORDS:
+        return float(_UNIT_WORDS[raw])
+    separators = re.findall(r"[.,]", raw)
+    if not separators:
+        return float(raw)
+    if len(set(separators)) == 2:
+        # "1.000,50" / "1,000.50": el último separador es el decimal
+        decimal = separators[-1]
+        thousands = "," if decimal == "." else "."
+        return float(raw.replace(thousands, "").replace(decimal, "."))
+    groups = re.split(r"[.,]", raw)
+    if len(separators) > 1 or len(groups[-1]) == 3:
+        # Separador de miles ("10.000", "1,000,000")
+        if not all(len(group) == 3 for group in groups[1:]):
+            return None
+        return float("".join(groups))
+    return float(raw.replace(",", "."))
+
+
+def _find_amounts(text: str) -> List[float]:
+    """Montos del texto, sin los números que son plazos ("10M en 20 años" -> [10000000])"""
+    text = _CURRENCY_PATTERN.sub(" ", text)
+    amounts = []
+    for match in _AMOUNT_PATTERN.finditer(text):
+        if _TIME_UNIT_PATTERN.match(text[match.end():]):
+            continue
+        number = _parse_number(match.group("number"))
+        if number is None:
+            return []
+        multiplier = match.group("multiplier")
+        if multiplier is None and match.group("number") in _UNIT_WORDS:
+            # "un", "una" o "dos" sueltos no son montos
+            continue
+        amounts.append(number * _MULTIPLIERS.get(multiplier, 1))
+    return amounts
+
+
+def _is_ambiguous(text: str) -> bool:
+    """Rangos, porcentajes o números compuestos: mejor que lo interprete el LLM"""
+    return bool(_AMBIGUOUS_PATTERN.search(text))
+
+
+def _single_amount(text: str, require_unit: bool = False) -> Optional[float]:
+    """El único monto del texto (None si no hay, hay varios distintos o es ambiguo)
+
+    Args:
+        require_unit: Exigir moneda o multiplicador salvo que el mensaje sea solo el número
+            ("tengo 2 autos" no es un monto)
+    """
+    if _is_ambiguous(text):
+        return None
+    if require_unit and not _CURRENCY_PATTERN.search(text):
+        bare = _AMOUNT_PATTERN.fullmatch(text)
+        if bare is None and not any(match.group("multiplier") for match in _AMOUNT_PATTERN.finditer(text)):
+            return None
+    amounts = set(_find_amounts(text))
+    if len(amounts) != 1:
+        return None
+    return amounts.pop()
+
+
+def _format_amount(amount: float) -> Optional[str]:
+    """Número entero sin separadores, como piden los prompts (None si no es entero)"""
+    if amount < 0 or amount != int(amount):
+        return None
+    return str(int(amount))
+
+
+def _parse_total_amount(text: str) -> Optional[ReasonParse]:
+    """objetivo_monto_final: un monto total en USD"""
+    if _NEGATION_PATTERN.search(text):
+        return None
+    amount = _single_amount(text, require_unit=True)
+    reason = _format_amount(amount) if amount is not None else None
+    return ReasonParse(True, reason) if reason else None
+
+
+def _parse_initial_amount(text: str) -> Optional[ReasonParse]:
+    """monto_inicial: monto total o cero"""
+    if text in _ZERO_ANSWERS:
+        return ReasonParse(True, "0")
+    return _parse_total_amount(text)
+
+
+def _parse_monthly_amount(text: str) -> Optional[ReasonParse]:
+    """objetivo_renta: monto con periodicidad explícita, los anuales se dividen por 12"""
+    if _NEGATION_PATTERN.search(text):
+        return None
+    monthly = bool(_MONTHLY_PATTERN.search(text))
+    annual = bool(_ANNUAL_PATTERN.search(text))
+    if monthly == annual:
+        # Sin periodicidad ("5000") o con ambas: lo decide el LLM
+        return None
+    amount = _single_amount(text)
+    if amount is None:
+        return None
+    if annual:
+        amount = amount / 12
+    reason = _format_amount(amount)
+    return ReasonParse(True, reason) if reason else None
+
+
+def _parse_monthly_contribution(text: str) -> Optional[ReasonParse]:
+    """aporte_mensual: como la renta, pero acepta cero"""
+    if text in _ZERO_ANSWERS:
+        return ReasonParse(True, "0")
+    return _parse_monthly_amount(text)
+
+
+# Edades ("a los 65", "tengo 40 años") y tiempo pasado ("hace 3 años"): no son un horizonte
+_AGE_OR_PAST_PATTERN = re.compile(
+    r"\b(?:a|hasta|desde|para) l[oa]s\b|\btengo (?:\w+ ){1,2}anos?\b|\bhace\b|\bcumpl\w*|\btenga\b|\bedad\b"
+)
+
+
+def _parse_duration(text: str) -> Optional[ReasonParse]:
+    """objetivo_duracion: años, décadas, meses múltiplos de 12 o "hasta 2040" """
+    if _NEGATION_PATTERN.search(text) or _AGE_OR_PAST_PATTERN.search(text):
+        # Un horizonte por edad necesita la edad actual: lo resuelve el LLM (o has_response 0)
+        return None
+    if _is_ambiguous(text):
+        return None
+    candidates: List[int] = []
+    for match in re.finditer(r"\b(?:hasta|para|en)(?: el)?(?: ano)? (?P<year>20\d\d)\b", text):
+        candidates.append(int(match.group("year")) - REFERENCE_YEAR)
+    pattern = re.compile(r"(?<![\w.,])" + _NUMBER + r"\s*(?P<unit>anos|ano|decadas|decada|meses|mes)\b")
+    for match in pattern.finditer(text):
+        number = _parse_number(match.group("number"))
+        if number is None:
+            return None
+        unit = match.group("unit")
+        if unit.startswith("decada"):
+            number *= 10
+        elif unit.startswith("mes"):
+            number /= 12
+        if number != int(number):
+            return None
+        candidates.append(int(number))
+    if len(set(candidates)) != 1 or candidates[0] <= 0:
+        return None
+    return ReasonParse(True, str(candidates[0]))
+
+
+def _parse_tipo_objetivo(text: str) -> Optional[ReasonParse]:
+    """tipo_objetivo: una sola de las tres opciones mencionada"""
+    if _NEGATION_PATTERN.search(text):
+        return None
+    chosen = [option for option, pattern in _TIPO_OBJETIVO_KEYWORDS.items() if pattern.search(text)]
+    if len(chosen) != 1:
+        return None
+    return ReasonParse(True, chosen[0])
+
+
+_PARSERS_BY_QUESTION = {
+    "tipo_objetivo": _parse_tipo_objetivo,
+    "objetivo_monto_final": _parse_total_amount,
+    "objetivo_renta": _parse_monthly_amount,
+    "objetivo_duracion": _parse_duration,
+    "monto_inicial": _parse_initial_amount,
+    "aporte_mensual": _parse_monthly_contribution,
+}
+
+# Ejemplos de los prompts (y casos que deben ir al LLM con None)
+EXAMPLES: List[Tuple[str, str, Optional[ReasonParse]]] = [
+    ("tipo_objetivo", "Monto final", ReasonParse(True, "Monto final")),
+    ("tipo_objetivo", "quiero la renta", ReasonParse(True, "Renta")),
+    ("tipo_objetivo", "Duración", ReasonParse(True, "Duración")),
+    ("tipo_objetivo", "prefiero definir el plazo", ReasonParse(True, "Duración")),
+    ("tipo_objetivo", "dinero acumulado, el monto final", ReasonParse(True, "Monto final")),
+    ("tipo_objetivo", "ni idea", _NO_RESPONSE),
+    ("tipo_objetivo", "tengo dudas", _NO_RESPONSE),
+    ("tipo_objetivo", "¿qué es la renta?", None),
+    ("tipo_objetivo", "renta o monto final", None),
+    ("tipo_objetivo", "no quiero renta", None),
+    ("objetivo_monto_final", "10 millones", ReasonParse(True, "10000000")),
+    ("objetivo_monto_final", "5000 dolares", ReasonParse(True, "5000")),
+    ("objetivo_monto_final", "1M", ReasonParse(True, "1000000")),
+    ("objetivo_monto_final", "USD 5000", ReasonParse(True, "5000")),
+    ("objetivo_monto_final", "5000 dólares", ReasonParse(True, "5000")),
+    ("objetivo_monto_final", "10M en 20 años", ReasonParse(True, "10000000")),
+    ("objetivo_monto_final", "US$ 1.500.000", ReasonParse(True, "1500000")),
+    ("objetivo_monto_final", "un millón", ReasonParse(True, "1000000")),
+    ("objetivo_monto_final", "mucho dinero", None),
+    ("objetivo_monto_final", "veremos", _NO_RESPONSE),
+    ("objetivo_monto_final", "entre 1M y 2M", None),
+    ("objetivo_monto_final", "dos mil quinientos", None),
+    ("objetivo_monto_final", "un millón y medio", None),
+    ("objetivo_monto_final", "dos millones y medio", None),
+    ("objetivo_monto_final", "1M o 2M", None),
+    ("objetivo_monto_final", "quiero juntar 100000", None),
+    ("objetivo_renta", "3000 por mes", ReasonParse(True, "3000")),
+    ("objetivo_renta", "5000 mensuales", ReasonParse(True, "5000")),
+    ("objetivo_renta", "USD 2000 mensuales", ReasonParse(True, "2000")),
+    ("objetivo_renta", "60000 anuales", ReasonParse(True, "5000")),
+    ("objetivo_renta", "3000 dólares al mes", ReasonParse(True, "3000")),
+    ("objetivo_renta", "5000", None),
+    ("objetivo_renta", "un buen sueldo", None),
+    ("objetivo_renta", "después veo", _NO_RESPONSE),
+    ("objetivo_renta", "el 10%", None),
+    ("objetivo_renta", "10% del sueldo por mes", None),
+    ("objetivo_renta", "entre 2000 y 3000 por mes", None),
+    ("objetivo_renta", "dos mil quinientos por mes", None),
+    ("objetivo_duracion", "20 años", ReasonParse(True, "20")),
+    ("objetivo_duracion", "una década", ReasonParse(True, "10")),
+    ("objetivo_duracion", "hasta 2040", ReasonParse(True, "16")),
+    ("objetivo_duracion", "invertir 10 años", ReasonParse(True, "10")),
+    ("objetivo_duracion", "ahorrar por 5 años", ReasonParse(True, "5")),
+    ("objetivo_duracion", "para cuando tenga 65", None),
+    ("objetivo_duracion", "me quiero jubilar a los 65 años", None),
+    ("objetivo_duracion", "tengo 40 años", None),
+    ("objetivo_duracion", "tengo 30 años y quiero invertir 20", None),
+    ("objetivo_duracion", "hasta los 60 años", None),
+    ("objetivo_duracion", "hace 3 años que ahorro", None),
+    ("objetivo_duracion", "cuando cumpla 60", None),
+    ("objetivo_duracion", "me quiero jubilar en 20 años", ReasonParse(True, "20")),
+    ("objetivo_duracion", "largo plazo", None),
+    ("objetivo_duracion", "cuando pueda", _NO_RESPONSE),
+    ("objetivo_duracion", "en 2 o 3 años", None),
+    ("objetivo_duracion", "entre 10 y 15 años", None),
+    ("objetivo_duracion", "10 a 15 años", None),
+    ("objetivo_duracion", "10-15 años", None),
+    ("objetivo_duracion", "en 2035 o 2040", None),
+    ("objetivo_duracion", "treinta y cinco años", None),
+    ("monto_inicial", "100000", ReasonParse(True, "100000")),
+    ("monto_inicial", "1M", ReasonParse(True, "1000000")),
+    ("monto_inicial", "USD 50000", ReasonParse(True, "50000")),
+    ("monto_inicial", "50000 dólares", ReasonParse(True, "50000")),
+    ("monto_inicial", "500K", ReasonParse(True, "500000")),
+    ("monto_inicial", "nada", ReasonParse(True, "0")),
+    ("monto_inicial", "cero", ReasonParse(True, "0")),
+    ("monto_inicial", "0", ReasonParse(True, "0")),
+    ("monto_inicial", "algo de dinero", None),
+    ("monto_inicial", "tengo 2 autos", None),
+    ("monto_inicial", "el 10% de mis ahorros", None),
+    ("monto_inicial", "tengo 20 mil dolares", ReasonParse(True, "20000")),
+    ("aporte_mensual", "5000 por mes", ReasonParse(True, "5000")),
+    ("aporte_mensual", "1000 mensuales", ReasonParse(True, "1000")),
+    ("aporte_mensual", "USD 500 al mes", ReasonParse(True, "500")),
+    ("aporte_mensual", "500 dólares mensuales", ReasonParse(True, "500")),
+    ("aporte_mensual", "12000 anuales", ReasonParse(True, "1000")),
+    ("aporte_mensual", "nada", ReasonParse(True, "0")),
+    ("aporte_mensual", "1000", None),
+    ("aporte_mensual", "un poco", None),
+    ("aporte_mensual", "500 o 1000 por mes", None),
+    ("aporte_mensual", "el 10% del sueldo por mes", None),
+]
+
+
+def main():
+    failures = 0
+    for question, message, expected in EXAMPLES:
+        result = parse_reason(question, message)
+        if result != expected:
+            failures += 1
+            print(f"FALLA {question}: {message!r} -> {result} (esperado {expected})")
+    resolved = sum(1 for _, _, expected in EXAMPLES if expected is not None)
+    print(f"{len(EXAMPLES) - failures}/{len(EXAMPLES)} ejemplos OK ({resolved} se resuelven sin LLM)")
+    return failures
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if main() else 0)
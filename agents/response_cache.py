@@ -0,0 +1,171 @@
+"""
+Caché persistente de respuestas de los clasificadores LLM.
+
+ValidateReason, EvaluateClose y ValidateMessage clasifican con temperatura
+baja las mismas respuestas cortas ("Renta", "20 años", "sí") miles de veces
+por día. Este módulo guarda la respuesta cruda del modelo con la clave:
+
+    (agente, hash de los prompts del agente, modelo, tipo de pregunta, mensaje normalizado)
+
+- LRU en memoria delante de una tabla SQLite en disco (sobrevive reinicios y
+  se comparte entre procesos).
+- TTL y tope de filas; las más viejas se podan al superar el tope.
+- Al cambiar un prompt de prompts/ cambia el hash del agente en el registro
+  de prompts (prompts/registry.py): las entradas viejas dejan de coincidir y
+  se borran la primera vez que el agente usa el caché.
+- Aciertos y fallos por agente en /health.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from checkpoint_store import create_sqlite_connection
+
+# Cada cuántas escrituras se revisa el tope de filas en disco
+_PRUNE_EVERY = 500
+
+
+class ClassifierResponseCache:
+    """LRU en memoria + tabla SQLite con TTL, tope de tamaño e invalidación por prompt"""
+
+    def __init__(self, db_path: str, max_entries: int, max_rows: int, ttl_seconds: float):
+        """
+        Args:
+            db_path: Base SQLite del caché
+            max_entries: Entradas del LRU en memoria
+            max_rows: Filas máximas en disco
+            ttl_seconds: Vida de cada entrada
+        """
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = create_sqlite_connection(db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS classifier_cache (
+                key TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS classifier_cache_created ON classifier_cache (created_at)")
+        self._conn.commit()
+        # (agente, hash) ya registrados: la invalidación corre una vez por proceso
+        self._registered: set = set()
+        self._writes = 0
+        # Métricas por agente
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(agent: str, agent_prompt_hash: str, model_name: str, *parts: Any) -> str:
+        """Clave de una llamada (las partes ya vienen normalizadas)"""
+        raw = "\x1f".join([agent, agent_prompt_hash, model_name, *(str(part) for part in parts)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def register_prompts(self, agent: str, agent_prompt_hash: str):
+        """Borrar las entradas del agente generadas con otros prompts"""
+        if (agent, agent_prompt_hash) in self._registered:
+            return
+        with self._lock:
+            with self._conn:
+                deleted = self._conn.execute(
+                    "DELETE FROM classifier_cache WHERE agent = ? AND prompt_hash != ?", (agent, agent_prompt_hash)
+                ).rowcount
+            self._registered.add((agent, agent_prompt_hash))
+        if deleted:
+            print(f"[ClassifierCache] {deleted} respuestas de {agent} invalidadas (cambió el prompt)")
+
+    def get(self, agent: str, key: str) -> Optional[str]:
+        """Respuesta guardada o None"""
+        now = time.time()
+        with self._lock:
+            stats = self._stats.setdefault(agent, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                stats["memory_hits"] += 1
+                return entry[0]
+            row = self._conn.execute(
+                "SELECT response, created_at FROM classifier_cache WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self._memory.pop(key, None)
+                stats["misses"] += 1
+                return None
+            self._remember(key, row[0], row[1])
+            stats["disk_hits"] += 1
+            return row[0]
+
+    def put(self, agent: str, agent_prompt_hash: str, key: str, response: str):
+        """Guardar una respuesta en memoria y en disco"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO classifier_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, agent, agent_prompt_hash, response, now)
+                )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _remember(self, key: str, response: str, created_at: float):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now: float):
+        """Borrar vencidas y, si se pasa del tope, las más viejas"""
+        with self._conn:
+            self._conn.execute("DELETE FROM classifier_cache WHERE created_at <= ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                """
+                DELETE FROM classifier_cache WHERE key IN (
+                    SELECT key FROM classifier_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_rows,)
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aciertos (memoria y disco), fallos y hit ratio por agente"""
+        with self._lock:
+            agents = {}
+            for agent, stats in self._stats.items():
+                lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+                hits = stats["memory_hits"] + stats["disk_hits"]
+                agents[agent] = {**stats, "hit_ratio": round(hits / lookups, 3) if lookups else 0.0}
+            rows = self._conn.execute("SELECT COUNT(*) FROM classifier_cache").fetchone()[0]
+        return {"memory_entries": len(self._memory), "disk_rows": rows, "agents": agents}
+
+
+# Instancia global del caché (None si está deshabilitado)
+_response_cache = None
+_response_cache_loaded = False
+
+def get_response_cache() -> Optional[ClassifierResponseCache]:
+    """Obtener la instancia global del caché de clasificadores"""
+    global _response_cache, _response_cache_loaded
+    if not _response_cache_loaded:
+        from config import Config
+
+        if Config.CLASSIFIER_CACHE_ENABLED:
+            _response_cache = ClassifierResponseCache(
+                db_path=Config.CLASSIFIER_CACHE_PATH,
+                max_entries=Config.CLASSIFIER_CACHE_MAX_ENTRIES,
+                max_rows=Config.CLASSIFIER_CACHE_MAX_ROWS,
+                ttl_seconds=Config.CLASSIFIER_CACHE_TTL_SECONDS
+            )
+        _response_cache_loaded = True
+    return _response_cache
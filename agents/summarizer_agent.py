@@ -24,13 +24,11 @@ class SummarizerAgent(BaseAgent):
         """Inicializar el agente summarizer solo una vez"""
         if not self._initialized:
             # Configurar el modelo específico para el summarizer
-            from langchain_groq import ChatGroq
-            from config import Config
+            from .model_clients import get_model_clients
             
             # Crear modelo específico del summarizer
-            self.model = ChatGroq(
-                api_key=Config.GROQ_API_KEY,
-                model=Config.GROQ_MODEL,
+            self.model = get_model_clients().chat_groq(
+                long_generation=True,  # Resumen largo: su duración no marca a Groq como lento
                 temperature=0.3,  # Baja temperatura para resúmenes más precisos
                 max_tokens=800    # Tokens suficientes para resúmenes detallados
             )
@@ -45,6 +43,28 @@ class SummarizerAgent(BaseAgent):
         """Procesar el estado y crear/extender el resumen"""
         print("---Resumen de Conversación---")
         
+        messages = self._build_messages(state)
+        
+        # Invocar el modelo
+        self._record_input_tokens(messages)
+        response = self.model.invoke(messages)
+        
+        return self._build_result(state, response)
+    
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---Resumen de Conversación---")
+        
+        messages = self._build_messages(state)
+        
+        # Invocar el modelo
+        self._record_input_tokens(messages)
+        response = await self.model.ainvoke(messages)
+        
+        return self._build_result(state, response)
+    
+    def _build_messages(self, state: Dict[str, Any]) -> list:
+        """Armar el historial más el pedido de resumen"""
         # Obtener el resumen existente si existe
         summary = state.get("summary", "")
         
@@ -69,9 +89,10 @@ class SummarizerAgent(BaseAgent):
         # Log del prompt completo
         self._log_prompt(state, prompt_text)
         
-        # Invocar el modelo
-        response = self.model.invoke(messages)
-        
+        return messages
+    
+    def _build_result(self, state: Dict[str, Any], response) -> Dict[str, Any]:
+        """Guardar el resumen y eliminar los mensajes viejos"""
         # Extraer el texto de la respuesta de forma segura
         from .agent_utils import extract_text_from_content
         summary_text = extract_text_from_content(getattr(response, "content", response))
@@ -0,0 +1,272 @@
+"""
+Pre-filtro local de tópico para ValidateMessageAgent.
+
+Cada turno después del saludo pasaba por OpenAI solo para decidir onTopic.
+Este módulo decide localmente los casos claros y deja al LLM la zona gris:
+
+1. Regla: mensajes con enlaces/URLs son off-topic (lo exige VALIDATE_MESSAGE_SYSTEM_PROMPT).
+2. Regla: vocabulario financiero explícito, montos sueltos y confirmaciones
+   cortas ("sí", "dale", "USD 5000") son on-topic.
+3. Clasificador lineal de n-gramas de caracteres (hashing + regresión
+   logística, solo CPU y sin dependencias) entrenado con las decisiones onTopic
+   que el LLM dejó en graph_logs.jsonl. Si su probabilidad cae dentro de la
+   banda de incertidumbre [low, high] se consulta al LLM.
+
+Entrenamiento y evaluación (acuerdo con el LLM sobre los logs):
+
+    python -m agents.topic_classifier train [--logs graph_logs.jsonl] [--out topic_model.json]
+    python -m agents.topic_classifier eval [--logs graph_logs.jsonl] [--model topic_model.json]
+"""
+
+import os
+import re
+import json
+import math
+import zlib
+import random
+import argparse
+from typing import NamedTuple, Optional, List, Tuple, Dict
+
+from .reason_parser import normalize
+from .close_classifier import classify_close
+
+# Mismos indicadores de enlace que enumera el prompt del LLM. Un dominio sin esquema ni
+# "www." tiene que estar en minúsculas y seguido de "/" o del final del mensaje: si no,
+# "Sí.Me parece bien" o "dale.es lo que quiero" (falta un espacio) contarían como enlace
+URL_PATTERN = re.compile(
+    r"(?i:https?://|\bwww\.)|(?<![\w.])[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|org|net|io|ar|es|edu|gov|info|ly|me)(?=/|\W*$)"
+)
+
+# Solo términos inequívocamente financieros: palabras genéricas como "capital", "riesgo",
+# "objetivo", "interés" o "ingreso" también aparecen fuera de tópico ("la capital de
+# Francia") y quedan para el clasificador o el LLM
+FINANCE_VOCABULARY = re.compile(
+    r"\b(ahorr\w*|invers\w*|invert\w*|inversor\w*|renta|rentas|rendimiento\w*|"
+    r"jubilac\w*|retiro|aporte\w*|aportar|monto\w*|dolar\w*|usd|acciones|bonos?|fondos? comun\w*|"
+    r"fci|etf\w*|plazo fijo|inflacion|tasa\w*|presupuesto\w*|deuda\w*|credito\w*|"
+    r"prestamo\w*|cartera|portafolio|dividendo\w*|finanza\w*|financier\w*|plan de retiro|"
+    r"interes compuesto)\b"
+)
+
+_BARE_AMOUNT = re.compile(
+    r"^\W*(usd|us\$|u\$s|\$)?\s*\d[\d.,]*\s*(k|m|mil|millon|millones|dolares|usd)?\W*$"
+)
+
+# Tamaño del espacio de hashing de n-gramas
+HASH_BUCKETS = 1 << 18
+NGRAM_RANGE = (2, 4)
+
+
+class TopicDecision(NamedTuple):
+    """Decisión del pre-filtro: on_topic None significa "consultar al LLM" """
+    on_topic: Optional[bool]
+    source: str
+    score: Optional[float] = None
+
+
+def ngram_features(text: str) -> Dict[int, float]:
+    """n-gramas de caracteres de cada palabra (con bordes), hasheados y normalizados (L2)"""
+    counts: Dict[int, float] = {}
+    for word in normalize(text).split():
+        padded = f" {word} "
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+            for start in range(max(1, len(padded) - n + 1)):
+                # crc32 y no hash(): tiene que ser estable entre procesos
+                bucket = zlib.crc32(padded[start:start + n].encode("utf-8")) % HASH_BUCKETS
+                counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in counts.values())) or 1.0
+    return {bucket: value / norm for bucket, value in counts.items()}
+
+
+class HashedNgramClassifier:
+    """Regresión logística sobre n-gramas hasheados (pesos dispersos en un dict)"""
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, bias: float = 0.0):
+        self.weights = weights or {}
+        self.bias = bias
+
+    def predict_proba(self, text: str) -> float:
+        """Probabilidad de que el mensaje esté on-topic"""
+        features = ngram_features(text)
+        score = self.bias + sum(self.weights.get(bucket, 0.0) * value for bucket, value in features.items())
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, score))))
+
+    @classmethod
+    def fit(cls, examples: List[Tuple[str, bool]], epochs: int = 15, learning_rate: float = 0.5,
+            l2: float = 1e-5, seed: int = 0) -> "HashedNgramClassifier":
+        """Entrenar con SGD; las clases se balancean para no sesgar hacia on-topic"""
+        model = cls()
+        positives = sum(1 for _, label in examples if label) or 1
+        negatives = (len(examples) - positives) or 1
+        class_weight = {True: len(examples) / (2 * positives), False: len(examples) / (2 * negatives)}
+        featurized = [(ngram_features(text), label) for text, label in examples]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(featurized)
+            rate = learning_rate / (1 + epoch)
+            for features, label in featurized:
+                score = model.bias + sum(model.weights.get(bucket, 0.0) * value for bucket, value in features.items())
+                probability = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, score))))
+                gradient = (probability - (1.0 if label else 0.0)) * class_weight[label]
+                for bucket, value in features.items():
+                    weight = model.weights.get(bucket, 0.0)
+                    model.weights[bucket] = weight - rate * (gradient * value + l2 * weight)
+                model.bias -= rate * gradient
+        return model
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "hash_buckets": HASH_BUCKETS,
+                "ngram_range": list(NGRAM_RANGE),
+                "bias": self.bias,
+                "weights": {str(bucket): round(weight, 6) for bucket, weight in self.weights.items() if abs(weight) > 1e-6},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("hash_buckets") != HASH_BUCKETS or tuple(data.get("ngram_range", ())) != NGRAM_RANGE:
+            raise ValueError(f"El modelo {path} se entrenó con otros parámetros de hashing")
+        return cls({int(bucket): weight for bucket, weight in data["weights"].items()}, data["bias"])
+
+
+class TopicPrefilter:
+    """Reglas + clasificador local con banda de incertidumbre"""
+
+    def __init__(self, model: Optional[HashedNgramClassifier], low: float, high: float):
+        """
+        Args:
+            model: Clasificador entrenado (None = solo reglas)
+            low: Probabilidad máxima para decidir off-topic localmente
+            high: Probabilidad mínima para decidir on-topic localmente
+        """
+        self.model = model
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def from_config(cls) -> "TopicPrefilter":
+        """Crear el pre-filtro con los valores de Config (sin modelo si no existe el archivo)"""
+        from config import Config
+
+        model = None
+        if os.path.exists(Config.TOPIC_MODEL_PATH):
+            try:
+                model = HashedNgramClassifier.load(Config.TOPIC_MODEL_PATH)
+            except (ValueError, KeyError, json.JSONDecodeError) as e:
+                print(f"[TopicClassifier] No se pudo cargar {Config.TOPIC_MODEL_PATH}: {e}")
+        return cls(model, Config.TOPIC_CLASSIFIER_LOW, Config.TOPIC_CLASSIFIER_HIGH)
+
+    def classify(self, message: str) -> TopicDecision:
+        """Decidir onTopic localmente o devolver on_topic=None para consultar al LLM"""
+        if not isinstance(message, str) or not message.strip():
+            return TopicDecision(None, "llm")
+        if URL_PATTERN.search(message):
+            return TopicDecision(False, "url_rule")
+        text = normalize(message)
+        if FINANCE_VOCABULARY.search(text) or _BARE_AMOUNT.match(text):
+            return TopicDecision(True, "vocabulary")
+        if classify_close(message) in ("end_conversation", "confirmation"):
+            return TopicDecision(True, "vocabulary")
+        if self.model is None:
+            return TopicDecision(None, "llm")
+        score = self.model.predict_proba(message)
+        if score >= self.high:
+            return TopicDecision(True, "classifier", score)
+        if score <= self.low:
+            return TopicDecision(False, "classifier", score)
+        return TopicDecision(None, "llm", score)
+
+
+def load_training_examples(log_path: str) -> List[Tuple[str, bool]]:
+    """Pares (último mensaje del usuario, onTopic del LLM) a partir de graph_logs.jsonl
+
+    Cada AFTER de validate_message se empareja con el BEFORE anterior del mismo
+    agente (validate_message_node pasa por invoke(), que loguea ambos). Solo se
+    usan las decisiones del LLM (topic_source == "llm"): las del propio
+    pre-filtro y las de fallback por error no sirven como etiquetas.
+    """
+    examples: List[Tuple[str, bool]] = []
+    last_message: Optional[str] = None
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("agent_name") != "validate_message":
+                continue
+            state = entry.get("state") or {}
+            if entry.get("event_type") == "BEFORE":
+                messages = state.get("messages") or []
+                if messages and isinstance(messages[-1], dict):
+                    content = messages[-1].get("content")
+                    last_message = content if isinstance(content, str) else last_message
+            elif entry.get("event_type") == "AFTER" and last_message is not None:
+                if "onTopic" in state and state.get("topic_source") == "llm":
+                    examples.append((last_message, bool(state["onTopic"])))
+                last_message = None
+    return examples
+
+
+def evaluate(prefilter: TopicPrefilter, examples: List[Tuple[str, bool]]) -> Dict[str, float]:
+    """Acuerdo con el LLM: cobertura local, acuerdo en lo decidido localmente y por fuente"""
+    decided = agreed = 0
+    by_source: Dict[str, List[int]] = {}
+    for message, label in examples:
+        decision = prefilter.classify(message)
+        if decision.on_topic is None:
+            continue
+        decided += 1
+        hit = int(decision.on_topic == label)
+        agreed += hit
+        stats = by_source.setdefault(decision.source, [0, 0])
+        stats[0] += 1
+        stats[1] += hit
+    total = len(examples) or 1
+    report = {
+        "examples": len(examples),
+        "local_coverage": round(decided / total, 3),
+        "local_agreement": round(agreed / decided, 3) if decided else None,
+    }
+    for source, (count, hits) in sorted(by_source.items()):
+        report[f"{source}_agreement"] = f"{hits}/{count}"
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Pre-filtro local de tópico")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="Entrenar con las decisiones del LLM en los logs")
+    train_parser.add_argument("--logs", default="graph_logs.jsonl")
+    train_parser.add_argument("--out", default=Config.TOPIC_MODEL_PATH)
+    train_parser.add_argument("--holdout", type=float, default=0.2, help="Fracción reservada para evaluar")
+    eval_parser = subparsers.add_parser("eval", help="Medir el acuerdo con el LLM")
+    eval_parser.add_argument("--logs", default="graph_logs.jsonl")
+    eval_parser.add_argument("--model", default=Config.TOPIC_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    examples = load_training_examples(args.logs)
+    if not examples:
+        print(f"No hay decisiones de validate_message en {args.logs}")
+        return
+    if args.command == "train":
+        random.Random(0).shuffle(examples)
+        split = int(len(examples) * (1 - args.holdout)) if len(examples) > 10 else len(examples)
+        model = HashedNgramClassifier.fit(examples[:split])
+        model.save(args.out)
+        print(f"Modelo guardado en {args.out} ({split} ejemplos, {len(model.weights)} pesos)")
+        examples = examples[split:] or examples
+        prefilter = TopicPrefilter(model, Config.TOPIC_CLASSIFIER_LOW, Config.TOPIC_CLASSIFIER_HIGH)
+    else:
+        prefilter = TopicPrefilter(HashedNgramClassifier.load(args.model), Config.TOPIC_CLASSIFIER_LOW, Config.TOPIC_CLASSIFIER_HIGH)
+    for key, value in evaluate(prefilter, examples).items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
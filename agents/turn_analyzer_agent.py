@@ -0,0 +1,214 @@
+"""
+Agente TurnAnalyzer para el grafo LangGraph.
+
+Reemplaza las tres llamadas de clasificación de un turno (ValidateMessage con
+OpenAI, ValidateReason y EvaluateClose con Groq) por una sola llamada con salida
+estructurada (JSON schema) que devuelve onTopic, has_response/reason y la
+decisión de cierre.
+
+El resultado se escribe en los mismos campos que los agentes individuales, así
+los routers del grafo no cambian; la decisión de cierre queda en turn_analysis
+y EvaluateCloseAgent la aplica sin volver a llamar al modelo. Si las reglas
+locales (pre-filtro de tópico, parser de respuestas y clasificador de
+confirmación) ya resuelven todo lo que el turno necesita, no hay llamada.
+"""
+
+import os
+from typing import Dict, Any, Optional, Literal
+from pydantic import BaseModel, Field
+from langchain_core.messages import AIMessage, SystemMessage
+from .base_agent import BaseAgent
+from .reason_parser import parse_reason
+from .close_classifier import classify_close
+from prompts.validate_message_prompts import OFF_TOPIC_MESSAGE
+
+# Campos del estado que escribe ValidateReason
+REASON_FIELDS = ("status", "reason", "reason_source")
+
+
+class TurnAnalysis(BaseModel):
+    """Salida estructurada del TurnAnalyzer"""
+    on_topic: bool = Field(description="True si el mensaje está dentro del tópico")
+    has_response: bool = Field(description="True si el usuario respondió la pregunta actual")
+    reason: Optional[str] = Field(description="Respuesta concreta del usuario o null")
+    decision: Optional[Literal["end_conversation", "profesor", "confirmation"]] = Field(
+        description="Decisión sobre la confirmación o null si no aplica"
+    )
+
+
+class TurnAnalyzerAgent(BaseAgent):
+    """Agente que clasifica el turno completo con una sola llamada"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        """Implementar patrón Singleton"""
+        if cls._instance is None:
+            cls._instance = super(TurnAnalyzerAgent, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Inicializar el agente turn analyzer solo una vez"""
+        if not self._initialized:
+            from .model_clients import get_model_clients
+            from config import Config
+
+            # Mismo proveedor que ValidateMessage: soporta JSON schema estricto
+            self.model = get_model_clients().chat_openai(
+                api_key=Config.OPENAI_API_KEY or os.getenv("OPENAI_API_KEY", ""),
+                model=Config.OPENAI_MODEL or "gpt-4o-mini",
+                temperature=0.0,  # Determinístico para clasificación
+                max_tokens=150,   # Solo el JSON
+            )
+            self.structured_model = self.model.with_structured_output(TurnAnalysis, method="json_schema", strict=True)
+
+            # Llamar al constructor padre con el modelo configurado
+            super().__init__(self.model, "turn_analyzer")
+
+            # Marcar como inicializado
+            self._initialized = True
+
+    def _process_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementación del método abstracto requerido por BaseAgent"""
+        print("---Turn Analyzer Node---")
+
+        local_result = self._analyze_locally(state)
+        if local_result is not None:
+            return local_result
+
+        try:
+            analysis = self.structured_model.invoke(self._build_messages(state))
+        except Exception as e:
+            return self._fallback_to_agents(state, e)
+        return self._build_result(state, analysis, "turn_analyzer")
+
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando ainvoke"""
+        print("---Turn Analyzer Node---")
+
+        local_result = self._analyze_locally(state)
+        if local_result is not None:
+            return local_result
+
+        try:
+            analysis = await self.structured_model.ainvoke(self._build_messages(state))
+        except Exception as e:
+            return await self._afallback_to_agents(state, e)
+        return self._build_result(state, analysis, "turn_analyzer")
+
+    def _needs(self, state: Dict[str, Any]) -> tuple[bool, bool]:
+        """Qué clasificadores aplican: ValidateReason en exploring, EvaluateClose en waiting_confirmation"""
+        status = state.get("status", "")
+        question = state.get("question", "")
+        needs_reason = status == "exploring" and bool(question)
+        needs_close = status == "waiting_confirmation" and bool(question) and bool(state.get("reason"))
+        return needs_reason, needs_close
+
+    def _last_user_message(self, state: Dict[str, Any]) -> str:
+        messages = state.get("messages", [])
+        return getattr(messages[-1], "content", "") if messages else ""
+
+    def _analyze_locally(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Resolver el turno sin modelo si las reglas cubren todo lo que hace falta"""
+        from .validate_message_agent import ValidateMessageAgent
+        from .validate_reason_agent import ValidateReasonAgent
+        from .evaluate_close_agent import EvaluateCloseAgent
+
+        prefilter = ValidateMessageAgent().prefilter
+        if prefilter is None:
+            return None
+        user_message = self._last_user_message(state)
+        topic = prefilter.classify(user_message)
+        if topic.on_topic is None:
+            return None
+        if not topic.on_topic:
+            return self._build_result(state, TurnAnalysis(on_topic=False, has_response=False, reason=None, decision=None), topic.source)
+
+        needs_reason, needs_close = self._needs(state)
+        parsed = None
+        if needs_reason:
+            parsed = parse_reason(state.get("question"), user_message) if ValidateReasonAgent().rules_enabled else None
+            if parsed is None:
+                return None
+        decision = None
+        if needs_close:
+            decision = classify_close(user_message) if EvaluateCloseAgent().rules_enabled else None
+            if decision is None:
+                return None
+
+        analysis = TurnAnalysis(
+            on_topic=True,
+            has_response=parsed.has_response if parsed else False,
+            reason=parsed.reason if parsed else None,
+            decision=decision
+        )
+        return self._build_result(state, analysis, "rules")
+
+    def _build_messages(self, state: Dict[str, Any]) -> list:
+        """Armar el prompt combinado con los criterios de cada clasificador"""
+        needs_reason, needs_close = self._needs(state)
+        # Se excluyen por estado (exploring / waiting_confirmation): una variante precompilada por caso
+        variant = "reason" if needs_reason else "close" if needs_close else ""
+        prompt = self.prompts.plan("turn_analyzer", state.get("question", ""), variant).system_prefix
+        # Ventana del historial dentro del presupuesto (contexto para preguntas de seguimiento)
+        messages = self._build_context(SystemMessage(content=prompt), state.get("messages", []), state.get("summary", ""))
+        self._log_prompt(state, self._prepare_prompt_text(messages))
+        self._record_input_tokens(messages)
+        return messages
+
+    def _build_result(self, state: Dict[str, Any], analysis: TurnAnalysis, source: str) -> Dict[str, Any]:
+        """Escribir el análisis en los mismos campos que los agentes individuales"""
+        from .validate_reason_agent import ValidateReasonAgent
+
+        print(f"[TurnAnalyzer] ({source}) onTopic={analysis.on_topic} has_response={analysis.has_response} "
+              f"reason={analysis.reason} decision={analysis.decision}")
+        messages = state.get("messages", [])
+        result = {
+            "onTopic": analysis.on_topic,
+            "topic_source": source,
+            "last_agent": "validate_message",
+            # EvaluateClose aplica la decisión solo si corresponde a este mismo mensaje
+            "turn_analysis": {
+                **analysis.model_dump(),
+                "source": source,
+                "message_id": getattr(messages[-1], "id", None) if messages else None,
+            },
+        }
+        if not analysis.on_topic:
+            result["messages"] = [AIMessage(content=OFF_TOPIC_MESSAGE)]
+            return result
+
+        needs_reason, _ = self._needs(state)
+        if needs_reason:
+            reason_state = ValidateReasonAgent()._apply_reason(
+                dict(state), analysis.has_response, analysis.reason, source
+            )
+            result.update({field: reason_state[field] for field in REASON_FIELDS if field in reason_state})
+        return result
+
+    def _fallback_to_agents(self, state: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Si falla la llamada combinada, clasificar con los agentes individuales"""
+        from .validate_message_agent import ValidateMessageAgent
+        from .validate_reason_agent import ValidateReasonAgent
+
+        print(f"[TurnAnalyzer] Error en el análisis combinado: {error}, usando los agentes individuales")
+        result = ValidateMessageAgent()._process_state(state)
+        if result.get("onTopic", True):
+            reason_state = ValidateReasonAgent()._process_state(dict(state))
+            result.update({field: reason_state[field] for field in REASON_FIELDS if field in reason_state})
+        result["turn_analysis"] = None
+        return result
+
+    async def _afallback_to_agents(self, state: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Versión async de _fallback_to_agents()"""
+        from .validate_message_agent import ValidateMessageAgent
+        from .validate_reason_agent import ValidateReasonAgent
+
+        print(f"[TurnAnalyzer] Error en el análisis combinado: {error}, usando los agentes individuales")
+        result = await ValidateMessageAgent()._aprocess_state(state)
+        if result.get("onTopic", True):
+            reason_state = await ValidateReasonAgent()._aprocess_state(dict(state))
+            result.update({field: reason_state[field] for field in REASON_FIELDS if field in reason_state})
+        result["turn_analysis"] = None
+        return result
@@ -8,10 +8,14 @@ de finanzas personales y planificación financiera.
 
 import os
 import json
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, Optional
 from langchain_core.messages import AIMessage, SystemMessage
 from .base_agent import BaseAgent
-from prompts.validate_message_prompts import OFF_TOPIC_MESSAGE, VALIDATE_MESSAGE_SYSTEM_PROMPT
+from .topic_classifier import TopicPrefilter
+from .reason_parser import normalize
+from .agent_utils import extract_text_from_content
+from prompts.validate_message_prompts import OFF_TOPIC_MESSAGE
 
 class ValidateMessageAgent(BaseAgent):
     """Agente que valida si el mensaje está dentro del tópico usando LLM"""
@@ -29,7 +33,7 @@ class ValidateMessageAgent(BaseAgent):
         """Inicializar el agente validate message solo una vez"""
         if not self._initialized:
             # Configurar el modelo OpenAI para validación
-            from langchain_openai import ChatOpenAI
+            from .model_clients import get_model_clients
             try:
                 from config import Config
             except Exception:
@@ -44,7 +48,8 @@ class ValidateMessageAgent(BaseAgent):
             ) or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
             # Crear modelo específico para validación con parámetros optimizados
-            self.model = ChatOpenAI(
+            self.model = get_model_clients().chat_openai(
+                failover=True,    # Clasificación simple: puede responder Groq si OpenAI está caído
                 api_key=api_key,
                 model=model_name,
                 temperature=0.0,  # Determinístico para clasificación
@@ -54,6 +59,12 @@ class ValidateMessageAgent(BaseAgent):
             # Llamar al constructor padre con el modelo configurado
             super().__init__(self.model, "validate_message")
             
+            # Reglas + clasificador local: el LLM solo ve los mensajes dudosos
+            self.prefilter = TopicPrefilter.from_config() if Config and Config.TOPIC_PREFILTER_ENABLED else None
+            
+            # Respuestas del modelo cacheadas por la ventana del historial que ve el modelo (normalizada)
+            self.prompt_hash = self.prompts.agent_hash("validate_message")
+            
             # Marcar como inicializado
             self._initialized = True
 
@@ -61,11 +72,45 @@ class ValidateMessageAgent(BaseAgent):
         """Implementación del método abstracto requerido por BaseAgent"""
         print("---Validate Message Node---")
         
+        local_result = self._classify_locally(state)
+        if local_result is not None:
+            return local_result
+        
+        messages = self._build_messages(state)
+        
+        try:
+            # Llamar al modelo para obtener la clasificación
+            response = self._invoke_model_cached(messages, *self._cache_parts(messages))
+            return self._build_result(response)
+            
+        except Exception as e:
+            return self._fallback_result(e)
+
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---Validate Message Node---")
+        
+        local_result = self._classify_locally(state)
+        if local_result is not None:
+            return local_result
+        
+        messages = self._build_messages(state)
+        
+        try:
+            # Llamar al modelo para obtener la clasificación
+            response = await self._ainvoke_model_cached(messages, *self._cache_parts(messages))
+            return self._build_result(response)
+            
+        except Exception as e:
+            return self._fallback_result(e)
+
+    def _build_messages(self, state: Dict[str, Any]) -> list:
+        """Preparar los mensajes para el modelo y loguear el prompt"""
         # Crear el mensaje del sistema con las instrucciones
-        system_message = SystemMessage(content=VALIDATE_MESSAGE_SYSTEM_PROMPT)
+        system_message = SystemMessage(content=self.prompts.plan("validate_message").system_prefix)
         
-        # Preparar mensajes para el modelo (sistema + historial de mensajes)
-        messages = [system_message] + state["messages"]
+        # Preparar mensajes para el modelo (sistema + ventana del historial dentro del presupuesto)
+        messages = self._build_context(system_message, state["messages"], state.get("summary", ""))
         
         # Preparar el prompt completo para logging
         prompt_text = self._prepare_prompt_text(messages)
@@ -73,58 +118,92 @@ class ValidateMessageAgent(BaseAgent):
         # Log del prompt completo
         self._log_prompt(state, prompt_text)
         
+        return messages
+
+    def _cache_parts(self, messages: list) -> tuple:
+        """Entradas de la llamada: el último mensaje del usuario normalizado y un digest del resto del prompt
+
+        El modelo ve la ventana del historial (y el resumen si se descartaron mensajes), no solo
+        el último mensaje: dos conversaciones con el mismo mensaje final pero distinto contexto
+        no comparten respuesta.
+        """
+        history = messages[1:]
+        content = getattr(history[-1], "content", "") if history else ""
+        if not isinstance(content, str) or not content.strip():
+            return ()
+        previous = "\x1e".join(
+            f"{getattr(message, 'type', '')}:{normalize(extract_text_from_content(message.content))}"
+            for message in messages[:-1]
+        )
+        return normalize(content), hashlib.sha256(previous.encode("utf-8")).hexdigest()[:16]
+
+    def _classify_locally(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Resultado del pre-filtro local, o None si hay que consultar al LLM"""
+        if self.prefilter is None or not state.get("messages"):
+            return None
+        last_message = state["messages"][-1]
+        decision = self.prefilter.classify(getattr(last_message, "content", last_message))
+        if decision.on_topic is None:
+            return None
+        score = f" (score {decision.score:.2f})" if decision.score is not None else ""
+        print(f"[ValidateMessage] Decisión local por {decision.source}{score}")
+        return self._topic_result(decision.on_topic, decision.source)
+
+    def _build_result(self, response) -> Dict[str, Any]:
+        """Parsear la clasificación del modelo y armar el resultado del nodo"""
+        # Extraer el contenido de la respuesta
+        response_text = extract_text_from_content(getattr(response, "content", response))
+        
+        print(f"[ValidateMessage] Respuesta del LLM: {response_text}")
+        
+        # Intentar parsear el JSON
         try:
-            # Llamar al modelo para obtener la clasificación
-            response = self.model.invoke(messages)
-            
-            # Extraer el contenido de la respuesta
-            from .agent_utils import extract_text_from_content
-            response_text = extract_text_from_content(getattr(response, "content", response))
-            
-            print(f"[ValidateMessage] Respuesta del LLM: {response_text}")
-            
-            # Intentar parsear el JSON
-            try:
-                # Limpiar la respuesta por si tiene texto adicional
-                response_text = response_text.strip()
-                # Buscar el JSON en la respuesta
-                if "{" in response_text and "}" in response_text:
-                    start = response_text.find("{")
-                    end = response_text.rfind("}") + 1
-                    json_str = response_text[start:end]
-                    result_json = json.loads(json_str)
-                    on_topic = result_json.get("onTopic", True)
-                else:
-                    # Si no hay JSON, asumir que está on-topic
-                    print(f"[ValidateMessage] No se encontró JSON en la respuesta, asumiendo on-topic")
-                    on_topic = True
-            except json.JSONDecodeError as e:
-                print(f"[ValidateMessage] Error parseando JSON: {e}, asumiendo on-topic")
-                on_topic = True
-            
-            print(f"[ValidateMessage] onTopic: {on_topic}")
-            
-            # Preparar el resultado
-            result = {
-                "onTopic": on_topic,
-                "last_agent": "validate_message"
-            }
-            
-            # Si el mensaje está fuera de tópico, agregar el mensaje de respuesta
-            if not on_topic:
-                off_topic_message = AIMessage(content=OFF_TOPIC_MESSAGE)
-                result["messages"] = [off_topic_message]
-                print(f"[ValidateMessage] Mensaje fuera de tópico, agregando respuesta")
+            # Limpiar la respuesta por si tiene texto adicional
+            response_text = response_text.strip()
+            # Buscar el JSON en la respuesta
+            if "{" in response_text and "}" in response_text:
+                start = response_text.find("{")
+                end = response_text.rfind("}") + 1
+                json_str = response_text[start:end]
+                result_json = json.loads(json_str)
+                on_topic = result_json.get("onTopic", True)
             else:
-                print(f"[ValidateMessage] Mensaje válido, continuando flujo normal")
-            
-            return result
-            
-        except Exception as e:
-            print(f"[ValidateMessage] Error en validación: {e}, asumiendo on-topic")
-            # En caso de error, asumir que está on-topic para no interrumpir el flujo
-            return {
-                "onTopic": True,
-                "last_agent": "validate_message"
-            }
+                # Si no hay JSON, asumir que está on-topic
+                print(f"[ValidateMessage] No se encontró JSON en la respuesta, asumiendo on-topic")
+                on_topic = True
+        except json.JSONDecodeError as e:
+            print(f"[ValidateMessage] Error parseando JSON: {e}, asumiendo on-topic")
+            on_topic = True
+        
+        return self._topic_result(on_topic, "llm")
+
+    def _topic_result(self, on_topic: bool, source: str) -> Dict[str, Any]:
+        """Armar el resultado del nodo a partir de la decisión (del LLM o local)"""
+        print(f"[ValidateMessage] onTopic: {on_topic}")
+        
+        # Preparar el resultado
+        result = {
+            "onTopic": on_topic,
+            "topic_source": source,
+            "last_agent": "validate_message"
+        }
+        
+        # Si el mensaje está fuera de tópico, agregar el mensaje de respuesta
+        if not on_topic:
+            off_topic_message = AIMessage(content=OFF_TOPIC_MESSAGE)
+            result["messages"] = [off_topic_message]
+            print(f"[ValidateMessage] Mensaje fuera de tópico, agregando respuesta")
+        else:
+            print(f"[ValidateMessage] Mensaje válido, continuando flujo normal")
+        
+        return result
 
+    def _fallback_result(self, error: Exception) -> Dict[str, Any]:
+        """Resultado por defecto cuando falla la validación"""
+        print(f"[ValidateMessage] Error en validación: {error}, asumiendo on-topic")
+        # En caso de error, asumir que está on-topic para no interrumpir el flujo
+        return {
+            "onTopic": True,
+            "topic_source": "fallback",
+            "last_agent": "validate_message"
+        }
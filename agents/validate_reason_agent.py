@@ -5,11 +5,10 @@ Este agente valida si el usuario ha proporcionado una razón válida
 en respuesta a una pregunta y determina el flujo inicial de la conversación.
 """
 
-from typing import Dict, Any, Literal
+from typing import Dict, Any, Literal, Optional
 from langchain_core.messages import SystemMessage, HumanMessage
 from .base_agent import BaseAgent
-from prompts.validate_reason_prompts import REASON_DETECTION_BY_TYPE, GENERIC_REASON_DETECTION_PROMPT
-from prompts.greeting_prompts import GREETING_BY_TYPE
+from .reason_parser import parse_reason, normalize
 
 class ValidateReasonAgent(BaseAgent):
     """Agente que valida si el usuario dio una razón válida"""
@@ -27,13 +26,12 @@ class ValidateReasonAgent(BaseAgent):
         """Inicializar el agente validate reason solo una vez"""
         if not self._initialized:
             # Configurar el modelo específico para el validate reason
-            from langchain_groq import ChatGroq
+            from .model_clients import get_model_clients
             from config import Config
 
             # Crear modelo específico del validate reason con parámetros optimizados
-            self.model = ChatGroq(
-                api_key=Config.GROQ_API_KEY,
-                model=Config.GROQ_MODEL,
+            self.model = get_model_clients().chat_groq(
+                hedge="validate_reason",  # Llamada corta e idempotente: duplicado si tarda
                 temperature=0.1,  # Baja temperatura para análisis consistente
                 max_tokens=300    # Respuestas concisas para análisis
             )
@@ -41,6 +39,12 @@ class ValidateReasonAgent(BaseAgent):
             # Llamar al constructor padre con el modelo configurado
             super().__init__(self.model, "validate_reason")
 
+            # Camino rápido: respuestas numéricas y de opción resueltas con reglas
+            self.rules_enabled = Config.REASON_PARSER_ENABLED
+
+            # Respuestas del modelo cacheadas por (pregunta, mensaje normalizado)
+            self.prompt_hash = self.prompts.agent_hash("validate_reason")
+
             # Marcar como inicializado
             self._initialized = True
 
@@ -85,13 +89,45 @@ class ValidateReasonAgent(BaseAgent):
         """Implementación del método abstracto requerido por BaseAgent"""
         print("---Validate Reason Node---")
         
+        messages_for_analysis = self._prepare_analysis(state)
+        if messages_for_analysis is None:
+            return state
+        
+        parsed = self._parse_with_rules(state, messages_for_analysis)
+        if parsed is not None:
+            return self._apply_reason(state, parsed.has_response, parsed.reason, "rules")
+        
+        # Usar el modelo para analizar
+        response = self._invoke_model_cached(messages_for_analysis, *self._cache_parts(state, messages_for_analysis))
+        
+        return self._apply_response(state, response)
+
+    async def _aprocess_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Versión async de _process_state() usando model.ainvoke"""
+        print("---Validate Reason Node---")
+        
+        messages_for_analysis = self._prepare_analysis(state)
+        if messages_for_analysis is None:
+            return state
+        
+        parsed = self._parse_with_rules(state, messages_for_analysis)
+        if parsed is not None:
+            return self._apply_reason(state, parsed.has_response, parsed.reason, "rules")
+        
+        # Usar el modelo para analizar
+        response = await self._ainvoke_model_cached(messages_for_analysis, *self._cache_parts(state, messages_for_analysis))
+        
+        return self._apply_response(state, response)
+
+    def _prepare_analysis(self, state: Dict[str, Any]) -> Optional[list]:
+        """Armar los mensajes para el modelo, o None si no hay nada que analizar"""
         # Obtener el estado actual
         current_status = state.get("status", "")
         
         # Solo procesar si el estado es "exploring"
         if current_status != "exploring":
             print(f"[ValidateReason] Estado actual '{current_status}' no es 'exploring', retornando sin cambios")
-            return state
+            return None
         
         # Obtener información del estado
         current_question = state.get("question", "")
@@ -99,12 +135,12 @@ class ValidateReasonAgent(BaseAgent):
         # Si no hay pregunta en el estado, mantener estado exploring
         if not current_question:
             print(f"[ValidateReason] No hay pregunta en el estado, manteniendo estado exploring")
-            return state
+            return None
 
         # Obtener el último mensaje del usuario
         messages = state.get("messages", [])
         if not messages:
-            return state
+            return None
 
         # Obtener el último mensaje del usuario
         user_message = ""
@@ -114,33 +150,39 @@ class ValidateReasonAgent(BaseAgent):
             user_message = last_message.content
 
         if not user_message:
-            return state
-
-        # Resolver texto legible de la pregunta si es enum key
-        readable_question = GREETING_BY_TYPE.get(current_question, current_question)
-
-        # Seleccionar prompt directamente por el enum de la pregunta (incluye OBJETIVO_*)
-        prompt_template = REASON_DETECTION_BY_TYPE.get(current_question, GENERIC_REASON_DETECTION_PROMPT)
+            return None
 
-        # Crear el prompt para detectar respuestas
-        detection_prompt = prompt_template.format(
-            current_question=readable_question,
-            user_message=user_message
-        )
+        # Prompt precompilado para el tipo de pregunta (incluye OBJETIVO_*); el mensaje va aparte
+        detection_prompt = self.prompts.plan("validate_reason", current_question).system_prefix
 
         # Preparar mensajes para el modelo
         system_message = SystemMessage(content=detection_prompt)
         human_message = HumanMessage(content=user_message)
-        messages_for_analysis = [system_message, human_message]
-        
-        # Usar el modelo para analizar
-        response = self.model.invoke(messages_for_analysis)
-        
+        return [system_message, human_message]
+
+    def _cache_parts(self, state: Dict[str, Any], messages_for_analysis: list) -> tuple:
+        """Entradas de la llamada: la pregunta y el mensaje del usuario normalizado"""
+        return state.get("question", ""), normalize(messages_for_analysis[-1].content)
+
+    def _parse_with_rules(self, state: Dict[str, Any], messages_for_analysis: list):
+        """Resolver la respuesta sin LLM (None si es ambigua y hay que consultar al modelo)"""
+        if not self.rules_enabled:
+            return None
+        # El último mensaje del análisis es el del usuario
+        return parse_reason(state.get("question"), messages_for_analysis[-1].content)
+
+    def _apply_response(self, state: Dict[str, Any], response) -> Dict[str, Any]:
+        """Aplicar la respuesta del modelo al estado"""
         # Parsear la respuesta (debe ser 1 o 0)
         has_response, reason = self._parse_simple_response(response.content)
+        return self._apply_reason(state, has_response, reason, "llm")
+
+    def _apply_reason(self, state: Dict[str, Any], has_response: bool, reason: Optional[str], source: str) -> Dict[str, Any]:
+        """Guardar la razón detectada (por reglas o por el modelo) en el estado"""
+        state["reason_source"] = source
         
         # Log del resultado
-        print(f"[ValidateReason] Usuario {'respondió' if has_response else 'NO respondió'} a la pregunta")
+        print(f"[ValidateReason] Usuario {'respondió' if has_response else 'NO respondió'} a la pregunta ({source})")
         if reason:
             # Guardar la razon en el estado
             state["reason"] = reason
@@ -0,0 +1,93 @@
+"""
+Benchmark del serializer de checkpoints: bytes por turno y tiempo de encode/decode.
+
+Arma el estado de una conversación que crece turno a turno (saludo de
+GREETING_BY_TYPE, preguntas del usuario y respuestas largas del Profesor tomadas
+del documento del dominio) y serializa el valor de "messages" de cada turno con
+el serializer actual de LangGraph y con las variantes comprimidas.
+
+Uso:
+    python benchmarks/checkpoint_serde_bench.py [--turns 20] [--repeat 50]
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from checkpoint_serde import create_checkpoint_serializer, zstandard
+from prompts.greeting_prompts import GREETING_BY_TYPE
+
+DOMAIN_DOC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "doc de info del dominio.md")
+
+
+def build_conversations(turns: int) -> List[list]:
+    """Lista de mensajes de cada turno (la conversación completa hasta ese turno)"""
+    with open(DOMAIN_DOC, "r", encoding="utf-8") as f:
+        sections = [section.strip() for section in f.read().split("\n## ") if section.strip()]
+
+    greeting = next(iter(GREETING_BY_TYPE.values()))["greeting"]
+    messages = [HumanMessage(content="hola"), AIMessage(content=greeting)]
+    conversations = []
+    for turn in range(turns):
+        messages = messages + [
+            HumanMessage(content=f"¿Me explicás el punto {turn + 1}?"),
+            AIMessage(content=sections[turn % len(sections)][:1500]),
+        ]
+        conversations.append(messages)
+    return conversations
+
+
+def bench(name: str, serde, conversations: List[list], repeat: int):
+    """Medir bytes por turno y tiempos promedio de dumps_typed/loads_typed"""
+    total_bytes = 0
+    encode_time = 0.0
+    decode_time = 0.0
+    for messages in conversations:
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            typed = serde.dumps_typed(messages)
+        encode_time += (time.perf_counter() - start_time) / repeat
+
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            serde.loads_typed(typed)
+        decode_time += (time.perf_counter() - start_time) / repeat
+
+        total_bytes += len(typed[1])
+
+    turns = len(conversations)
+    print(f"  {name:<8} tipo={typed[0]:<14} {total_bytes / turns:>9.0f} bytes/turno  "
+          f"encode {encode_time / turns * 1e6:>7.0f} µs  decode {decode_time / turns * 1e6:>7.0f} µs")
+    return total_bytes
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark del serializer de checkpoints")
+    parser.add_argument("--turns", type=int, default=20, help="Turnos de la conversación")
+    parser.add_argument("--repeat", type=int, default=50, help="Repeticiones por medición")
+    args = parser.parse_args(argv)
+
+    conversations = build_conversations(args.turns)
+    print(f"Serializer de checkpoints: {args.turns} turnos, mensajes de la conversación completa por turno")
+
+    baseline = bench("actual", JsonPlusSerializer(), conversations, args.repeat)
+    codecs = ["zlib"] + (["zstd"] if zstandard is not None else [])
+    for codec in codecs:
+        compressed = bench(codec, create_checkpoint_serializer(codec=codec), conversations, args.repeat)
+        print(f"  -> {compressed / baseline:.0%} del tamaño actual")
+
+    # Compatibilidad: un blob viejo (sin comprimir) se lee con el serializer nuevo
+    old_blob = JsonPlusSerializer().dumps_typed(conversations[-1])
+    restored = create_checkpoint_serializer(codec="zlib").loads_typed(old_blob)
+    print(f"  Lectura de checkpoints sin comprimir: {'OK' if restored == conversations[-1] else 'FALLA'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark del checkpoint store: operaciones por segundo con 1, 8 y 32 sesiones concurrentes.
+
+Cada sesión corre en su propio hilo y simula un turno: lee el último checkpoint
+(get_tuple, como get_state), escribe uno nuevo (put) y sus escrituras pendientes
+(put_writes). Compara el SqliteSaver original (una conexión compartida, journaling
+por defecto) contra el checkpointer de checkpoint_store (WAL + pool de lectura).
+
+Uso:
+    python benchmarks/checkpoint_store_bench.py [--turns 200] [--sessions 1 8 32]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.checkpoint.base import empty_checkpoint, create_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from checkpoint_store import create_checkpointer
+
+
+def baseline_checkpointer(db_path: str) -> SqliteSaver:
+    """Checkpointer como lo creaba GraphInterface antes de checkpoint_store"""
+    return SqliteSaver(sqlite3.connect(db_path, check_same_thread=False))
+
+
+def run_session(saver, thread_id: str, turns: int):
+    """Simular `turns` turnos de una sesión"""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    messages = []
+    for step in range(turns):
+        saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+        messages = (messages + [
+            HumanMessage(content=f"Mensaje {step} de la sesión {thread_id}"),
+            AIMessage(content="Respuesta de ejemplo del agente " * 8),
+        ])[-6:]
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": messages, "summary": "resumen " * 20, "status": "exploring"}
+        checkpoint = create_checkpoint(checkpoint, None, step)
+        config = saver.put(config, checkpoint, {"source": "loop", "step": step}, {})
+        saver.put_writes(config, [("messages", messages[-1])], task_id=f"task-{step}")
+
+
+def bench(name: str, factory: Callable[[str], object], sessions: int, turns: int) -> float:
+    """Correr `sessions` sesiones en paralelo y devolver operaciones por segundo"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        saver = factory(os.path.join(tmp_dir, "bench.db"))
+        saver.setup()
+        threads = [
+            threading.Thread(target=run_session, args=(saver, f"s{index}", turns))
+            for index in range(sessions)
+        ]
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start_time
+        getattr(saver, "close", saver.conn.close)()
+
+    # Tres operaciones por turno: get_tuple, put y put_writes
+    ops_per_second = sessions * turns * 3 / elapsed
+    print(f"  {name:<10} sesiones={sessions:<3} {ops_per_second:>10.0f} ops/s ({elapsed:.2f}s)")
+    return ops_per_second
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark del checkpoint store")
+    parser.add_argument("--turns", type=int, default=200, help="Turnos por sesión")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32], help="Sesiones concurrentes")
+    args = parser.parse_args(argv)
+
+    print(f"Checkpoint store: {args.turns} turnos por sesión")
+    for sessions in args.sessions:
+        baseline = bench("original", baseline_checkpointer, sessions, args.turns)
+        pooled = bench("pool+WAL", create_checkpointer, sessions, args.turns)
+        print(f"  -> x{pooled / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de la ventana del historial por presupuesto de tokens.
+
+Arma una conversación sintética justo antes de que dispare el summarizer (6
+mensajes con respuestas largas del Profesor más el mensaje nuevo del usuario) y
+compara, para cada agente con presupuesto en CONTEXT_BUDGETS, los tokens de
+entrada con el historial completo contra los de la ventana. Los tokens se
+estiman como en /health (~4 caracteres por token).
+
+Uso:
+    python benchmarks/context_window_bench.py [--answer-tokens 800] [--turns 3]
+"""
+
+import os
+import sys
+import argparse
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agents.agent_config import CONTEXT_BUDGETS
+from agents.agent_utils import fit_messages_to_budget, message_tokens
+from prompts.validate_message_prompts import VALIDATE_MESSAGE_SYSTEM_PROMPT
+from prompts.profesor_prompts import PROFESOR_BASE_BY_TYPE
+
+ANSWER_SENTENCE = (
+    "El interés compuesto hace que los rendimientos se reinviertan y generen nuevos rendimientos, "
+    "por eso empezar temprano y aportar todos los meses pesa más que el monto inicial. "
+)
+USER_MESSAGES = [
+    "quiero juntar plata para cuando me jubile",
+    "¿y cuánto tendría que poner por mes más o menos?",
+    "¿qué pasa si el dólar sube mucho?",
+    "creo que prefiero una renta mensual",
+]
+
+# Prompt de sistema representativo de cada agente
+SYSTEM_PROMPTS = {
+    "validate_message": VALIDATE_MESSAGE_SYSTEM_PROMPT,
+    "turn_analyzer": VALIDATE_MESSAGE_SYSTEM_PROMPT,
+    "profesor": PROFESOR_BASE_BY_TYPE["tipo_objetivo"],
+    "profesor_openai": PROFESOR_BASE_BY_TYPE["tipo_objetivo"],
+}
+
+
+def build_conversation(turns: int, answer_tokens: int) -> List:
+    """turns pares (usuario, Profesor) más el mensaje nuevo del usuario"""
+    answer = (ANSWER_SENTENCE * (answer_tokens * 4 // len(ANSWER_SENTENCE) + 1))[:answer_tokens * 4]
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=USER_MESSAGES[turn % len(USER_MESSAGES)]))
+        messages.append(AIMessage(content=answer))
+    messages.append(HumanMessage(content=USER_MESSAGES[turns % len(USER_MESSAGES)]))
+    return messages
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark de la ventana del historial")
+    parser.add_argument("--answer-tokens", type=int, default=800, help="Tokens de cada respuesta del Profesor")
+    parser.add_argument("--turns", type=int, default=3, help="Turnos previos en el historial")
+    args = parser.parse_args(argv)
+
+    history = build_conversation(args.turns, args.answer_tokens)
+    history_tokens = sum(message_tokens(message) for message in history)
+    print(f"Historial: {len(history)} mensajes, ~{history_tokens} tokens")
+    print(f"{'agente':<18}{'historial':>20}{'entrada total':>22}{'descartados':>13}{'recortados':>12}")
+    for agent_name, budget in CONTEXT_BUDGETS.items():
+        system_tokens = message_tokens(SystemMessage(content=SYSTEM_PROMPTS[agent_name]))
+        window, dropped, truncated = fit_messages_to_budget(history, budget["history_tokens"], budget["message_tokens"])
+        window_tokens = sum(message_tokens(message) for message in window)
+        full_input = system_tokens + history_tokens
+        window_input = system_tokens + window_tokens
+        print(f"{agent_name:<18}{history_tokens:>7} → {window_tokens:>5} ({history_tokens / window_tokens:4.1f}x)"
+              f"{full_input:>8} → {window_input:>5} ({full_input / window_input:4.1f}x)"
+              f"{dropped:>13}{truncated:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark de la recuperación local del documento del dominio.
+
+Mide el tiempo de construcción y de apertura (mmap) del índice BM25, la latencia
+de búsqueda por consulta y cuántos tokens de contexto recibe el Profesor con los
+top-k pasajes contra file_search. Con el chunking por defecto de OpenAI (800
+tokens con 400 de solapamiento, hasta 20 resultados) un documento de este tamaño
+entra completo en el contexto, así que la línea base es el documento entero.
+También reporta hit@k sobre un set de consultas con su sección esperada.
+
+Uso:
+    python benchmarks/domain_retrieval_bench.py [--top-k 3] [--repeat 200]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from agents.domain_retrieval import DomainIndex, build_index, format_passages
+
+DOMAIN_DOC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "doc de info del dominio.md")
+
+# (consulta, etiqueta esperada entre los top-k)
+QUERIES = [
+    ("¿qué es el interés compuesto?", "MECANISMO"),
+    ("¿por qué no alcanza con la jubilación del estado?", "MOTIVACIÓN"),
+    ("¿cuál es la diferencia entre atesorar y ahorrar?", "CONCEPTO CLAVE"),
+    ("¿conviene empezar a ahorrar de joven?", "HORIZONTE"),
+    ("¿qué tipos de activos existen?", "CLASIFICACIÓN"),
+    ("¿cuánto rindieron los bonos del tesoro?", "RETORNOS"),
+    ("¿qué es el SP500?", "ÍNDICES PRINCIPALES"),
+    ("¿qué es una cartera balanceada?", "CARTERA BALANCEADA"),
+    ("¿cómo cambia la estrategia según la edad?", "EDADES"),
+    ("¿cuánto debería aportar por mes?", "GUÍA PRÁCTICA"),
+    ("¿qué riesgos tengo que tener en cuenta?", "ADVERTENCIAS IMPORTANTES"),
+    ("¿conviene elegir renta o monto final?", "TIPOS DE PLAN"),
+    ("¿qué es la regla del 4%?", "REFERENCIA"),
+    ("¿y si no tengo monto inicial?", "FAQ"),
+    ("¿qué pasa con la inflación en Argentina?", "FAQ"),
+    ("¿cómo invierto desde Argentina?", "ACCESO"),
+]
+
+
+def token_counter():
+    """Contador de tokens de tiktoken; sin el encoding descargado, ~4 caracteres por token"""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text)), "o200k_base"
+    except Exception:
+        return lambda text: round(len(text) / 4), "estimado, 4 caracteres por token"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark de la recuperación local")
+    parser.add_argument("--top-k", type=int, default=3, help="Pasajes por consulta")
+    parser.add_argument("--repeat", type=int, default=200, help="Repeticiones de cada consulta")
+    args = parser.parse_args(argv)
+
+    index_path = os.path.join(tempfile.mkdtemp(), "domain_index.bin")
+    start_time = time.perf_counter()
+    passages = build_index(DOMAIN_DOC, index_path)
+    build_ms = (time.perf_counter() - start_time) * 1000
+    start_time = time.perf_counter()
+    index = DomainIndex(index_path)
+    open_ms = (time.perf_counter() - start_time) * 1000
+    print(f"Índice: {passages} pasajes, {os.path.getsize(index_path) / 1024:.0f} KiB, "
+          f"construcción {build_ms:.1f} ms, apertura (mmap) {open_ms:.2f} ms")
+
+    latencies = []
+    for _ in range(args.repeat):
+        for query, _ in QUERIES:
+            start_time = time.perf_counter()
+            index.search(query, args.top_k)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+    print(f"Búsqueda top-{args.top_k}: media {statistics.mean(latencies):.3f} ms, "
+          f"p50 {percentile(latencies, 0.5):.3f} ms, p95 {percentile(latencies, 0.95):.3f} ms")
+
+    count_tokens, tokenizer = token_counter()
+    with open(DOMAIN_DOC, "r", encoding="utf-8") as f:
+        document_tokens = count_tokens(f.read())
+    context_tokens = []
+    hits = 0
+    for query, expected_tag in QUERIES:
+        results = index.search(query, args.top_k)
+        context_tokens.append(count_tokens(format_passages(results)))
+        found = any(passage.tag == expected_tag for passage in results)
+        hits += found
+        print(f"  {'OK ' if found else 'NO '} {query:<52} {', '.join(passage.tag for passage in results)}")
+    mean_tokens = statistics.mean(context_tokens)
+    print(f"hit@{args.top_k}: {hits}/{len(QUERIES)}")
+    print(f"Tokens de contexto por turno ({tokenizer}): file_search ~{document_tokens} (documento completo), "
+          f"local {mean_tokens:.0f} en promedio ({1 - mean_tokens / document_tokens:.0%} menos)")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark de la validación en paralelo: latencia por turno del grafo secuencial
+(validate_message → validate_reason) contra el grafo con validate_reason especulativo.
+
+Los LLM se reemplazan por modelos falsos con latencias fijas (--message-ms,
+--reason-ms, --profesor-ms), y las reglas y el pre-filtro local se desactivan
+para medir el camino con llamadas al modelo. Cada turno medido es el primero
+después del saludo de una sesión nueva; también se comprueba que ambos grafos
+terminen en el mismo estado, con el mensaje en tópico y fuera de tópico.
+
+Uso:
+    python benchmarks/parallel_validation_bench.py [--turns 10] [--message-ms 350] [--reason-ms 300]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("ARCHIVE_ENABLED", "false")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.checkpoint.memory import InMemorySaver
+
+from graph_interface import GraphInterface
+from log_manager import get_log_manager
+from agents import ValidateMessageAgent, ValidateReasonAgent, ProfesorOpenAIAgent
+
+# Campos que tienen que coincidir entre ambos grafos
+COMPARED_FIELDS = ("status", "reason", "onTopic", "last_agent", "speculative_reason")
+
+
+def install_models(args, on_topic: bool):
+    """Reemplazar los modelos de los agentes por modelos falsos con latencia fija"""
+    validate_message = ValidateMessageAgent()
+    validate_message.model = FakeListChatModel(
+        responses=['{"onTopic": %s}' % ("true" if on_topic else "false")], sleep=args.message_ms / 1000
+    )
+    validate_message.prefilter = None
+    validate_reason = ValidateReasonAgent()
+    validate_reason.model = FakeListChatModel(responses=['{"has_response": 0, "reason": null}'], sleep=args.reason_ms / 1000)
+    validate_reason.rules_enabled = False
+    ProfesorOpenAIAgent().model = FakeListChatModel(responses=["Respuesta del profesor."], sleep=args.profesor_ms / 1000)
+
+
+async def run_variant(graph, name: str, turns: int) -> tuple:
+    """Latencia promedio del primer turno después del saludo y estado final"""
+    elapsed = 0.0
+    for turn in range(turns):
+        config = {"configurable": {"thread_id": f"{name}-{turn}"}}
+        await graph.ainvoke(GraphInterface()._build_turn_input("hola", None, "objetivo_renta"), config=config)
+        start_time = time.perf_counter()
+        state = await graph.ainvoke(
+            GraphInterface()._build_turn_input("¿y eso cómo sería?", None, "objetivo_renta"), config=config
+        )
+        elapsed += time.perf_counter() - start_time
+    return elapsed / turns, {field: state.get(field) for field in COMPARED_FIELDS}
+
+
+async def main_async(args):
+    get_log_manager().disable()
+    interface = GraphInterface()
+    sequential = interface._build_workflow(parallel_validation=False).compile(checkpointer=InMemorySaver())
+    parallel = interface._build_workflow(parallel_validation=True).compile(checkpointer=InMemorySaver())
+
+    print(f"Validación en paralelo: {args.turns} turnos, validate_message {args.message_ms} ms, "
+          f"validate_reason {args.reason_ms} ms, profesor {args.profesor_ms} ms")
+    for on_topic in (True, False):
+        install_models(args, on_topic)
+        sequential_latency, sequential_state = await run_variant(sequential, f"seq-{on_topic}", args.turns)
+        parallel_latency, parallel_state = await run_variant(parallel, f"par-{on_topic}", args.turns)
+        label = "en tópico" if on_topic else "fuera de tópico"
+        print(f"  {label:<16} secuencial {sequential_latency * 1000:>6.0f} ms  paralelo {parallel_latency * 1000:>6.0f} ms  "
+              f"({1 - parallel_latency / sequential_latency:.0%} menos)")
+        print(f"  {'':<16} mismo estado final: {'OK' if sequential_state == parallel_state else f'DIFIERE {sequential_state} != {parallel_state}'}")
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark de la validación en paralelo")
+    parser.add_argument("--turns", type=int, default=10, help="Turnos medidos por variante")
+    parser.add_argument("--message-ms", type=float, default=350, help="Latencia de validate_message (OpenAI)")
+    parser.add_argument("--reason-ms", type=float, default=300, help="Latencia de validate_reason (Groq)")
+    parser.add_argument("--profesor-ms", type=float, default=800, help="Latencia del profesor")
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, AsyncIterator, List, Optional
 from custom_types import QuestionType
 from graph_interface import GraphInterface
 from config import Config
+from admission_control import AdmissionController
+from idempotency import IdempotencyStore
+from checkpoint_retention import CheckpointRetention
 from agents.agent_utils import extract_text_from_content
+from agents.response_cache import get_response_cache
+from agents import ProfesorOpenAIAgent
+from agents.model_clients import get_model_clients
+from agents.agent_utils import get_context_stats
 
 class ChatService:
     """Servicio para manejar la lógica de negocio del chat"""
@@ -10,6 +18,20 @@ class ChatService:
     def __init__(self):
         """Inicializar el servicio con la interfaz del grafo"""
         self.graph_interface = GraphInterface()
+        # Límite de turnos en curso y de turnos en espera (ruta async)
+        self.admission = AdmissionController(
+            max_in_flight=Config.ADMISSION_MAX_IN_FLIGHT,
+            max_queue=Config.ADMISSION_MAX_QUEUE,
+            queue_timeout=Config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            retry_after=Config.ADMISSION_RETRY_AFTER_SECONDS
+        )
+        # Respuestas por Idempotency-Key para que los reintentos no repitan el turno
+        self.idempotency = IdempotencyStore(
+            ttl_seconds=Config.IDEMPOTENCY_TTL_SECONDS,
+            max_entries=Config.IDEMPOTENCY_MAX_ENTRIES
+        )
+        # Poda de checkpoints viejos y VACUUM incremental (tarea de fondo, ver start_maintenance)
+        self.retention = CheckpointRetention.from_config()
     
     def process_chat_message(self, message: str, session_id: str, question: str | QuestionType) -> Dict[str, Any]:
         """Procesar un mensaje de chat y retornar la respuesta
@@ -21,52 +43,184 @@ class ChatService:
             tipo_objetivo: Si la pregunta es de objetivo, especifica el tipo elegido previamente
         """
         try:
-            # Normalizar question: si es enum, usar su valor string
-            if isinstance(question, QuestionType):
-                question_value = question.value
-            else:
-                question_value = question
-            # Se espera que question ya sea una de las variantes de QuestionType (incluyendo OBJETIVO_*)
+            question_value = self._normalize_question(question)
             # Procesar el mensaje a través del grafo
             result = self.graph_interface.process_message(message, session_id, user=None, question=question_value)
+            return self._build_response(result, session_id)
             
-            # Obtener la respuesta
-            if result["messages"]:
-                last_message = result["messages"][-1]
-                response_text = extract_text_from_content(getattr(last_message, "content", last_message))
-                
-                # Obtener el tipo de agente directamente del estado (más eficiente)
-                agent_type = result.get("last_agent", "unknown")
+        except Exception as e:
+            return self._build_error_response(e, session_id)
+    
+    async def aprocess_chat_message(self, message: str, session_id: str, question: str | QuestionType, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Versión async de process_chat_message(): no bloquea el event loop
+        
+        Lanza AdmissionRejected si el servicio está sobrecargado e IdempotencyConflict
+        si la clave ya se usó con otro mensaje.
+        
+        Args:
+            message: El mensaje del usuario
+            session_id: ID de la sesión
+            question: Tipo de pregunta actual
+            idempotency_key: Clave del cliente; los reintentos con la misma clave reciben la respuesta original
+        """
+        if idempotency_key:
+            fingerprint = IdempotencyStore.fingerprint(message, self._normalize_question(question))
+            return await self.idempotency.run(
+                session_id,
+                idempotency_key,
+                fingerprint,
+                lambda: self._aprocess_admitted(message, session_id, question)
+            )
+        return await self._aprocess_admitted(message, session_id, question)
+    
+    async def _aprocess_admitted(self, message: str, session_id: str, question: str | QuestionType) -> Dict[str, Any]:
+        """Ejecutar el turno dentro del control de admisión"""
+        async with self.admission.admit():
+            try:
+                question_value = self._normalize_question(question)
+                # Procesar el mensaje a través del grafo (async)
+                result = await self.graph_interface.aprocess_message(message, session_id, user=None, question=question_value)
+                return self._build_response(result, session_id)
                 
-                return {
-                    "response": response_text,
-                    "agent_type": agent_type,
-                    "session_id": session_id,
-                    "success": True
-                }
+            except Exception as e:
+                return self._build_error_response(e, session_id)
+    
+    async def process_batch(self, items: List[Dict[str, Any]], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Procesar un lote de mensajes con concurrencia acotada
+        
+        Los ítems de una misma sesión se procesan en el orden del lote; sesiones
+        distintas corren en paralelo hasta max_concurrency turnos a la vez. Cada
+        ítem devuelve su propio resultado (con "index"), así un fallo no invalida el lote.
+        
+        Args:
+            items: Lista de dicts con message, session_id y question
+            max_concurrency: Límite de turnos simultáneos (acotado por Config.BATCH_MAX_CONCURRENCY)
+        """
+        limit = Config.BATCH_MAX_CONCURRENCY
+        if max_concurrency:
+            limit = min(max_concurrency, limit)
+        semaphore = asyncio.Semaphore(max(1, limit))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        
+        # Agrupar índices por sesión preservando el orden del lote
+        indexes_by_session: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            indexes_by_session.setdefault(item["session_id"], []).append(index)
+        
+        async def run_session(indexes: List[int]):
+            for index in indexes:
+                item = items[index]
+                async with semaphore:
+                    try:
+                        result = await self.aprocess_chat_message(
+                            message=item["message"],
+                            session_id=item["session_id"],
+                            question=item["question"]
+                        )
+                    except Exception as e:
+                        result = self._build_error_response(e, item["session_id"])
+                results[index] = {"index": index, **result}
+        
+        await asyncio.gather(*(run_session(indexes) for indexes in indexes_by_session.values()))
+        return results
+    
+    async def astream_chat_message(self, message: str, session_id: str, question: str | QuestionType) -> AsyncIterator[Dict[str, Any]]:
+        """Procesar un mensaje emitiendo eventos de streaming
+        
+        Emite {"type": "token", ...} por cada fragmento de respuesta y termina con
+        {"type": "final", ...} (mismos campos que process_chat_message) o {"type": "error", ...}.
+        Lanza AdmissionRejected (antes del primer evento) si el servicio está sobrecargado.
+        
+        Args:
+            message: El mensaje del usuario
+            session_id: ID de la sesión
+            question: Tipo de pregunta actual
+        """
+        async with self.admission.admit():
+            try:
+                question_value = self._normalize_question(question)
+                async for event in self.graph_interface.astream_message(message, session_id, user=None, question=question_value):
+                    if event["type"] == "final":
+                        yield {"type": "final", **self._build_response(event["state"], session_id)}
+                    else:
+                        yield event
             
-            return {
-                "response": "No se pudo generar respuesta",
-                "agent_type": "unknown",
-                "session_id": session_id,
-                "success": False
-            }
+            except Exception as e:
+                yield {"type": "error", **self._build_error_response(e, session_id)}
+    
+    def start_maintenance(self):
+        """Iniciar las tareas de fondo (requiere un event loop en marcha)"""
+        self.graph_interface.start_maintenance()
+        if Config.RETENTION_ENABLED:
+            self.retention.start()
+    
+    async def aclose(self):
+        """Detener las tareas de fondo y liberar los recursos async del grafo"""
+        await self.retention.stop()
+        await self.graph_interface.aclose()
+        await get_model_clients().aclose()
+    
+    def _normalize_question(self, question: str | QuestionType) -> str:
+        """Normalizar question: si es enum, usar su valor string"""
+        if isinstance(question, QuestionType):
+            return question.value
+        # Se espera que question ya sea una de las variantes de QuestionType (incluyendo OBJETIVO_*)
+        return question
+    
+    def _build_response(self, result: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Armar la respuesta del servicio a partir del estado final del grafo"""
+        # Obtener la respuesta
+        if result["messages"]:
+            last_message = result["messages"][-1]
+            response_text = extract_text_from_content(getattr(last_message, "content", last_message))
+            
+            # Obtener el tipo de agente directamente del estado (más eficiente)
+            agent_type = result.get("last_agent", "unknown")
             
-        except Exception as e:
             return {
-                "response": f"Error: {str(e)}",
-                "agent_type": "error",
+                "response": response_text,
+                "agent_type": agent_type,
                 "session_id": session_id,
-                "success": False
+                "success": True
             }
+        
+        return {
+            "response": "No se pudo generar respuesta",
+            "agent_type": "unknown",
+            "session_id": session_id,
+            "success": False
+        }
+    
+    def _build_error_response(self, error: Exception, session_id: str) -> Dict[str, Any]:
+        """Armar la respuesta del servicio ante un error"""
+        return {
+            "response": f"Error: {str(error)}",
+            "agent_type": "error",
+            "session_id": session_id,
+            "success": False
+        }
     
     def get_health_status(self) -> Dict[str, Any]:
         """Obtener el estado de salud del servicio"""
+        model_clients = get_model_clients().get_stats()
+        # Con algún circuito abierto o en prueba el servicio responde, pero con el proveedor de respaldo
+        degraded = any(breaker["state"] != "closed" for breaker in model_clients["breakers"].values())
         return {
-            "status": "healthy",
+            "status": "degraded" if degraded else "healthy",
             "config": {
                 "model": Config.GROQ_MODEL,
                 "temperature": Config.GROQ_TEMPERATURE,
                 "db_path": Config.DB_PATH
-            }
+            },
+            "session_locks": self.graph_interface.session_locks.get_stats(),
+            "checkpointer": self.graph_interface.get_checkpoint_stats(),
+            "state_cache": self.graph_interface.state_cache.get_stats() if self.graph_interface.state_cache else None,
+            "admission": self.admission.get_stats(),
+            "idempotency": self.idempotency.get_stats(),
+            "retention": self.retention.get_stats(),
+            "archive": self.graph_interface.archive.get_stats() if self.graph_interface.archive else None,
+            "classifier_cache": get_response_cache().get_stats() if get_response_cache() else None,
+            "faq_cache": ProfesorOpenAIAgent().faq_cache.get_stats() if ProfesorOpenAIAgent().faq_cache else None,
+            "context_tokens": get_context_stats().get_stats(),
+            "model_clients": model_clients
         }
@@ -0,0 +1,302 @@
+"""
+Archivo en frío de conversaciones terminadas o inactivas.
+
+Una sesión con status "end_conversation" solo vuelve a pasar por
+conversation_closed_node, pero todo su historial seguía en la base caliente.
+Este módulo mueve esos threads (y los inactivos por más de N días) fuera de
+agent_memory.db:
+
+- Segmentos append-only (segment-000001.bin, ...) con un registro por thread:
+  4 bytes de largo + msgpack comprimido con zlib de sus filas de checkpoints y writes.
+- Un índice chico (index.db) con thread_id -> segmento, offset y largo.
+- Restauración transparente: GraphInterface consulta el índice antes de cada
+  turno y, si el thread está archivado, devuelve sus filas a la base caliente.
+
+Al restaurar, el registro queda en el segmento (append-only) y solo se borra
+la entrada del índice; si el thread se vuelve a archivar, se agrega un registro nuevo.
+
+Uso como CLI:
+
+    python checkpoint_archive.py archive [--idle-days 7]
+    python checkpoint_archive.py restore <thread_id>
+    python checkpoint_archive.py stats
+"""
+
+import os
+import time
+import zlib
+import struct
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List
+
+import ormsgpack
+
+from config import Config
+from checkpoint_store import create_sqlite_connection
+from checkpoint_serde import create_checkpoint_serializer
+
+# Largo del registro (big endian) antes del payload comprimido
+_RECORD_HEADER = struct.Struct(">I")
+
+_CHECKPOINT_COLUMNS = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata"
+_WRITES_COLUMNS = "thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, channel, type, value"
+
+# Último checkpoint del namespace raíz de cada thread
+_LATEST_CHECKPOINTS_SQL = """
+SELECT thread_id, type, checkpoint FROM checkpoints
+WHERE checkpoint_ns = '' AND (thread_id, checkpoint_id) IN (
+    SELECT thread_id, MAX(checkpoint_id) FROM checkpoints WHERE checkpoint_ns = '' GROUP BY thread_id
+)
+"""
+
+
+class CheckpointArchive:
+    """Segmentos de archivo + índice, con archivado y restauración por thread"""
+
+    def __init__(self, db_path: str, archive_dir: str, segment_max_bytes: int):
+        """
+        Args:
+            db_path: Base caliente de checkpoints
+            archive_dir: Carpeta de segmentos e índice
+            segment_max_bytes: Tamaño a partir del cual se abre un segmento nuevo
+        """
+        self.db_path = db_path
+        self.archive_dir = archive_dir
+        self.segment_max_bytes = segment_max_bytes
+        self.serde = create_checkpoint_serializer()
+        os.makedirs(archive_dir, exist_ok=True)
+        self._index = sqlite3.connect(os.path.join(archive_dir, "index.db"), check_same_thread=False)
+        self._index.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS archived_threads (
+                thread_id TEXT PRIMARY KEY,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                checkpoints INTEGER NOT NULL,
+                writes INTEGER NOT NULL,
+                reason TEXT,
+                archived_at TEXT NOT NULL
+            );
+            """
+        )
+        # Serializa escrituras a segmentos e índice entre hilos
+        self._lock = threading.Lock()
+        # Métricas
+        self.archived = 0
+        self.restored = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_config(cls) -> "CheckpointArchive":
+        """Crear el archivo con los valores de Config"""
+        return cls(
+            db_path=Config.DB_PATH,
+            archive_dir=Config.ARCHIVE_DIR,
+            segment_max_bytes=Config.ARCHIVE_SEGMENT_MAX_MB * 1024 * 1024
+        )
+
+    def is_archived(self, thread_id: str) -> bool:
+        """Consulta al índice (también ve lo archivado por la CLI desde otro proceso)"""
+        with self._lock:
+            row = self._index.execute(
+                "SELECT 1 FROM archived_threads WHERE thread_id = ?", (str(thread_id),)
+            ).fetchone()
+        return row is not None
+
+    def find_candidates(self, idle_days: float, closed_grace_minutes: float) -> Dict[str, str]:
+        """Threads a archivar: cerrados (pasado un margen) o inactivos por más de idle_days
+
+        Returns:
+            Dict thread_id -> motivo ("closed" o "idle")
+        """
+        now = datetime.now(timezone.utc)
+        candidates: Dict[str, str] = {}
+        conn = create_sqlite_connection(self.db_path)
+        try:
+            if not self._has_checkpoint_tables(conn):
+                return candidates
+            for thread_id, type_, blob in conn.execute(_LATEST_CHECKPOINTS_SQL):
+                checkpoint = self.serde.loads_typed((type_, blob))
+                age_seconds = (now - datetime.fromisoformat(checkpoint["ts"])).total_seconds()
+                status = checkpoint.get("channel_values", {}).get("status")
+                if status == "end_conversation" and age_seconds >= closed_grace_minutes * 60:
+                    candidates[thread_id] = "closed"
+                elif age_seconds >= idle_days * 86400:
+                    candidates[thread_id] = "idle"
+        finally:
+            conn.close()
+        return candidates
+
+    def archive_thread(self, thread_id: str, reason: str = "") -> Dict[str, Any]:
+        """Mover un thread de la base caliente a un segmento
+
+        Orden seguro ante cortes: primero se escribe el segmento (fsync), después
+        el índice y recién al final se borra de la base caliente. Si algo falla en
+        el medio, el thread sigue en la base y la restauración es idempotente.
+        """
+        conn = create_sqlite_connection(self.db_path)
+        try:
+            checkpoints = conn.execute(
+                f"SELECT {_CHECKPOINT_COLUMNS} FROM checkpoints WHERE thread_id = ?", (thread_id,)
+            ).fetchall()
+            if not checkpoints:
+                return {"thread_id": thread_id, "checkpoints": 0, "writes": 0, "bytes": 0}
+            writes = conn.execute(
+                f"SELECT {_WRITES_COLUMNS} FROM writes WHERE thread_id = ?", (thread_id,)
+            ).fetchall()
+
+            payload = zlib.compress(ormsgpack.packb({
+                "thread_id": thread_id,
+                "checkpoints": [list(row) for row in checkpoints],
+                "writes": [list(row) for row in writes],
+            }))
+            with self._lock:
+                segment, offset = self._append_record(payload)
+                with self._index:
+                    self._index.execute(
+                        "INSERT OR REPLACE INTO archived_threads VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (thread_id, segment, offset, len(payload), len(checkpoints), len(writes),
+                         reason, datetime.now(timezone.utc).isoformat())
+                    )
+
+            with conn:
+                conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+        finally:
+            conn.close()
+
+        self.archived += 1
+        return {"thread_id": thread_id, "checkpoints": len(checkpoints), "writes": len(writes), "bytes": len(payload)}
+
+    def restore_thread(self, thread_id: str) -> bool:
+        """Devolver un thread archivado a la base caliente (False si no estaba archivado)"""
+        with self._lock:
+            row = self._index.execute(
+                "SELECT segment, offset, length FROM archived_threads WHERE thread_id = ?", (str(thread_id),)
+            ).fetchone()
+        if row is None:
+            return False
+
+        segment, offset, length = row
+        record = self._read_record(segment, offset, length)
+        conn = create_sqlite_connection(self.db_path)
+        try:
+            with conn:
+                # OR IGNORE: idempotente si el archivado se cortó antes de borrar
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO checkpoints ({_CHECKPOINT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    record["checkpoints"]
+                )
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO writes ({_WRITES_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    record["writes"]
+                )
+        finally:
+            conn.close()
+
+        with self._lock:
+            with self._index:
+                self._index.execute("DELETE FROM archived_threads WHERE thread_id = ?", (str(thread_id),))
+        self.restored += 1
+        print(f"[CheckpointArchive] Thread {thread_id} restaurado ({len(record['checkpoints'])} checkpoints)")
+        return True
+
+    def record_run(self, results: List[Dict[str, Any]], duration_seconds: float) -> Dict[str, Any]:
+        """Registrar el resultado de una corrida de archivado"""
+        self.last_run = {
+            "archived_threads": len(results),
+            "checkpoints": sum(result["checkpoints"] for result in results),
+            "archived_bytes": sum(result["bytes"] for result in results),
+            "duration_seconds": round(duration_seconds, 3),
+        }
+        print(f"[CheckpointArchive] {self.last_run['archived_threads']} threads archivados "
+              f"({self.last_run['checkpoints']} checkpoints) en {self.last_run['duration_seconds']}s")
+        return self.last_run
+
+    def _append_record(self, payload: bytes):
+        """Agregar un registro al segmento actual (o a uno nuevo si está lleno)"""
+        segment = self._current_segment()
+        path = os.path.join(self.archive_dir, segment)
+        with open(path, "ab") as f:
+            offset = f.tell()
+            f.write(_RECORD_HEADER.pack(len(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        return segment, offset
+
+    def _read_record(self, segment: str, offset: int, length: int) -> Dict[str, Any]:
+        with open(os.path.join(self.archive_dir, segment), "rb") as f:
+            f.seek(offset)
+            (stored_length,) = _RECORD_HEADER.unpack(f.read(_RECORD_HEADER.size))
+            if stored_length != length:
+                raise ValueError(f"Registro corrupto en {segment}@{offset}")
+            return ormsgpack.unpackb(zlib.decompress(f.read(length)))
+
+    def _segments(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.archive_dir) if name.startswith("segment-") and name.endswith(".bin"))
+
+    def _current_segment(self) -> str:
+        segments = self._segments()
+        if segments:
+            last = segments[-1]
+            if os.path.getsize(os.path.join(self.archive_dir, last)) < self.segment_max_bytes:
+                return last
+            number = int(last[len("segment-"):-len(".bin")]) + 1
+        else:
+            number = 1
+        return f"segment-{number:06d}.bin"
+
+    def _has_checkpoint_tables(self, conn: sqlite3.Connection) -> bool:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('checkpoints', 'writes')"
+        ).fetchall()
+        return len(rows) == 2
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del archivo"""
+        with self._lock:
+            archived_threads = self._index.execute("SELECT COUNT(*) FROM archived_threads").fetchone()[0]
+        segments = self._segments()
+        return {
+            "archived_threads": archived_threads,
+            "segments": len(segments),
+            "segment_bytes": sum(os.path.getsize(os.path.join(self.archive_dir, name)) for name in segments),
+            "archived": self.archived,
+            "restored": self.restored,
+            "last_run": self.last_run,
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Archivo en frío de conversaciones")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    archive_parser = subparsers.add_parser("archive", help="Archivar threads cerrados o inactivos")
+    archive_parser.add_argument("--idle-days", type=float, default=Config.ARCHIVE_IDLE_DAYS)
+    archive_parser.add_argument("--closed-grace-minutes", type=float, default=Config.ARCHIVE_CLOSED_GRACE_MINUTES)
+    restore_parser = subparsers.add_parser("restore", help="Restaurar un thread a la base caliente")
+    restore_parser.add_argument("thread_id")
+    subparsers.add_parser("stats", help="Mostrar métricas del archivo")
+    args = parser.parse_args(argv)
+
+    archive = CheckpointArchive.from_config()
+    if args.command == "archive":
+        start_time = time.perf_counter()
+        candidates = archive.find_candidates(args.idle_days, args.closed_grace_minutes)
+        results = [archive.archive_thread(thread_id, reason) for thread_id, reason in candidates.items()]
+        archive.record_run(results, time.perf_counter() - start_time)
+    elif args.command == "restore":
+        if not archive.restore_thread(args.thread_id):
+            print(f"El thread {args.thread_id} no está archivado")
+    else:
+        for key, value in archive.get_stats().items():
+            print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
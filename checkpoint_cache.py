@@ -0,0 +1,468 @@
+"""
+Caché en memoria del estado de las sesiones activas, delante del checkpointer.
+
+La mayoría de las sesiones son ráfagas de 5-15 turnos en pocos minutos, y cada
+turno iba a SQLite para leer el último checkpoint y para escribir uno por superstep.
+SessionStateCache guarda el último checkpoint (y sus escrituras pendientes) de
+cada (thread_id, checkpoint_ns) en un LRU acotado por tamaño y TTL, y
+CachedCheckpointSaver lo interpone delante del checkpointer real:
+
+- write_through: cada escritura va al checkpointer y además al caché.
+- write_behind: las escrituras quedan en el caché y se bajan a disco
+  periódicamente (flush), en el shutdown y antes de cualquier lectura de historial.
+  Solo se persiste el último checkpoint de cada sesión; los intermedios de un
+  mismo turno no llegan a disco.
+
+El caché lo comparten el grafo sync y el async, y toda modificación se hace
+bajo un lock, así turnos concurrentes de una sesión no se pisan: siempre queda
+el checkpoint con el id más nuevo, igual que en SQLite (ORDER BY checkpoint_id DESC).
+
+Restricción: el caché vive en un solo proceso y no se entera de lo que otros
+escriben en la base. Con varios workers de uvicorn (o la CLI / un script
+escribiendo el mismo DB_PATH mientras corre el servidor) serviría checkpoints
+viejos. Por eso viene deshabilitado (STATE_CACHE_ENABLED=false) y solo se crea
+con un único worker (WEB_CONCURRENCY sin definir o 1); con varios se ignora.
+"""
+
+import copy
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, List, Iterator, AsyncIterator, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    WRITES_IDX_MAP,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from config import Config
+
+WRITE_THROUGH = "write_through"
+WRITE_BEHIND = "write_behind"
+
+# (thread_id, checkpoint_ns)
+SessionKey = Tuple[str, str]
+
+
+class _CachedSession:
+    """Último checkpoint conocido de una sesión y sus escrituras pendientes"""
+
+    __slots__ = ("config", "checkpoint", "metadata", "parent_config", "new_versions", "writes", "dirty", "version", "last_access")
+
+    def __init__(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                 parent_config: Optional[RunnableConfig], new_versions: ChannelVersions):
+        self.config = config
+        self.checkpoint = checkpoint
+        self.metadata = metadata
+        self.parent_config = parent_config
+        self.new_versions = new_versions
+        # (task_id, idx) -> (task_path, channel, value)
+        self.writes: Dict[Tuple[str, int], Tuple[str, str, Any]] = {}
+        self.dirty = False
+        # Cambia con cada modificación: el flush solo marca limpio lo que persistió
+        self.version = 0
+        self.last_access = time.monotonic()
+
+    @property
+    def checkpoint_id(self) -> str:
+        return self.config["configurable"]["checkpoint_id"]
+
+    def to_tuple(self) -> CheckpointTuple:
+        """Copia independiente como la devolvería el checkpointer"""
+        ordered = sorted(self.writes.items(), key=lambda item: writes_sort_key(item[1][0], item[0][0], item[0][1]))
+        return CheckpointTuple(
+            config=copy.deepcopy(self.config),
+            checkpoint=copy.deepcopy(self.checkpoint),
+            metadata=copy.deepcopy(self.metadata),
+            parent_config=copy.deepcopy(self.parent_config),
+            pending_writes=[(task_id, channel, copy.deepcopy(value)) for (task_id, _), (_, channel, value) in ordered]
+        )
+
+
+class _FlushItem:
+    """Copia de una sesión sucia para persistirla fuera del lock"""
+
+    __slots__ = ("key", "version", "put_config", "checkpoint", "metadata", "new_versions", "writes_by_task")
+
+    def __init__(self, key: SessionKey, entry: _CachedSession):
+        self.key = key
+        self.version = entry.version
+        thread_id, checkpoint_ns = key
+        # put() toma el checkpoint padre del config recibido
+        self.put_config = copy.deepcopy(entry.parent_config) or {
+            "configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        }
+        self.checkpoint = copy.deepcopy(entry.checkpoint)
+        self.metadata = copy.deepcopy(entry.metadata)
+        self.new_versions = dict(entry.new_versions)
+        self.writes_by_task: Dict[Tuple[str, str], List[Tuple[str, Any]]] = {}
+        for (task_id, idx), (task_path, channel, value) in sorted(entry.writes.items(), key=lambda item: item[0][1]):
+            self.writes_by_task.setdefault((task_id, task_path), []).append((channel, copy.deepcopy(value)))
+
+
+class SessionStateCache:
+    """LRU con TTL del último checkpoint por sesión (compartido por los checkpointers sync y async)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, write_policy: str = WRITE_THROUGH):
+        """
+        Args:
+            max_entries: Sesiones en caché (las sucias no se desalojan hasta el flush)
+            ttl_seconds: Segundos sin uso tras los que una sesión limpia se descarta
+            write_policy: "write_through" o "write_behind"
+        """
+        if write_policy not in (WRITE_THROUGH, WRITE_BEHIND):
+            raise ValueError(f"Política de escritura no soportada: {write_policy}")
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.write_policy = write_policy
+        self._entries: "OrderedDict[SessionKey, _CachedSession]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.flushes = 0
+        self.flushed_checkpoints = 0
+
+    @property
+    def write_behind(self) -> bool:
+        return self.write_policy == WRITE_BEHIND
+
+    def lookup(self, key: SessionKey, checkpoint_id: Optional[str]) -> Optional[CheckpointTuple]:
+        """Último checkpoint de la sesión (o el pedido, si es ese mismo)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.dirty and self._expired(entry):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None or (checkpoint_id and checkpoint_id != entry.checkpoint_id):
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(key)
+            return entry.to_tuple()
+
+    def store_loaded(self, key: SessionKey, checkpoint_tuple: CheckpointTuple):
+        """Guardar un checkpoint leído del disco (si no hay uno más nuevo en caché)"""
+        with self._lock:
+            current = self._entries.get(key)
+            checkpoint_id = checkpoint_tuple.config["configurable"]["checkpoint_id"]
+            if current is not None and current.checkpoint_id >= checkpoint_id:
+                return
+            entry = _CachedSession(
+                config=copy.deepcopy(checkpoint_tuple.config),
+                checkpoint=copy.deepcopy(checkpoint_tuple.checkpoint),
+                metadata=copy.deepcopy(checkpoint_tuple.metadata),
+                parent_config=copy.deepcopy(checkpoint_tuple.parent_config),
+                new_versions={}
+            )
+            for idx, (task_id, channel, value) in enumerate(checkpoint_tuple.pending_writes or []):
+                entry.writes[(task_id, WRITES_IDX_MAP.get(channel, idx))] = ("", channel, copy.deepcopy(value))
+            self._insert(key, entry)
+
+    def store_put(self, key: SessionKey, config: RunnableConfig, checkpoint: Checkpoint,
+                  metadata: CheckpointMetadata, new_versions: ChannelVersions, dirty: bool) -> bool:
+        """Registrar un checkpoint nuevo; False si el caché ya tiene uno más nuevo"""
+        thread_id, checkpoint_ns = key
+        parent_id = config["configurable"].get("checkpoint_id")
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current.checkpoint_id > checkpoint["id"]:
+                return False
+            entry = _CachedSession(
+                config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}},
+                checkpoint=copy.deepcopy(checkpoint),
+                metadata=copy.deepcopy(get_checkpoint_metadata(config, metadata)),
+                parent_config=(
+                    {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                    if parent_id else None
+                ),
+                new_versions=dict(new_versions)
+            )
+            if current is not None and current.checkpoint_id == checkpoint["id"]:
+                # Mismo checkpoint reescrito: conservar sus escrituras pendientes
+                entry.writes = current.writes
+                entry.version = current.version + 1
+                dirty = dirty or current.dirty
+            entry.dirty = dirty
+            self._insert(key, entry)
+            return True
+
+    def store_writes(self, key: SessionKey, checkpoint_id: str, writes: Sequence[Tuple[str, Any]],
+                     task_id: str, task_path: str, dirty: bool) -> bool:
+        """Agregar escrituras pendientes al checkpoint en caché; False si no es ese checkpoint"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.checkpoint_id != checkpoint_id:
+                return False
+            # Misma semántica que SqliteSaver: los canales especiales reemplazan, el resto no pisa
+            replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            for idx, (channel, value) in enumerate(writes):
+                write_key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                if replace or write_key not in entry.writes:
+                    entry.writes[write_key] = (task_path, channel, copy.deepcopy(value))
+            entry.version += 1
+            entry.dirty = entry.dirty or dirty
+            return True
+
+    def drop_thread(self, thread_id: str):
+        """Olvidar todas las sesiones de un thread (sin persistir)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == thread_id]:
+                del self._entries[key]
+
+    def dirty_items(self, thread_id: Optional[str] = None) -> List[_FlushItem]:
+        """Copias de las sesiones sucias (de un thread o de todas)"""
+        with self._lock:
+            return [
+                _FlushItem(key, entry)
+                for key, entry in self._entries.items()
+                if entry.dirty and (thread_id is None or key[0] == thread_id)
+            ]
+
+    def mark_clean(self, item: _FlushItem):
+        """Marcar persistida una sesión si no cambió durante el flush"""
+        with self._lock:
+            entry = self._entries.get(item.key)
+            if entry is not None and entry.version == item.version and entry.checkpoint["id"] == item.checkpoint["id"]:
+                entry.dirty = False
+            self.flushed_checkpoints += 1
+
+    def flush(self, saver: BaseCheckpointSaver, thread_id: Optional[str] = None) -> int:
+        """Persistir las sesiones sucias con un checkpointer sync"""
+        items = self.dirty_items(thread_id)
+        for item in items:
+            saver.put(item.put_config, item.checkpoint, item.metadata, item.new_versions)
+            self._put_item_writes(saver, item)
+            self.mark_clean(item)
+        self._after_flush(items)
+        return len(items)
+
+    async def aflush(self, saver: BaseCheckpointSaver, thread_id: Optional[str] = None) -> int:
+        """Persistir las sesiones sucias con un checkpointer async"""
+        items = self.dirty_items(thread_id)
+        for item in items:
+            await saver.aput(item.put_config, item.checkpoint, item.metadata, item.new_versions)
+            for (task_id, task_path), writes in item.writes_by_task.items():
+                await saver.aput_writes(self._item_config(item), writes, task_id, task_path)
+            self.mark_clean(item)
+        self._after_flush(items)
+        return len(items)
+
+    def _put_item_writes(self, saver: BaseCheckpointSaver, item: _FlushItem):
+        for (task_id, task_path), writes in item.writes_by_task.items():
+            saver.put_writes(self._item_config(item), writes, task_id, task_path)
+
+    def _item_config(self, item: _FlushItem) -> RunnableConfig:
+        thread_id, checkpoint_ns = item.key
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": item.checkpoint["id"]}}
+
+    def _after_flush(self, items: List[_FlushItem]):
+        with self._lock:
+            if items:
+                self.flushes += 1
+            # Limpiar vencidas y desalojar lo que quedó pendiente por estar sucio
+            for key in [key for key, entry in self._entries.items() if not entry.dirty and self._expired(entry)]:
+                del self._entries[key]
+                self.expirations += 1
+            self._evict()
+
+    def _insert(self, key: SessionKey, entry: _CachedSession):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        """Desalojar las sesiones limpias menos usadas hasta volver al máximo"""
+        if len(self._entries) <= self.max_entries:
+            return
+        for key in [key for key, entry in self._entries.items() if not entry.dirty]:
+            if len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+            self.evictions += 1
+
+    def _expired(self, entry: _CachedSession) -> bool:
+        return time.monotonic() - entry.last_access > self.ttl_seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del caché"""
+        with self._lock:
+            dirty = sum(1 for entry in self._entries.values() if entry.dirty)
+            lookups = self.hits + self.misses
+            return {
+                "write_policy": self.write_policy,
+                "sessions": len(self._entries),
+                "dirty": dirty,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "flushes": self.flushes,
+                "flushed_checkpoints": self.flushed_checkpoints,
+            }
+
+
+class CachedCheckpointSaver(BaseCheckpointSaver):
+    """Checkpointer que atiende desde SessionStateCache y delega el resto en `inner`"""
+
+    def __init__(self, inner: BaseCheckpointSaver, cache: SessionStateCache):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.cache = cache
+
+    @staticmethod
+    def _key(config: RunnableConfig) -> SessionKey:
+        configurable = config["configurable"]
+        return str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+
+    # Lecturas
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        key = self._key(config)
+        cached = self.cache.lookup(key, get_checkpoint_id(config))
+        if cached is not None:
+            return cached
+        checkpoint_tuple = self.inner.get_tuple(config)
+        if checkpoint_tuple is not None and not get_checkpoint_id(config):
+            self.cache.store_loaded(key, checkpoint_tuple)
+        return checkpoint_tuple
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        key = self._key(config)
+        cached = self.cache.lookup(key, get_checkpoint_id(config))
+        if cached is not None:
+            return cached
+        checkpoint_tuple = await self.inner.aget_tuple(config)
+        if checkpoint_tuple is not None and not get_checkpoint_id(config):
+            self.cache.store_loaded(key, checkpoint_tuple)
+        return checkpoint_tuple
+
+    def list(self, config: Optional[RunnableConfig], *, filter=None, before=None, limit=None) -> Iterator[CheckpointTuple]:
+        # El historial se lee del disco: bajar antes lo pendiente
+        self.flush(config["configurable"]["thread_id"] if config else None)
+        return self.inner.list(config, filter=filter, before=before, limit=limit)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+        await self.aflush(config["configurable"]["thread_id"] if config else None)
+        async for checkpoint_tuple in self.inner.alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    def get_delta_channel_history(self, *, config: RunnableConfig, channels):
+        self.flush(config["configurable"]["thread_id"])
+        return self.inner.get_delta_channel_history(config=config, channels=channels)
+
+    async def aget_delta_channel_history(self, *, config: RunnableConfig, channels):
+        await self.aflush(config["configurable"]["thread_id"])
+        return await self.inner.aget_delta_channel_history(config=config, channels=channels)
+
+    # Escrituras
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        key = self._key(config)
+        if self.cache.write_behind and self.cache.store_put(key, config, checkpoint, metadata, new_versions, dirty=True):
+            return self._next_config(key, checkpoint)
+        next_config = self.inner.put(config, checkpoint, metadata, new_versions)
+        self.cache.store_put(key, config, checkpoint, metadata, new_versions, dirty=False)
+        return next_config
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        key = self._key(config)
+        if self.cache.write_behind and self.cache.store_put(key, config, checkpoint, metadata, new_versions, dirty=True):
+            return self._next_config(key, checkpoint)
+        next_config = await self.inner.aput(config, checkpoint, metadata, new_versions)
+        self.cache.store_put(key, config, checkpoint, metadata, new_versions, dirty=False)
+        return next_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        key = self._key(config)
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        if self.cache.write_behind and self.cache.store_writes(key, checkpoint_id, writes, task_id, task_path, dirty=True):
+            return
+        self.inner.put_writes(config, writes, task_id, task_path)
+        self.cache.store_writes(key, checkpoint_id, writes, task_id, task_path, dirty=False)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        key = self._key(config)
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        if self.cache.write_behind and self.cache.store_writes(key, checkpoint_id, writes, task_id, task_path, dirty=True):
+            return
+        await self.inner.aput_writes(config, writes, task_id, task_path)
+        self.cache.store_writes(key, checkpoint_id, writes, task_id, task_path, dirty=False)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.cache.drop_thread(str(thread_id))
+        self.inner.delete_thread(thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.cache.drop_thread(str(thread_id))
+        await self.inner.adelete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    def with_allowlist(self, extra_allowlist):
+        """La allowlist de msgpack se aplica al serializer del checkpointer real"""
+        inner = self.inner.with_allowlist(extra_allowlist)
+        if inner is self.inner:
+            return self
+        clone = copy.copy(self)
+        clone.inner = inner
+        clone.serde = inner.serde
+        return clone
+
+    # Persistencia del caché
+    def flush(self, thread_id: Optional[str] = None) -> int:
+        """Persistir lo pendiente (solo en write_behind) con el checkpointer sync"""
+        if not self.cache.write_behind:
+            return 0
+        return self.cache.flush(self.inner, thread_id)
+
+    async def aflush(self, thread_id: Optional[str] = None) -> int:
+        """Persistir lo pendiente (solo en write_behind) con el checkpointer async"""
+        if not self.cache.write_behind:
+            return 0
+        return await self.cache.aflush(self.inner, thread_id)
+
+    async def run_flush_loop(self, interval_seconds: float):
+        """Loop de fondo del write_behind: flush periódico fuera del event loop"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"[CheckpointCache] Error bajando el caché a disco: {e}")
+
+    def _next_config(self, key: SessionKey, checkpoint: Checkpoint) -> RunnableConfig:
+        thread_id, checkpoint_ns = key
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.cache.get_stats()
+
+
+def create_state_cache() -> Optional[SessionStateCache]:
+    """Crear el caché de sesiones según Config (None si está deshabilitado)"""
+    if not Config.STATE_CACHE_ENABLED:
+        return None
+    if Config.WEB_CONCURRENCY > 1:
+        print(f"[CheckpointCache] Deshabilitado: con {Config.WEB_CONCURRENCY} workers cada proceso tendría su propio caché desactualizado")
+        return None
+    return SessionStateCache(
+        max_entries=Config.STATE_CACHE_MAX_SESSIONS,
+        ttl_seconds=Config.STATE_CACHE_TTL_SECONDS,
+        write_policy=Config.STATE_CACHE_WRITE_POLICY
+    )
@@ -0,0 +1,255 @@
+"""
+Retención y compactación de checkpoints para la base SQLite del grafo.
+
+Cada superstep de cada turno guarda un checkpoint completo y nada se borraba,
+así que la base crecía sin límite. Este módulo:
+
+- Conserva solo los últimos N checkpoints de cada thread_id (y namespace) y
+  borra las escrituras pendientes de los checkpoints eliminados.
+- Ejecuta VACUUM incremental para devolver al sistema las páginas liberadas,
+  según un intervalo o cuando el archivo supera un tamaño umbral.
+- Informa bytes liberados y duración de cada corrida.
+
+Se usa como tarea de fondo dentro de la API (main.py) y como CLI:
+
+    python checkpoint_retention.py [--db agent_memory.db] [--keep-last 10] [--no-vacuum]
+    python checkpoint_retention.py --enable-auto-vacuum    # con la API detenida
+
+PRAGMA incremental_vacuum solo funciona con auto_vacuum=INCREMENTAL. Las bases
+nuevas ya se crean así (checkpoint_store.sqlite_pragmas); una base existente
+se convierte con un VACUUM completo que bloquea la escritura mientras dura, así
+que eso solo se hace desde la CLI con --enable-auto-vacuum. La tarea de fondo
+de la API nunca convierte: si la base no está en modo incremental, solo poda.
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import argparse
+from typing import Dict, Any, Optional, List
+
+from config import Config
+from checkpoint_store import create_sqlite_connection
+
+# Filas borradas por transacción, para no bloquear al escritor del grafo mucho tiempo
+DELETE_BATCH_SIZE = 2000
+
+_OLD_CHECKPOINTS_SQL = """
+SELECT rowid FROM (
+    SELECT rowid, ROW_NUMBER() OVER (
+        PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+    ) AS position
+    FROM checkpoints
+) WHERE position > ? LIMIT ?
+"""
+
+_ORPHAN_WRITES_SQL = """
+SELECT rowid FROM writes WHERE NOT EXISTS (
+    SELECT 1 FROM checkpoints c
+    WHERE c.thread_id = writes.thread_id
+      AND c.checkpoint_ns = writes.checkpoint_ns
+      AND c.checkpoint_id = writes.checkpoint_id
+) LIMIT ?
+"""
+
+
+class CheckpointRetention:
+    """Poda de checkpoints viejos y VACUUM incremental de la base"""
+
+    def __init__(
+        self,
+        db_path: str,
+        keep_last: int,
+        interval_seconds: float,
+        check_seconds: float,
+        size_threshold_bytes: int
+    ):
+        """
+        Args:
+            db_path: Ruta de la base de checkpoints
+            keep_last: Checkpoints que se conservan por thread_id (mínimo 1: el estado actual)
+            interval_seconds: Cada cuánto corre la retención programada
+            check_seconds: Cada cuánto se revisa el tamaño del archivo
+            size_threshold_bytes: Tamaño a partir del cual se corre sin esperar el intervalo
+        """
+        self.db_path = db_path
+        self.keep_last = max(1, keep_last)
+        self.interval_seconds = interval_seconds
+        self.check_seconds = check_seconds
+        self.size_threshold_bytes = size_threshold_bytes
+        self._task: Optional[asyncio.Task] = None
+        self._last_run_at: Optional[float] = None
+        # Métricas
+        self.runs = 0
+        self.total_freed_bytes = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_config(cls) -> "CheckpointRetention":
+        """Crear la retención con los valores de Config"""
+        return cls(
+            db_path=Config.DB_PATH,
+            keep_last=Config.RETENTION_KEEP_LAST,
+            interval_seconds=Config.RETENTION_INTERVAL_SECONDS,
+            check_seconds=Config.RETENTION_CHECK_SECONDS,
+            size_threshold_bytes=Config.RETENTION_SIZE_THRESHOLD_MB * 1024 * 1024
+        )
+
+    def file_size(self) -> int:
+        """Tamaño en disco de la base (incluye el WAL)"""
+        size = 0
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            if os.path.exists(path):
+                size += os.path.getsize(path)
+        return size
+
+    def run(self, vacuum: bool = True, convert: bool = False) -> Dict[str, Any]:
+        """Podar checkpoints viejos y (opcionalmente) compactar la base
+
+        Args:
+            vacuum: Correr el VACUUM incremental (si la base está en modo incremental)
+            convert: Pasar la base a auto_vacuum=INCREMENTAL con un VACUUM completo si hace falta
+                (bloquea la escritura: solo desde la CLI, con la API detenida)
+        """
+        start_time = time.perf_counter()
+        size_before = self.file_size()
+
+        conn = create_sqlite_connection(self.db_path)
+        try:
+            if not self._has_checkpoint_tables(conn):
+                deleted_checkpoints = deleted_writes = 0
+            else:
+                deleted_checkpoints = self._delete_in_batches(
+                    conn, "checkpoints", _OLD_CHECKPOINTS_SQL, (self.keep_last,)
+                )
+                deleted_writes = self._delete_in_batches(conn, "writes", _ORPHAN_WRITES_SQL, ())
+            vacuumed = self._incremental_vacuum(conn, convert) if vacuum else False
+        finally:
+            conn.close()
+
+        size_after = self.file_size()
+        result = {
+            "deleted_checkpoints": deleted_checkpoints,
+            "deleted_writes": deleted_writes,
+            "vacuumed": vacuumed,
+            "size_before_bytes": size_before,
+            "size_after_bytes": size_after,
+            "freed_bytes": max(0, size_before - size_after),
+            "duration_seconds": round(time.perf_counter() - start_time, 3),
+        }
+
+        self.runs += 1
+        self.total_freed_bytes += result["freed_bytes"]
+        self.last_run = result
+        self._last_run_at = time.monotonic()
+        print(f"[CheckpointRetention] {deleted_checkpoints} checkpoints y {deleted_writes} writes borrados, "
+              f"{result['freed_bytes']} bytes liberados en {result['duration_seconds']}s")
+        return result
+
+    def _has_checkpoint_tables(self, conn: sqlite3.Connection) -> bool:
+        """La base puede no tener tablas todavía si el grafo nunca guardó un checkpoint"""
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('checkpoints', 'writes')"
+        ).fetchall()
+        return len(rows) == 2
+
+    def _delete_in_batches(self, conn: sqlite3.Connection, table: str, select_sql: str, params: tuple) -> int:
+        """Borrar las filas seleccionadas en transacciones cortas"""
+        deleted = 0
+        while True:
+            with conn:
+                rowids: List[int] = [row[0] for row in conn.execute(select_sql, (*params, DELETE_BATCH_SIZE))]
+                if not rowids:
+                    return deleted
+                placeholders = ",".join("?" * len(rowids))
+                conn.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", rowids)
+            deleted += len(rowids)
+
+    def _incremental_vacuum(self, conn: sqlite3.Connection, convert: bool = False) -> bool:
+        """Devolver las páginas libres al sistema y truncar el WAL (False si no se compactó)"""
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2:
+            if not convert:
+                print("[CheckpointRetention] La base no está en auto_vacuum=INCREMENTAL, se omite el VACUUM "
+                      "(convertirla con `python checkpoint_retention.py --enable-auto-vacuum` con la API detenida)")
+                return False
+            # auto_vacuum solo cambia con un VACUUM completo (una única vez por base)
+            print("[CheckpointRetention] Activando auto_vacuum=INCREMENTAL (VACUUM completo, única vez)")
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            # El pragma libera una página por paso: hay que consumir todas las filas
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+
+    def is_due(self) -> bool:
+        """Toca correr: pasó el intervalo o el archivo superó el umbral (y creció desde la última corrida)"""
+        if self._last_run_at is None or time.monotonic() - self._last_run_at >= self.interval_seconds:
+            return True
+        size = self.file_size()
+        last_size = self.last_run["size_after_bytes"] if self.last_run else 0
+        return size >= self.size_threshold_bytes and size > last_size
+
+    async def run_forever(self):
+        """Loop de fondo: revisar periódicamente y correr la retención fuera del event loop"""
+        while True:
+            await asyncio.sleep(self.check_seconds)
+            try:
+                if self.is_due():
+                    await asyncio.to_thread(self.run)
+            except Exception as e:
+                print(f"[CheckpointRetention] Error en la retención: {e}")
+
+    def start(self):
+        """Iniciar la tarea de fondo (dentro del event loop de la API)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        """Detener la tarea de fondo"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de la retención"""
+        return {
+            "keep_last": self.keep_last,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "total_freed_bytes": self.total_freed_bytes,
+            "file_size_bytes": self.file_size(),
+            "last_run": self.last_run,
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Retención y compactación de checkpoints")
+    parser.add_argument("--db", default=Config.DB_PATH, help="Ruta de la base de checkpoints")
+    parser.add_argument("--keep-last", type=int, default=Config.RETENTION_KEEP_LAST,
+                        help="Checkpoints a conservar por thread_id")
+    parser.add_argument("--no-vacuum", action="store_true", help="Solo podar, sin VACUUM")
+    parser.add_argument("--enable-auto-vacuum", action="store_true",
+                        help="Convertir la base a auto_vacuum=INCREMENTAL (VACUUM completo, con la API detenida)")
+    args = parser.parse_args(argv)
+
+    retention = CheckpointRetention(
+        db_path=args.db,
+        keep_last=args.keep_last,
+        interval_seconds=Config.RETENTION_INTERVAL_SECONDS,
+        check_seconds=Config.RETENTION_CHECK_SECONDS,
+        size_threshold_bytes=Config.RETENTION_SIZE_THRESHOLD_MB * 1024 * 1024
+    )
+    result = retention.run(vacuum=not args.no_vacuum, convert=args.enable_auto_vacuum)
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Serializer comprimido para los checkpoints del grafo.
+
+Los checkpoints guardan la lista completa de HumanMessage/AIMessage (respuestas
+largas del Profesor, saludos repetidos de GREETING_BY_TYPE), así que el tamaño
+de la base y el I/O dependen de estos blobs. El serializer:
+
+- Codifica con el JsonPlusSerializer de LangGraph (msgpack, binario compacto).
+- Comprime con zstd (si está instalado `zstandard`) o zlib los blobs que
+  superan un tamaño mínimo; el códec queda en el tipo guardado ("msgpack+zstd").
+- Lee los checkpoints viejos sin comprimir (tipo sin "+") sin cambios.
+- Con CHECKPOINT_COMPRESSION=none escribe sin comprimir (tipo sin "+"), pero
+  sigue leyendo los blobs ya guardados con zstd o zlib.
+
+Los compresores de zstandard no se pueden usar desde varios threads a la vez:
+cada thread tiene los suyos (threading.local).
+
+Se monta sobre EncryptedSerializer de LangGraph, que ya resuelve el "tipo+códec"
+y la allowlist de msgpack; el "cifrado" acá es solo compresión.
+"""
+
+import zlib
+import threading
+from typing import Optional, Tuple
+
+from langgraph.checkpoint.serde.base import CipherProtocol, SerializerProtocol
+from langgraph.checkpoint.serde.encrypted import EncryptedSerializer
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from config import Config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Blobs guardados sin comprimir (por debajo del tamaño mínimo)
+RAW_CODEC = "raw"
+
+
+class CompressionCodec(CipherProtocol):
+    """Compresión con la interfaz de CipherProtocol (encrypt = comprimir)"""
+
+    def __init__(self, codec: str = "zstd", level: Optional[int] = None, min_bytes: int = 256):
+        """
+        Args:
+            codec: "zstd", "zlib" o "none" (zstd cae a zlib si `zstandard` no está instalado)
+            level: Nivel de compresión (None = el default del códec)
+            min_bytes: Los blobs más chicos se guardan sin comprimir
+        """
+        if codec == "zstd" and zstandard is None:
+            print("[CheckpointSerde] zstandard no está instalado, se usa zlib")
+            codec = "zlib"
+        if codec not in ("zstd", "zlib", "none"):
+            raise ValueError(f"Códec de compresión no soportado: {codec}")
+        self.codec = codec
+        self.level = level
+        self.min_bytes = min_bytes
+        # Compresor y descompresor de zstd por thread
+        self._local = threading.local()
+
+    def _zstd_compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level if self.level is not None else 3)
+            self._local.compressor = compressor
+        return compressor
+
+    def _zstd_decompressor(self):
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor()
+            self._local.decompressor = decompressor
+        return decompressor
+
+    def encrypt(self, plaintext: bytes) -> Tuple[str, bytes]:
+        if self.codec == "none" or len(plaintext) < self.min_bytes:
+            return RAW_CODEC, plaintext
+        if self.codec == "zstd":
+            return "zstd", self._zstd_compressor().compress(plaintext)
+        return "zlib", zlib.compress(plaintext, self.level if self.level is not None else 6)
+
+    def decrypt(self, ciphername: str, ciphertext: bytes) -> bytes:
+        # Se decodifica según el códec guardado, no el configurado
+        if ciphername == RAW_CODEC:
+            return ciphertext
+        if ciphername == "zlib":
+            return zlib.decompress(ciphertext)
+        if ciphername == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Checkpoint comprimido con zstd pero `zstandard` no está instalado")
+            return self._zstd_decompressor().decompress(ciphertext)
+        raise ValueError(f"Códec de checkpoint desconocido: {ciphername}")
+
+
+class CheckpointSerializer(EncryptedSerializer):
+    """EncryptedSerializer que con el códec "none" escribe el tipo sin "+" (legible sin este módulo)"""
+
+    def dumps_typed(self, obj) -> Tuple[str, bytes]:
+        if self.cipher.codec == "none":
+            return self.serde.dumps_typed(obj)
+        return super().dumps_typed(obj)
+
+
+def create_checkpoint_serializer(
+    codec: Optional[str] = None,
+    level: Optional[int] = None,
+    min_bytes: Optional[int] = None
+) -> SerializerProtocol:
+    """Crear el serializer de checkpoints según Config
+
+    Siempre lee los blobs comprimidos con cualquier códec; "none" solo deja de comprimir al escribir.
+    """
+    codec = codec or Config.CHECKPOINT_COMPRESSION
+    return CheckpointSerializer(
+        CompressionCodec(
+            codec=codec,
+            level=level if level is not None else Config.CHECKPOINT_COMPRESSION_LEVEL,
+            min_bytes=min_bytes if min_bytes is not None else Config.CHECKPOINT_COMPRESSION_MIN_BYTES
+        ),
+        JsonPlusSerializer()
+    )
@@ -0,0 +1,294 @@
+"""
+Fábrica del checkpoint store SQLite para el grafo LangGraph.
+
+Abre la base en modo WAL con pragmas ajustados (synchronous, cache_size,
+mmap_size, busy_timeout) y mantiene un pool de conexiones de lectura:
+las lecturas (get_state / get_tuple) usan una conexión del pool y no esperan
+al escritor, mientras que las escrituras siguen serializadas en una única
+conexión, como exige SQLite.
+
+Lo mismo vale para los dos checkpointers: PooledSqliteSaver (camino sync,
+process_message) lee de un pool de conexiones sqlite3 y PooledAsyncSqliteSaver
+(la API) lee de un pool de conexiones aiosqlite de solo lectura. El tamaño de
+ambos pools es CHECKPOINT_POOL_SIZE.
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Iterator, AsyncIterator, Optional
+
+import aiosqlite
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from config import Config
+from checkpoint_serde import create_checkpoint_serializer
+
+
+def sqlite_pragmas() -> List[str]:
+    """Pragmas que se aplican a cada conexión del checkpoint store"""
+    return [
+        # Solo tiene efecto en una base nueva (sin tablas): así nunca necesita la conversión con VACUUM completo
+        "PRAGMA auto_vacuum=INCREMENTAL",
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}",
+        # Valor negativo: tamaño en KiB en lugar de páginas
+        f"PRAGMA cache_size=-{Config.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={Config.SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout={Config.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+
+
+def create_sqlite_connection(db_path: str) -> sqlite3.Connection:
+    """Abrir una conexión sync con los pragmas del checkpoint store"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    for pragma in sqlite_pragmas():
+        conn.execute(pragma)
+    return conn
+
+
+async def create_async_sqlite_connection(db_path: str, read_only: bool = False) -> aiosqlite.Connection:
+    """Abrir una conexión async con los pragmas del checkpoint store"""
+    conn = await aiosqlite.connect(db_path)
+    for pragma in sqlite_pragmas():
+        await conn.execute(pragma)
+    if read_only:
+        await conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+class SqliteConnectionPool:
+    """Pool acotado de conexiones de lectura a la misma base"""
+
+    def __init__(self, db_path: str, size: int):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._created_lock = threading.Lock()
+        self._all: List[sqlite3.Connection] = []
+        # Métricas
+        self.checkouts = 0
+        self.waits = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Tomar una conexión del pool (se crea si hay lugar, si no se espera una libre)"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            # No dejar transacciones de lectura abiertas que frenen el checkpoint del WAL
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        self.checkouts += 1
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._created_lock:
+            if self._created < self.size:
+                self._created += 1
+                conn = create_sqlite_connection(self.db_path)
+                self._all.append(conn)
+                return conn
+
+        self.waits += 1
+        return self._idle.get()
+
+    def close(self):
+        """Cerrar todas las conexiones del pool"""
+        for conn in self._all:
+            conn.close()
+        self._all.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del pool"""
+        return {
+            "size": self.size,
+            "open": self._created,
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+        }
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """SqliteSaver con un escritor único y lecturas sobre un pool de conexiones"""
+
+    def __init__(self, conn: sqlite3.Connection, pool: Optional[SqliteConnectionPool] = None, **kwargs):
+        super().__init__(conn, **kwargs)
+        self.pool = pool
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        """Las escrituras usan la conexión principal (con lock); las lecturas, el pool"""
+        if transaction or self.pool is None:
+            with super().cursor(transaction=transaction) as cur:
+                yield cur
+            return
+
+        if not self.is_setup:
+            with self.lock:
+                self.setup()
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        """SqliteSaver.list() lee las escrituras pendientes con self.conn, así que se
+        materializa bajo el lock del escritor en lugar de compartir la conexión"""
+        with self.lock:
+            self.setup()
+            checkpoints = [*super().list(config, filter=filter, before=before, limit=limit)]
+        yield from checkpoints
+
+    def close(self):
+        """Cerrar la conexión de escritura y el pool"""
+        if self.pool is not None:
+            self.pool.close()
+        self.conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del pool de lectura"""
+        return self.pool.get_stats() if self.pool is not None else {"size": 0}
+
+
+class AsyncSqliteConnectionPool:
+    """Pool acotado de conexiones aiosqlite de solo lectura a la misma base
+
+    Cada conexión va envuelta en su propio AsyncSqliteSaver (con su propio lock),
+    así las lecturas reutilizan las consultas de LangGraph sin pasar por el lock
+    ni por el hilo de la conexión de escritura.
+    """
+
+    def __init__(self, db_path: str, size: int):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._idle: "asyncio.LifoQueue[AsyncSqliteSaver]" = asyncio.LifoQueue()
+        self._created = 0
+        self._all: List[AsyncSqliteSaver] = []
+        # Métricas
+        self.checkouts = 0
+        self.waits = 0
+
+    @asynccontextmanager
+    async def reader(self, writer: AsyncSqliteSaver) -> AsyncIterator[AsyncSqliteSaver]:
+        """Tomar un saver de lectura (se crea si hay lugar, si no se espera uno libre)"""
+        reader = await self._acquire(writer)
+        try:
+            yield reader
+        finally:
+            self._idle.put_nowait(reader)
+
+    async def _acquire(self, writer: AsyncSqliteSaver) -> AsyncSqliteSaver:
+        self.checkouts += 1
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        if self._created < self.size:
+            # Se reserva el lugar antes del await para no pasarse del tamaño
+            self._created += 1
+            try:
+                conn = await create_async_sqlite_connection(self.db_path, read_only=True)
+            except Exception:
+                self._created -= 1
+                raise
+            reader = AsyncSqliteSaver(conn, serde=writer.serde)
+            # El escritor ya creó (o migró) las tablas
+            reader.is_setup = True
+            reader._has_task_path = writer._has_task_path
+            self._all.append(reader)
+            return reader
+
+        self.waits += 1
+        return await self._idle.get()
+
+    async def close(self):
+        """Cerrar todas las conexiones del pool"""
+        for reader in self._all:
+            await reader.conn.close()
+        self._all.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del pool"""
+        return {
+            "size": self.size,
+            "open": self._created,
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+        }
+
+
+class PooledAsyncSqliteSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver con un escritor único y lecturas sobre un pool de conexiones
+
+    aput / aput_writes / adelete_thread siguen en la conexión principal; aget_tuple
+    y alist usan una conexión de solo lectura del pool, así que un get_state no
+    espera detrás de un turno que está escribiendo su checkpoint.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, pool: Optional[AsyncSqliteConnectionPool] = None, **kwargs):
+        super().__init__(conn, **kwargs)
+        self.pool = pool
+
+    async def aget_tuple(self, config):
+        if self.pool is None:
+            return await super().aget_tuple(config)
+        await self.setup()
+        async with self.pool.reader(self) as reader:
+            return await reader.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        if self.pool is None:
+            async for item in super().alist(config, filter=filter, before=before, limit=limit):
+                yield item
+            return
+        await self.setup()
+        async with self.pool.reader(self) as reader:
+            async for item in reader.alist(config, filter=filter, before=before, limit=limit):
+                yield item
+
+    async def aclose(self):
+        """Cerrar el pool y la conexión de escritura"""
+        if self.pool is not None:
+            await self.pool.close()
+        await self.conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del pool de lectura"""
+        return self.pool.get_stats() if self.pool is not None else {"size": 0}
+
+
+def create_checkpointer(db_path: Optional[str] = None) -> PooledSqliteSaver:
+    """Crear el checkpointer sync (WAL + pool de lectura + blobs comprimidos)"""
+    db_path = db_path or Config.DB_PATH
+    pool = None
+    # Con ":memory:" cada conexión sería una base distinta
+    if db_path != ":memory:" and Config.CHECKPOINT_POOL_SIZE > 0:
+        pool = SqliteConnectionPool(db_path, Config.CHECKPOINT_POOL_SIZE)
+    return PooledSqliteSaver(create_sqlite_connection(db_path), pool=pool, serde=create_checkpoint_serializer())
+
+
+async def create_async_checkpointer(db_path: Optional[str] = None) -> PooledAsyncSqliteSaver:
+    """Crear el checkpointer async (WAL + pool de lectura de solo lectura + blobs comprimidos)"""
+    db_path = db_path or Config.DB_PATH
+    pool = None
+    if db_path != ":memory:" and Config.CHECKPOINT_POOL_SIZE > 0:
+        pool = AsyncSqliteConnectionPool(db_path, Config.CHECKPOINT_POOL_SIZE)
+    conn = await create_async_sqlite_connection(db_path)
+    return PooledAsyncSqliteSaver(conn, pool=pool, serde=create_checkpoint_serializer())
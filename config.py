@@ -30,9 +30,126 @@ class Config:
     # Ruta de la base de datos SQLite (opcional)
     DB_PATH: str = os.getenv("DB_PATH", "agent_memory.db")
     
+    # Checkpoint store SQLite (pool de lectura y pragmas)
+    # Pool de lectura del checkpointer sync (process_message); sin efecto en la API, que es async
+    CHECKPOINT_POOL_SIZE: int = int(os.getenv("CHECKPOINT_POOL_SIZE", "8"))
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    # Compresión de los blobs de checkpoints: zstd, zlib o none
+    CHECKPOINT_COMPRESSION: str = os.getenv("CHECKPOINT_COMPRESSION", "zstd")
+    CHECKPOINT_COMPRESSION_LEVEL: int = int(os.getenv("CHECKPOINT_COMPRESSION_LEVEL", "3"))
+    CHECKPOINT_COMPRESSION_MIN_BYTES: int = int(os.getenv("CHECKPOINT_COMPRESSION_MIN_BYTES", "256"))
+    
+    # Caché en memoria del estado de sesiones activas (write_through o write_behind)
+    STATE_CACHE_ENABLED: bool = os.getenv("STATE_CACHE_ENABLED", "false").lower() == "true"
+    STATE_CACHE_MAX_SESSIONS: int = int(os.getenv("STATE_CACHE_MAX_SESSIONS", "1000"))
+    STATE_CACHE_TTL_SECONDS: float = float(os.getenv("STATE_CACHE_TTL_SECONDS", "900"))
+    STATE_CACHE_WRITE_POLICY: str = os.getenv("STATE_CACHE_WRITE_POLICY", "write_through")
+    STATE_CACHE_FLUSH_SECONDS: float = float(os.getenv("STATE_CACHE_FLUSH_SECONDS", "2"))
+    # Workers del servidor (la misma variable que lee uvicorn): el caché de sesiones exige uno solo
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1") or "1")
+    
+    # Retención de checkpoints (poda + VACUUM incremental)
+    RETENTION_ENABLED: bool = os.getenv("RETENTION_ENABLED", "true").lower() == "true"
+    RETENTION_KEEP_LAST: int = int(os.getenv("RETENTION_KEEP_LAST", "10"))
+    RETENTION_INTERVAL_SECONDS: float = float(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+    RETENTION_CHECK_SECONDS: float = float(os.getenv("RETENTION_CHECK_SECONDS", "60"))
+    RETENTION_SIZE_THRESHOLD_MB: int = int(os.getenv("RETENTION_SIZE_THRESHOLD_MB", "512"))
+    
+    # Archivo en frío de conversaciones cerradas o inactivas
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "true").lower() == "true"
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "checkpoint_archive")
+    ARCHIVE_IDLE_DAYS: float = float(os.getenv("ARCHIVE_IDLE_DAYS", "7"))
+    ARCHIVE_CLOSED_GRACE_MINUTES: float = float(os.getenv("ARCHIVE_CLOSED_GRACE_MINUTES", "60"))
+    ARCHIVE_INTERVAL_SECONDS: float = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+    ARCHIVE_SEGMENT_MAX_MB: int = int(os.getenv("ARCHIVE_SEGMENT_MAX_MB", "64"))
+    
+    # validate_message y validate_reason en paralelo (validate_reason especulativo: una llamada
+    # a Groq en cada turno exploring aunque el mensaje resulte fuera de tópico)
+    GRAPH_PARALLEL_VALIDATION: bool = os.getenv("GRAPH_PARALLEL_VALIDATION", "false").lower() == "true"
+    
+    # Una sola llamada (TurnAnalyzer) en lugar de ValidateMessage + ValidateReason + EvaluateClose
+    TURN_ANALYZER_ENABLED: bool = os.getenv("TURN_ANALYZER_ENABLED", "false").lower() == "true"
+    
+    # Caché persistente de respuestas de los clasificadores (LRU en memoria + SQLite)
+    CLASSIFIER_CACHE_ENABLED: bool = os.getenv("CLASSIFIER_CACHE_ENABLED", "true").lower() == "true"
+    CLASSIFIER_CACHE_PATH: str = os.getenv("CLASSIFIER_CACHE_PATH", "classifier_cache.db")
+    CLASSIFIER_CACHE_MAX_ENTRIES: int = int(os.getenv("CLASSIFIER_CACHE_MAX_ENTRIES", "5000"))
+    CLASSIFIER_CACHE_MAX_ROWS: int = int(os.getenv("CLASSIFIER_CACHE_MAX_ROWS", "200000"))
+    CLASSIFIER_CACHE_TTL_SECONDS: float = float(os.getenv("CLASSIFIER_CACHE_TTL_SECONDS", "604800"))
+    
+    # Parser por reglas de respuestas numéricas antes del LLM de ValidateReason
+    REASON_PARSER_ENABLED: bool = os.getenv("REASON_PARSER_ENABLED", "true").lower() == "true"
+    # Clasificador por reglas de la respuesta a la confirmación antes del LLM de EvaluateClose
+    CLOSE_CLASSIFIER_ENABLED: bool = os.getenv("CLOSE_CLASSIFIER_ENABLED", "true").lower() == "true"
+    # Pre-filtro local de tópico (reglas + clasificador de n-gramas) antes del LLM de ValidateMessage
+    TOPIC_PREFILTER_ENABLED: bool = os.getenv("TOPIC_PREFILTER_ENABLED", "true").lower() == "true"
+    TOPIC_MODEL_PATH: str = os.getenv("TOPIC_MODEL_PATH", "topic_model.json")
+    TOPIC_CLASSIFIER_LOW: float = float(os.getenv("TOPIC_CLASSIFIER_LOW", "0.1"))
+    TOPIC_CLASSIFIER_HIGH: float = float(os.getenv("TOPIC_CLASSIFIER_HIGH", "0.9"))
+    # Recuperación local (BM25) sobre el documento del dominio en lugar de file_search
+    LOCAL_RETRIEVAL_ENABLED: bool = os.getenv("LOCAL_RETRIEVAL_ENABLED", "true").lower() == "true"
+    DOMAIN_DOC_PATH: str = os.getenv("DOMAIN_DOC_PATH", "doc de info del dominio.md")
+    DOMAIN_INDEX_PATH: str = os.getenv("DOMAIN_INDEX_PATH", "domain_index.bin")
+    DOMAIN_RETRIEVAL_TOP_K: int = int(os.getenv("DOMAIN_RETRIEVAL_TOP_K", "3"))
+    # Caché por similitud (MinHash) de las respuestas del Profesor a preguntas frecuentes
+    FAQ_CACHE_ENABLED: bool = os.getenv("FAQ_CACHE_ENABLED", "false").lower() == "true"
+    FAQ_CACHE_THRESHOLD: float = float(os.getenv("FAQ_CACHE_THRESHOLD", "0.8"))
+    FAQ_CACHE_MAX_PER_TYPE: int = int(os.getenv("FAQ_CACHE_MAX_PER_TYPE", "200"))
+    FAQ_CACHE_AUDIT_RATE: float = float(os.getenv("FAQ_CACHE_AUDIT_RATE", "0.05"))
+    FAQ_CACHE_AUDIT_PATH: str = os.getenv("FAQ_CACHE_AUDIT_PATH", "faq_cache_audit.jsonl")
+    
+    # Transporte HTTP compartido de los clientes de Groq y OpenAI
+    HTTP_POOL_MAX_CONNECTIONS: int = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+    HTTP_POOL_MAX_KEEPALIVE: int = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+    HTTP_READ_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "60"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    
+    # Hedging de las llamadas de ValidateReason y EvaluateClose (duplicado si tardan más que el percentil)
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+    HEDGE_INITIAL_DELAY_MS: float = float(os.getenv("HEDGE_INITIAL_DELAY_MS", "1000"))
+    HEDGE_MIN_DELAY_MS: float = float(os.getenv("HEDGE_MIN_DELAY_MS", "200"))
+    HEDGE_MAX_RATE: float = float(os.getenv("HEDGE_MAX_RATE", "0.1"))
+    HEDGE_WINDOW: int = int(os.getenv("HEDGE_WINDOW", "200"))
+    HEDGE_ALTERNATE_PROVIDER: bool = os.getenv("HEDGE_ALTERNATE_PROVIDER", "false").lower() == "true"
+    
+    # Failover entre Groq y OpenAI con circuit breaker por proveedor
+    FAILOVER_ENABLED: bool = os.getenv("FAILOVER_ENABLED", "true").lower() == "true"
+    FAILOVER_OPENAI_MODEL: str = os.getenv("FAILOVER_OPENAI_MODEL", "")  # Vacío = OPENAI_MODEL
+    FAILOVER_GROQ_MODEL: str = os.getenv("FAILOVER_GROQ_MODEL", "")      # Vacío = GROQ_MODEL
+    BREAKER_ERROR_RATE: float = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+    BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "5"))
+    BREAKER_SLOW_RATE: float = float(os.getenv("BREAKER_SLOW_RATE", "0.5"))
+    BREAKER_WINDOW: int = int(os.getenv("BREAKER_WINDOW", "20"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+    BREAKER_HALF_OPEN_PROBES: int = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+    
+    # Ventana del historial por presupuesto de tokens (presupuestos en agents/agent_config.py)
+    CONTEXT_WINDOWING_ENABLED: bool = os.getenv("CONTEXT_WINDOWING_ENABLED", "true").lower() == "true"
+    
     # ID de la sesión (opcional)
     SESSION_ID: str = os.getenv("SESSION_ID", "user_session_1")
     
+    # Procesamiento en lote (/chat/batch)
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+    
+    # Control de admisión (turnos en curso y cola de espera)
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+    
+    # Idempotencia de /chat (header Idempotency-Key)
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+    
     @classmethod
     def validate(cls) -> bool:
         """Valida que la configuración sea correcta"""
@@ -57,5 +174,28 @@ class Config:
         print(f"  OpenAI Vector Store configurado: {'Sí' if cls.OPENAI_VECTOR_STORE_ID else 'No'}")
         # Otros
         print(f"  Base de datos: {cls.DB_PATH}")
+        print(f"  Checkpoints: pool {cls.CHECKPOINT_POOL_SIZE}, synchronous={cls.SQLITE_SYNCHRONOUS}, cache {cls.SQLITE_CACHE_SIZE_KB} KiB, mmap {cls.SQLITE_MMAP_SIZE} bytes")
+        print(f"  Compresión de checkpoints: {cls.CHECKPOINT_COMPRESSION} (nivel {cls.CHECKPOINT_COMPRESSION_LEVEL}, desde {cls.CHECKPOINT_COMPRESSION_MIN_BYTES} bytes)")
+        print(f"  Caché de sesiones: {'Sí' if cls.STATE_CACHE_ENABLED else 'No'}, {cls.STATE_CACHE_WRITE_POLICY}, máx {cls.STATE_CACHE_MAX_SESSIONS} sesiones, TTL {cls.STATE_CACHE_TTL_SECONDS}s, workers {cls.WEB_CONCURRENCY}")
+        print(f"  Retención: {'Sí' if cls.RETENTION_ENABLED else 'No'}, últimos {cls.RETENTION_KEEP_LAST} por sesión, cada {cls.RETENTION_INTERVAL_SECONDS}s o al superar {cls.RETENTION_SIZE_THRESHOLD_MB} MB")
+        print(f"  Archivo: {'Sí' if cls.ARCHIVE_ENABLED else 'No'}, en {cls.ARCHIVE_DIR}, cerradas tras {cls.ARCHIVE_CLOSED_GRACE_MINUTES} min o inactivas {cls.ARCHIVE_IDLE_DAYS} días")
+        print(f"  Validación en paralelo: {'Sí' if cls.GRAPH_PARALLEL_VALIDATION else 'No'}")
+        print(f"  TurnAnalyzer (una llamada por turno): {'Sí' if cls.TURN_ANALYZER_ENABLED else 'No'}")
+        print(f"  Caché de clasificadores: {'Sí' if cls.CLASSIFIER_CACHE_ENABLED else 'No'}, {cls.CLASSIFIER_CACHE_PATH}, {cls.CLASSIFIER_CACHE_MAX_ENTRIES} en memoria, {cls.CLASSIFIER_CACHE_MAX_ROWS} en disco, TTL {cls.CLASSIFIER_CACHE_TTL_SECONDS}s")
+        print(f"  Parser de respuestas por reglas: {'Sí' if cls.REASON_PARSER_ENABLED else 'No'}")
+        print(f"  Clasificador de confirmación por reglas: {'Sí' if cls.CLOSE_CLASSIFIER_ENABLED else 'No'}")
+        print(f"  Pre-filtro de tópico: {'Sí' if cls.TOPIC_PREFILTER_ENABLED else 'No'}, modelo {cls.TOPIC_MODEL_PATH}, LLM entre {cls.TOPIC_CLASSIFIER_LOW} y {cls.TOPIC_CLASSIFIER_HIGH}")
+        print(f"  Recuperación local: {'Sí' if cls.LOCAL_RETRIEVAL_ENABLED else 'No (file_search)'}, {cls.DOMAIN_DOC_PATH} → {cls.DOMAIN_INDEX_PATH}, top {cls.DOMAIN_RETRIEVAL_TOP_K}")
+        print(f"  Caché de preguntas frecuentes: {'Sí' if cls.FAQ_CACHE_ENABLED else 'No'}, umbral {cls.FAQ_CACHE_THRESHOLD}, máx {cls.FAQ_CACHE_MAX_PER_TYPE} por tipo, auditoría {cls.FAQ_CACHE_AUDIT_RATE:.0%} en {cls.FAQ_CACHE_AUDIT_PATH}")
+        print(f"  HTTP de modelos: pool {cls.HTTP_POOL_MAX_CONNECTIONS} (keep-alive {cls.HTTP_POOL_MAX_KEEPALIVE}, {cls.HTTP_KEEPALIVE_EXPIRY_SECONDS}s), timeouts {cls.HTTP_CONNECT_TIMEOUT_SECONDS}s/{cls.HTTP_READ_TIMEOUT_SECONDS}s, HTTP/2 {'Sí' if cls.HTTP2_ENABLED else 'No'}")
+        print(f"  Hedging de clasificadores: {'Sí' if cls.HEDGE_ENABLED else 'No'}, p{cls.HEDGE_PERCENTILE * 100:.0f} (inicial {cls.HEDGE_INITIAL_DELAY_MS} ms, mín {cls.HEDGE_MIN_DELAY_MS} ms), tope {cls.HEDGE_MAX_RATE:.0%}, duplicado a {'OpenAI' if cls.HEDGE_ALTERNATE_PROVIDER else 'Groq'}")
+        print(f"  Failover Groq/OpenAI: {'Sí' if cls.FAILOVER_ENABLED else 'No'}, abre con {cls.BREAKER_ERROR_RATE:.0%} de errores o {cls.BREAKER_SLOW_RATE:.0%} de llamadas > {cls.BREAKER_SLOW_CALL_SECONDS}s en {cls.BREAKER_WINDOW} llamadas, prueba tras {cls.BREAKER_OPEN_SECONDS}s")
+        print(f"  Ventana del historial por tokens: {'Sí' if cls.CONTEXT_WINDOWING_ENABLED else 'No (historial completo)'}")
         print(f"  Sesión: {cls.SESSION_ID}")
+        # Lote
+        print(f"  Lote: concurrencia máx {cls.BATCH_MAX_CONCURRENCY}, ítems máx {cls.BATCH_MAX_ITEMS}")
+        # Admisión
+        print(f"  Admisión: {cls.ADMISSION_MAX_IN_FLIGHT} en curso, cola {cls.ADMISSION_MAX_QUEUE}, timeout {cls.ADMISSION_QUEUE_TIMEOUT_SECONDS}s")
+        # Idempotencia
+        print(f"  Idempotencia: TTL {cls.IDEMPOTENCY_TTL_SECONDS}s, máx {cls.IDEMPOTENCY_MAX_ENTRIES} respuestas")
 
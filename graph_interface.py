@@ -1,18 +1,26 @@
 import time
 from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage, RemoveMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage, RemoveMessage, AIMessage, AIMessageChunk
 from langgraph.graph import MessagesState, StateGraph, START, END
-from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
+from langchain_core.runnables import RunnableLambda
+import asyncio
 from config import Config
+from checkpoint_store import create_checkpointer, create_async_checkpointer
+from checkpoint_cache import CachedCheckpointSaver, create_state_cache
+from checkpoint_archive import CheckpointArchive
 from prompts.greeting_prompts import GREETING_BY_TYPE
-from typing import Dict, Any, Optional, Literal
+from typing import Dict, Any, Optional, Literal, AsyncIterator, Annotated
 from log_manager import get_log_manager
+from session_locks import SessionLockTable
 from datetime import datetime
 
 # Importar desde archivos separados
-from state_manager import StateManager, ConversationStatus
-from agents import ProfesorAgent, SummarizerAgent, ValidateReasonAgent, ValidateMessageAgent, EvaluateCloseAgent, EndConversationAgent
+from state_manager import StateManager, ConversationStatus, keep_first
+from agents import ProfesorAgent, SummarizerAgent, ValidateReasonAgent, ValidateMessageAgent, EvaluateCloseAgent, EndConversationAgent, TurnAnalyzerAgent
+from agents.agent_utils import extract_chunk_text
+
+# Nodos cuyos tokens se reenvían al cliente en streaming (el resto son clasificadores internos)
+STREAMED_NODES = ("profesor", "confirmation", "end_conversation")
 
 
 
@@ -22,12 +30,18 @@ class State(MessagesState):
     status: ConversationStatus
     greeted: bool
     reason: Optional[str]
+    reason_source: Optional[str]  # "rules" (parser determinístico) o "llm"
+    close_source: Optional[str]  # Quién decidió en EvaluateClose: "rules" o "llm"
     question: Optional[str]
-    created_at: datetime
+    # keep_first: la entrada de cada turno los envía, pero solo cuenta el de la primera vez
+    created_at: Annotated[datetime, keep_first]
     updated_at: datetime
-    user: Optional[str]
+    user: Annotated[Optional[str], keep_first]
     last_agent: Optional[str]  # Agregar campo para trackear el último agente
     onTopic: Optional[bool]  # Campo para validar si el mensaje está dentro del tópico
+    topic_source: Optional[str]  # Quién decidió onTopic: "llm", "url_rule", "vocabulary", "classifier" o "fallback"
+    speculative_reason: Optional[Dict[str, Any]]  # Resultado de validate_reason en paralelo, pendiente del join
+    turn_analysis: Optional[Dict[str, Any]]  # Salida del TurnAnalyzer (onTopic, reason y decisión de cierre)
 
 
 
@@ -51,6 +65,21 @@ def call_profesor_agent(state: State):
     
     return result
 
+async def acall_profesor_agent(state: State):
+    """Versión async del nodo profesor"""
+    print("---Profesor Node---")
+    
+    from agents import ProfesorOpenAIAgent
+    
+    profesor_agent = ProfesorOpenAIAgent()
+    result = await profesor_agent.ainvoke(state)
+    
+    # Asegurar que se incluya last_agent en el resultado
+    if "last_agent" not in result:
+        result["last_agent"] = "profesor"
+    
+    return result
+
 # Define the logic to greet the user
 def call_greet_agent(state: State):
     """Nodo que saluda al usuario por primera vez"""
@@ -99,6 +128,19 @@ def summarize_conversation(state: State):
     
     return result
 
+async def asummarize_conversation(state: State):
+    """Versión async del nodo de resumen"""
+    print("---Resumen de Conversación---")
+    
+    summarizer_agent = SummarizerAgent()
+    result = await summarizer_agent.ainvoke(state)
+    
+    # Asegurar que se incluya last_agent en el resultado
+    if "last_agent" not in result:
+        result["last_agent"] = "summarizer"
+    
+    return result
+
 # Importar ValidateReasonAgent para usar su lógica
 from agents import ValidateReasonAgent
 
@@ -120,6 +162,44 @@ def validate_reason_node(state: State) -> State:
     # Procesar el estado usando el ValidateReasonAgent y retornar el estado modificado
     return validate_reason_agent._process_state(state)
 
+async def avalidate_reason_node(state: State) -> State:
+    """Versión async del nodo validate reason"""
+    print("---Validate Reason Node---")
+    return await validate_reason_agent._aprocess_state(state)
+
+# Campos que validate_reason puede cambiar (el resto del estado lo devuelve igual)
+REASON_FIELDS = ("status", "reason", "reason_source")
+
+def _speculative_reason_update(result: State) -> Dict[str, Any]:
+    """Guardar aparte lo que decidió validate_reason: en el mismo superstep que
+    validate_message no puede escribir los mismos canales"""
+    return {"speculative_reason": {field: result[field] for field in REASON_FIELDS if field in result}}
+
+def speculative_validate_reason_node(state: State) -> Dict[str, Any]:
+    """validate_reason especulativo: corre junto a validate_message sin esperar el veredicto de tópico"""
+    return _speculative_reason_update(validate_reason_agent._process_state(dict(state)))
+
+async def aspeculative_validate_reason_node(state: State) -> Dict[str, Any]:
+    """Versión async del validate_reason especulativo"""
+    return _speculative_reason_update(await validate_reason_agent._aprocess_state(dict(state)))
+
+def turn_analyzer_node(state: State) -> Dict[str, Any]:
+    """Nodo que clasifica el turno completo (tópico, razón y cierre) con una sola llamada"""
+    return TurnAnalyzerAgent()._process_state(state)
+
+async def aturn_analyzer_node(state: State) -> Dict[str, Any]:
+    """Versión async del nodo turn analyzer"""
+    return await TurnAnalyzerAgent()._aprocess_state(state)
+
+def validation_join_node(state: State) -> Dict[str, Any]:
+    """Join de la validación en paralelo: aplicar el resultado especulativo solo si el mensaje está en tópico"""
+    update = {"speculative_reason": None}
+    if state.get("onTopic", True):
+        update.update(state.get("speculative_reason") or {})
+    else:
+        print("[ValidationJoin] Mensaje fuera de tópico, se descarta el resultado de validate_reason")
+    return update
+
 # Define the logic for the evaluate close node
 def evaluate_close_node(state: State) -> State:
     """Nodo que evalúa si la conversación está lista para cerrar"""
@@ -127,6 +207,11 @@ def evaluate_close_node(state: State) -> State:
     # Procesar el estado usando el EvaluateCloseAgent y retornar el estado modificado
     return evaluate_close_agent._process_state(state)
 
+async def aevaluate_close_node(state: State) -> State:
+    """Versión async del nodo evaluate close"""
+    print("---Evaluate Close Node---")
+    return await evaluate_close_agent._aprocess_state(state)
+
 # Define the logic for the end conversation node
 def end_conversation_node(state: State) -> State:
     """Nodo que finaliza la conversación"""
@@ -134,11 +219,22 @@ def end_conversation_node(state: State) -> State:
     # Procesar el estado usando el EndConversationAgent y retornar el estado modificado
     return end_conversation_agent._process_state(state)
 
+async def aend_conversation_node(state: State) -> State:
+    """Versión async del nodo end conversation"""
+    print("---End Conversation Node---")
+    return await end_conversation_agent._aprocess_state(state)
+
 # Define the logic for the validate message node
 def validate_message_node(state: State) -> State:
     """Nodo que valida si el mensaje está dentro del tópico"""
     print("---Validate Message Node---")
-    return validate_message_agent._process_state(state)
+    # invoke() loguea BEFORE/AFTER con onTopic y topic_source: de ahí entrena el pre-filtro de tópico
+    return validate_message_agent.invoke(state)
+
+async def avalidate_message_node(state: State) -> State:
+    """Versión async del nodo validate message"""
+    print("---Validate Message Node---")
+    return await validate_message_agent.ainvoke(state)
 
 # Define the logic for the conversation closed node
 def conversation_closed_node(state: State) -> State:
@@ -171,6 +267,22 @@ def call_confirmation_agent(state: State) -> State:
     
     return result
 
+async def acall_confirmation_agent(state: State) -> State:
+    """Versión async del nodo confirmador"""
+    from agents import ConfirmationAgent
+    confirmation_agent = ConfirmationAgent()
+    result = await confirmation_agent.ainvoke(state)
+    
+    # Asegurar que se incluya last_agent en el resultado
+    if "last_agent" not in result:
+        result["last_agent"] = "confirmation"
+    
+    return result
+
+def _dual_node(name: str, func, afunc) -> RunnableLambda:
+    """Nodo con implementación sync (graph.invoke) y async (graph.ainvoke)"""
+    return RunnableLambda(func, afunc=afunc, name=name)
+
 # Define the logic to route to the appropriate agent
 def route_to_agent(state: State) -> str:
     """Función que decide el siguiente nodo basado en el estado"""
@@ -202,6 +314,24 @@ def route_after_validate_message(state: State) -> str:
         print("ValidateMessage seleccionó: END (mensaje fuera de tópico)")
         return "end"
 
+def route_to_agent_parallel(state: State):
+    """route_to_agent con validate_message y validate_reason en el mismo superstep"""
+    route = route_to_agent(state)
+    if route == "validate_message":
+        return ["validate_message", "speculative_validate_reason"]
+    return route
+
+def route_to_agent_analyzer(state: State) -> str:
+    """route_to_agent con el TurnAnalyzer en lugar de validate_message"""
+    route = route_to_agent(state)
+    return "turn_analyzer" if route == "validate_message" else route
+
+def route_after_validation_join(state: State) -> str:
+    """Misma decisión que route_after_validate_message seguido de route_after_validation"""
+    if route_after_validate_message(state) == "end":
+        return "end"
+    return route_after_validation(state)
+
 # Define the logic to route after the validate_reason has processed the state
 def route_after_validation(state: State) -> str:
     """Función que decide el siguiente nodo después de que validate_reason procesó el estado"""
@@ -273,39 +403,155 @@ class GraphInterface:
         if not self._initialized:
             self.log_manager = get_log_manager()
             self.state_manager = StateManager()
+            # Caché del último checkpoint de cada sesión activa (compartido por ambos grafos)
+            self.state_cache = create_state_cache()
+            self._flush_task = None
+            # Conversaciones cerradas o inactivas se mueven a segmentos comprimidos
+            self.archive = CheckpointArchive.from_config() if Config.ARCHIVE_ENABLED else None
+            self._archive_task = None
             # Crear el grafo
             self.graph = self._create_graph()
+            # El grafo async se compila de forma lazy dentro del event loop
+            self.async_graph = None
+            self._async_store = None
+            self._async_graph_lock = asyncio.Lock()
+            # Turnos de una misma sesión en orden, sesiones distintas en paralelo
+            self.session_locks = SessionLockTable()
             self._initialized = True
     
     def _create_graph(self):
-        """Crear y compilar el grafo"""
-        conn = sqlite3.connect(Config.DB_PATH, check_same_thread=False)
-        memory = SqliteSaver(conn)
+        """Crear y compilar el grafo (checkpointer sync)"""
+        # WAL + pool de lectura: get_state no espera a las escrituras
+        self.checkpoint_store = create_checkpointer()
+        memory = self.checkpointer = self._with_state_cache(self.checkpoint_store)
+        
+        # Compile
+        return self._build_workflow().compile(checkpointer=memory)
+    
+    async def _get_async_graph(self):
+        """Obtener el grafo compilado con el checkpointer async (se crea una sola vez)"""
+        if self.async_graph is None:
+            async with self._async_graph_lock:
+                if self.async_graph is None:
+                    async_store = self._async_store = await create_async_checkpointer()
+                    memory = self._with_state_cache(async_store)
+                    self.async_graph = self._build_workflow().compile(checkpointer=memory)
+        return self.async_graph
+    
+    def get_checkpoint_stats(self) -> Dict[str, Any]:
+        """Qué checkpointer atiende los turnos y métricas de sus pools de lectura
+        
+        La API usa el saver async (creado con el primer turno); process_message, el sync.
+        """
+        async_store = self._async_store
+        return {
+            "async_saver": type(async_store).__name__ if async_store is not None else None,
+            "async_read_pool": async_store.get_stats() if async_store is not None else None,
+            "sync_saver": type(self.checkpoint_store).__name__,
+            "sync_read_pool": self.checkpoint_store.get_stats(),
+        }
+    
+    def _with_state_cache(self, store):
+        """Interponer el caché de sesiones delante de un checkpointer (si está habilitado)"""
+        if self.state_cache is None:
+            return store
+        return CachedCheckpointSaver(store, self.state_cache)
+    
+    def start_maintenance(self):
+        """Iniciar el flush periódico del caché (write_behind) y el archivado de conversaciones"""
+        if self.state_cache is not None and self.state_cache.write_behind and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self.checkpointer.run_flush_loop(Config.STATE_CACHE_FLUSH_SECONDS))
+        if self.archive is not None and self._archive_task is None:
+            self._archive_task = asyncio.create_task(self._run_archive_loop())
+    
+    async def _run_archive_loop(self):
+        """Loop de fondo: archivar periódicamente las conversaciones cerradas o inactivas"""
+        while True:
+            await asyncio.sleep(Config.ARCHIVE_INTERVAL_SECONDS)
+            try:
+                await self.archive_conversations()
+            except Exception as e:
+                print(f"[GraphInterface] Error en el archivado: {e}")
+    
+    async def archive_conversations(self) -> Dict[str, Any]:
+        """Mover a archivo las conversaciones cerradas o inactivas
+        
+        Cada thread se archiva con su lock de sesión tomado, así ningún turno
+        lee o escribe el checkpoint mientras se mueve.
+        """
+        start_time = time.perf_counter()
+        # En write_behind el estado más reciente puede estar solo en memoria
+        if self.state_cache is not None:
+            await asyncio.to_thread(self.checkpointer.flush)
+        candidates = await asyncio.to_thread(
+            self.archive.find_candidates, Config.ARCHIVE_IDLE_DAYS, Config.ARCHIVE_CLOSED_GRACE_MINUTES
+        )
+        results = []
+        for thread_id, reason in candidates.items():
+            async with self.session_locks.hold(thread_id):
+                if self.state_cache is not None:
+                    await asyncio.to_thread(self.checkpointer.flush, thread_id)
+                results.append(await asyncio.to_thread(self.archive.archive_thread, thread_id, reason))
+                if self.state_cache is not None:
+                    self.state_cache.drop_thread(thread_id)
+        return self.archive.record_run(results, time.perf_counter() - start_time)
+    
+    def _restore_if_archived(self, session_id: str):
+        """Devolver la sesión a la base caliente si estaba archivada (consulta al índice por clave primaria)"""
+        if self.archive is not None and self.archive.is_archived(session_id):
+            self.archive.restore_thread(session_id)
+    
+    async def aclose(self):
+        """Bajar a disco el caché y cerrar la conexión del checkpointer async"""
+        for task in (self._archive_task, self._flush_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._archive_task = None
+        self._flush_task = None
+        if self.state_cache is not None:
+            await asyncio.to_thread(self.checkpointer.flush)
+        if self._async_store is not None:
+            await self._async_store.aclose()
+            self._async_store = None
+            self.async_graph = None
+    
+    def _build_workflow(self, parallel_validation: Optional[bool] = None, turn_analyzer: Optional[bool] = None) -> StateGraph:
+        """Definir nodos y aristas del grafo (compartido por el grafo sync y async)
+        
+        Args:
+            parallel_validation: Correr validate_message y validate_reason en paralelo
+                (None = Config.GRAPH_PARALLEL_VALIDATION)
+            turn_analyzer: Reemplazar los clasificadores por el TurnAnalyzer
+                (None = Config.TURN_ANALYZER_ENABLED; tiene prioridad sobre parallel_validation)
+        """
+        if parallel_validation is None:
+            parallel_validation = Config.GRAPH_PARALLEL_VALIDATION
+        if turn_analyzer is None:
+            turn_analyzer = Config.TURN_ANALYZER_ENABLED
         
         # Define a new graph
         workflow = StateGraph(State)
         
         # Add nodes using the pure functions
         workflow.add_node("greet", call_greet_agent)
-        workflow.add_node("validate_message", validate_message_node)  # Nodo que valida si el mensaje está en tópico
-        workflow.add_node("validate_reason", validate_reason_node)  # Nodo validate reason que valida el estado
-        workflow.add_node("evaluate_close", evaluate_close_node)  # Nodo que evalúa si cerrar
-        workflow.add_node("confirmation", call_confirmation_agent)  # Nodo confirmador
-        workflow.add_node("end_conversation", end_conversation_node)  # Nodo que finaliza la conversación
+        workflow.add_node("validate_message", _dual_node("validate_message", validate_message_node, avalidate_message_node))  # Nodo que valida si el mensaje está en tópico
+        workflow.add_node("evaluate_close", _dual_node("evaluate_close", evaluate_close_node, aevaluate_close_node))  # Nodo que evalúa si cerrar
+        workflow.add_node("confirmation", _dual_node("confirmation", call_confirmation_agent, acall_confirmation_agent))  # Nodo confirmador
+        workflow.add_node("end_conversation", _dual_node("end_conversation", end_conversation_node, aend_conversation_node))  # Nodo que finaliza la conversación
         workflow.add_node("conversation_closed", conversation_closed_node)  # Nodo para conversación cerrada
-        workflow.add_node("profesor", call_profesor_agent)
-        workflow.add_node("summarize_conversation", summarize_conversation)
+        workflow.add_node("profesor", _dual_node("profesor", call_profesor_agent, acall_profesor_agent))
+        workflow.add_node("summarize_conversation", _dual_node("summarize_conversation", summarize_conversation, asummarize_conversation))
         
-        # Set the entrypoint with routing
-        workflow.add_conditional_edges(
-            START,
-            route_to_agent,
-            {
-                "greet": "greet",
-                "validate_message": "validate_message",
-                "conversation_closed": "conversation_closed"
-            }
-        )
+        if turn_analyzer:
+            self._add_turn_analyzer(workflow)
+        elif parallel_validation:
+            self._add_parallel_validation(workflow)
+        else:
+            self._add_sequential_validation(workflow)
         
         # Add conditional edges to decide whether to continue or summarize
         # El nodo greet siempre termina (solo saluda)
@@ -314,27 +560,6 @@ class GraphInterface:
         # El nodo conversation_closed siempre termina (conversación ya cerrada)
         workflow.add_edge("conversation_closed", END)
         
-        # El validate_message va a la decisión de ruta
-        workflow.add_conditional_edges(
-            "validate_message",
-            route_after_validate_message,
-            {
-                "validate_reason": "validate_reason",
-                "end": END
-            }
-        )
-        
-        # El validate_reason va a la decisión de ruta
-        workflow.add_conditional_edges(
-            "validate_reason",
-            route_after_validation,
-            {
-                "confirmation": "confirmation",
-                "evaluate_close": "evaluate_close",
-                "profesor": "profesor"
-            }
-        )
-        
         # El evaluate_close va a la decisión de ruta (manteniendo la lógica original)
         workflow.add_conditional_edges(
             "evaluate_close",
@@ -380,8 +605,98 @@ class GraphInterface:
         # The summarize node always ends (like in the original example)
         workflow.add_edge("summarize_conversation", END)
         
-        # Compile
-        return workflow.compile(checkpointer=memory)
+        return workflow
+    
+    def _add_sequential_validation(self, workflow: StateGraph):
+        """validate_message → validate_reason, uno después del otro"""
+        workflow.add_node("validate_reason", _dual_node("validate_reason", validate_reason_node, avalidate_reason_node))  # Nodo validate reason que valida el estado
+        
+        # Set the entrypoint with routing
+        workflow.add_conditional_edges(
+            START,
+            route_to_agent,
+            {
+                "greet": "greet",
+                "validate_message": "validate_message",
+                "conversation_closed": "conversation_closed"
+            }
+        )
+        
+        # El validate_message va a la decisión de ruta
+        workflow.add_conditional_edges(
+            "validate_message",
+            route_after_validate_message,
+            {
+                "validate_reason": "validate_reason",
+                "end": END
+            }
+        )
+        
+        # El validate_reason va a la decisión de ruta
+        workflow.add_conditional_edges(
+            "validate_reason",
+            route_after_validation,
+            {
+                "confirmation": "confirmation",
+                "evaluate_close": "evaluate_close",
+                "profesor": "profesor"
+            }
+        )
+    
+    def _add_turn_analyzer(self, workflow: StateGraph):
+        """Una sola llamada clasifica el turno; las rutas son las mismas que en el grafo secuencial"""
+        workflow.add_node("turn_analyzer", _dual_node("turn_analyzer", turn_analyzer_node, aturn_analyzer_node))
+        
+        workflow.add_conditional_edges(
+            START,
+            route_to_agent_analyzer,
+            {
+                "greet": "greet",
+                "turn_analyzer": "turn_analyzer",
+                "conversation_closed": "conversation_closed"
+            }
+        )
+        
+        # Deja los campos como validate_message + validate_reason: se rutea igual que tras el join
+        workflow.add_conditional_edges(
+            "turn_analyzer",
+            route_after_validation_join,
+            {
+                "confirmation": "confirmation",
+                "evaluate_close": "evaluate_close",
+                "profesor": "profesor",
+                "end": END
+            }
+        )
+    
+    def _add_parallel_validation(self, workflow: StateGraph):
+        """validate_message y validate_reason en el mismo superstep, con un join que decide la ruta
+        
+        validate_reason solo necesita el último mensaje y la pregunta, no el veredicto
+        de tópico: se corre especulativamente y el join lo descarta si onTopic es False.
+        """
+        workflow.add_node("speculative_validate_reason", _dual_node("speculative_validate_reason", speculative_validate_reason_node, aspeculative_validate_reason_node))
+        workflow.add_node("validation_join", validation_join_node)
+        
+        workflow.add_conditional_edges(
+            START,
+            route_to_agent_parallel,
+            ["greet", "validate_message", "speculative_validate_reason", "conversation_closed"]
+        )
+        
+        # El join espera a los dos clasificadores
+        workflow.add_edge(["validate_message", "speculative_validate_reason"], "validation_join")
+        
+        workflow.add_conditional_edges(
+            "validation_join",
+            route_after_validation_join,
+            {
+                "confirmation": "confirmation",
+                "evaluate_close": "evaluate_close",
+                "profesor": "profesor",
+                "end": END
+            }
+        )
     
     def process_message(self, message: str, session_id: str, user: Optional[str] = None, question: str = "", tipo_objetivo: Optional[str] = None) -> Dict[str, Any]:
         """Procesar un mensaje a través del grafo
@@ -393,9 +708,82 @@ class GraphInterface:
             question: Tipo de pregunta actual
             tipo_objetivo: Si la pregunta es objetivo, especifica el tipo elegido previamente
         """
-        user_message = HumanMessage(content=message)
+        config = {"configurable": {"thread_id": session_id}}
+        question = self._resolve_question(question, tipo_objetivo)
+        
+        # Solo el delta del turno: el grafo lo combina con el checkpoint al cargarlo
+        turn_input = self._build_turn_input(message, user, question)
+        
+        # Ejecutar el turno sin que otro turno de la misma sesión se intercale (desde otro thread)
+        with self.session_locks.hold_sync(session_id):
+            self._restore_if_archived(session_id)
+            
+            # Procesar el mensaje a través del grafo
+            result = self.graph.invoke(turn_input, config=config)
+        
+        return result
+    
+    async def aprocess_message(self, message: str, session_id: str, user: Optional[str] = None, question: str = "", tipo_objetivo: Optional[str] = None) -> Dict[str, Any]:
+        """Versión async de process_message(): usa graph.ainvoke y el checkpointer async
+        
+        Args:
+            message: El mensaje del usuario
+            session_id: ID de la sesión
+            user: Usuario opcional
+            question: Tipo de pregunta actual
+            tipo_objetivo: Si la pregunta es objetivo, especifica el tipo elegido previamente
+        """
+        graph = await self._get_async_graph()
+        config = {"configurable": {"thread_id": session_id}}
+        question = self._resolve_question(question, tipo_objetivo)
+        
+        turn_input = self._build_turn_input(message, user, question)
+        
+        # Ejecutar el turno sin que otro turno de la misma sesión se intercale
+        async with self.session_locks.hold(session_id):
+            await asyncio.to_thread(self._restore_if_archived, session_id)
+            # Procesar el mensaje a través del grafo
+            result = await graph.ainvoke(turn_input, config=config)
+        
+        return result
+    
+    async def astream_message(self, message: str, session_id: str, user: Optional[str] = None, question: str = "", tipo_objetivo: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Procesar un mensaje emitiendo los tokens de los nodos de respuesta a medida que llegan
+        
+        Emite eventos {"type": "token", "node", "content"} mientras corre el grafo y un
+        evento final {"type": "final", "state"} con el estado completo del turno.
+        
+        Args:
+            message: El mensaje del usuario
+            session_id: ID de la sesión
+            user: Usuario opcional
+            question: Tipo de pregunta actual
+            tipo_objetivo: Si la pregunta es objetivo, especifica el tipo elegido previamente
+        """
+        graph = await self._get_async_graph()
+        config = {"configurable": {"thread_id": session_id}}
+        question = self._resolve_question(question, tipo_objetivo)
         
-        # Ajustar el tipo de pregunta basado en tipo_objetivo si es necesario
+        turn_input = self._build_turn_input(message, user, question)
+        
+        async with self.session_locks.hold(session_id):
+            await asyncio.to_thread(self._restore_if_archived, session_id)
+            # stream_mode="messages" entrega los chunks del LLM de cada nodo en cuanto se generan
+            async for chunk, metadata in graph.astream(turn_input, config=config, stream_mode="messages"):
+                node = metadata.get("langgraph_node")
+                # Solo chunks de tokens; los mensajes completos de salida de los nodos llegan en el estado final
+                if node not in STREAMED_NODES or not isinstance(chunk, AIMessageChunk):
+                    continue
+                text = extract_chunk_text(chunk.content)
+                if text:
+                    yield {"type": "token", "node": node, "content": text}
+            
+            final_state = await graph.aget_state(config)
+        
+        yield {"type": "final", "state": dict(final_state.values)}
+    
+    def _resolve_question(self, question: str, tipo_objetivo: Optional[str]) -> str:
+        """Ajustar el tipo de pregunta basado en tipo_objetivo si es necesario"""
         if question == "objetivo" and tipo_objetivo:
             if tipo_objetivo == "Monto final":
                 question = "objetivo_monto_final"
@@ -404,57 +792,16 @@ class GraphInterface:
             elif tipo_objetivo == "Duración":
                 question = "objetivo_duracion"
             print(f"[GraphInterface] Ajustando pregunta objetivo según tipo: {question}")
-        
-        # Intentar recuperar el estado existente del checkpoint
-        try:
-            # Obtener el estado actual del checkpoint
-            current_state = self.graph.get_state({"configurable": {"thread_id": session_id}})
-            
-            # Si hay estado existente, agregar solo el nuevo mensaje
-            if current_state and hasattr(current_state, 'values') and current_state.values:
-                # Convertir StateSnapshot a dict y preservar todos los campos
-                current_dict = dict(current_state.values)
-                
-                if current_dict.get("messages"):
-                    # Preservar todos los campos del estado existente
-                    initial_state = dict(current_dict)
-                    # Agregar el nuevo mensaje del usuario
-                    initial_state["messages"] = current_dict["messages"] + [user_message]
-                    # Actualizar timestamp
-                    initial_state["updated_at"] = datetime.now()
-                    
-                    # Si es el primer mensaje de la sesión, establecer el usuario
-                    if not initial_state.get("user") and user:
-                        initial_state["user"] = user
-                    
-                    # Actualizar la pregunta con el nuevo tipo
-                    initial_state["question"] = question
-                        
-                else:
-                    # Si no hay mensajes, crear estado nuevo
-                    initial_state = self.state_manager.create_initial_state(user_message, user)
-                    # Setear pregunta
-                    initial_state["question"] = question
-            else:
-                # Si no hay estado existente, crear uno nuevo
-                initial_state = self.state_manager.create_initial_state(user_message, user)
-                # Setear pregunta
-                initial_state["question"] = question
-                
-        except Exception as e:
-            # Si hay algún error al recuperar el estado, crear uno nuevo
-            print(f"⚠️ Error recuperando estado del checkpoint: {e}")
-            initial_state = self.state_manager.create_initial_state(user_message, user)
-        
-        # Procesar el mensaje a través del grafo
-        result = self.graph.invoke(
-            initial_state,
-            config={"configurable": {"thread_id": session_id}}
-        )
-        
-        return result
+        return question
     
-
+    def _build_turn_input(self, message: str, user: Optional[str], question: str) -> Dict[str, Any]:
+        """Armar la entrada del turno: solo el nuevo mensaje y los campos que cambian
+        
+        No se lee el checkpoint antes de invocar: el grafo lo carga una sola vez y
+        aplica los reducers, así el costo del turno no crece con el historial.
+        Si la sesión no tiene checkpoint, esta misma entrada la crea.
+        """
+        return self.state_manager.create_turn_input(HumanMessage(content=message), question, user)
     
     # Métodos de conveniencia que delegan al StateManager
     def update_status(self, state: State, new_status: ConversationStatus) -> State:
@@ -0,0 +1,157 @@
+"""
+Claves de idempotencia para /chat.
+
+Los clientes que reintentan un pedido con el mismo Idempotency-Key (y la misma
+sesión) reciben la respuesta original en lugar de agregar otro HumanMessage y
+volver a pagar toda la cadena de llamadas al LLM:
+
+- Si el pedido original sigue en curso, el reintento espera su resultado.
+- Si ya terminó con éxito, se devuelve la respuesta guardada (TTL acotado).
+- Las respuestas fallidas no se guardan, así un reintento posterior vuelve a procesar.
+- Si el pedido original se cancela (el cliente cortó), los reintentos que lo
+  esperaban no heredan la cancelación: el primero vuelve a ejecutar el pedido y
+  los demás lo esperan a él.
+"""
+
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Callable, Awaitable, Optional
+
+
+# Resultado del pedido en curso cuando su dueño se canceló: los que esperaban lo reintentan
+_LEADER_CANCELLED = object()
+
+
+class IdempotencyConflict(Exception):
+    """La clave ya se usó con un pedido distinto en la misma sesión"""
+
+
+class _StoredResponse:
+    """Respuesta completada junto con su huella y vencimiento"""
+
+    __slots__ = ("fingerprint", "response", "expires_at")
+
+    def __init__(self, fingerprint: str, response: Dict[str, Any], expires_at: float):
+        self.fingerprint = fingerprint
+        self.response = response
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    """Respuestas por (session_id, clave) con TTL y coalescencia de pedidos en curso"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        """
+        Args:
+            ttl_seconds: Segundos que se conserva una respuesta completada
+            max_entries: Cantidad máxima de respuestas guardadas (se descartan las más viejas)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._completed: "OrderedDict[Tuple[str, str], _StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], Tuple[str, asyncio.Future]] = {}
+        # Métricas
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.conflicts = 0
+        self.reruns = 0
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """Huella del contenido del pedido para detectar reutilización de la clave"""
+        raw = "\x1f".join(str(part) for part in parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def run(
+        self,
+        session_id: str,
+        key: str,
+        fingerprint: str,
+        factory: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Devolver la respuesta de la clave, ejecutando factory() solo la primera vez
+
+        Lanza IdempotencyConflict si la clave ya se usó con otro contenido.
+        Las excepciones de factory() se propagan tanto al pedido original como
+        a los reintentos que lo estaban esperando; la cancelación del original no
+        (el primero de los reintentos vuelve a ejecutar factory()).
+        """
+        entry_key = (session_id, key)
+
+        stored = self._get_completed(entry_key)
+        if stored is not None:
+            self._check_fingerprint(stored.fingerprint, fingerprint, key)
+            self.hits += 1
+            return dict(stored.response)
+
+        in_flight = self._in_flight.get(entry_key)
+        if in_flight is not None:
+            in_flight_fingerprint, future = in_flight
+            self._check_fingerprint(in_flight_fingerprint, fingerprint, key)
+            self.coalesced += 1
+            # shield: si el reintento se cancela, el pedido original sigue
+            response = await asyncio.shield(future)
+            if response is _LEADER_CANCELLED:
+                self.reruns += 1
+                return await self.run(session_id, key, fingerprint, factory)
+            return dict(response)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[entry_key] = (fingerprint, future)
+        try:
+            response = await factory()
+        except asyncio.CancelledError:
+            # No propagar la cancelación a los reintentos que esperan: que lo vuelvan a ejecutar
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Marcar la excepción como leída si nadie estaba esperando
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            if response.get("success"):
+                self._store(entry_key, fingerprint, response)
+            return response
+        finally:
+            self._in_flight.pop(entry_key, None)
+
+    def _get_completed(self, entry_key: Tuple[str, str]) -> Optional[_StoredResponse]:
+        """Buscar una respuesta completada que no haya vencido"""
+        stored = self._completed.get(entry_key)
+        if stored is None:
+            return None
+        if stored.expires_at <= time.monotonic():
+            del self._completed[entry_key]
+            return None
+        return stored
+
+    def _store(self, entry_key: Tuple[str, str], fingerprint: str, response: Dict[str, Any]):
+        """Guardar una respuesta y descartar las más viejas si se supera el máximo"""
+        self._completed[entry_key] = _StoredResponse(fingerprint, dict(response), time.monotonic() + self.ttl_seconds)
+        self._completed.move_to_end(entry_key)
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    def _check_fingerprint(self, expected: str, received: str, key: str):
+        """Rechazar una clave reutilizada con otro contenido"""
+        if expected != received:
+            self.conflicts += 1
+            raise IdempotencyConflict(f"La clave de idempotencia '{key}' ya se usó con otro pedido")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del almacén de idempotencia"""
+        return {
+            "stored": len(self._completed),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "conflicts": self.conflicts,
+            "reruns": self.reruns,
+        }
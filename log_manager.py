@@ -154,6 +154,9 @@ class FileLogObserver(LogObserver):
         Prioriza los métodos de serialización nativos de LangChain y Pydantic
         para garantizar la máxima compatibilidad.
         """
+        # Mensajes ya serializados (el LogManager los entrega así al observador): no volver a convertirlos a texto
+        if isinstance(message, dict):
+            return message
         try:
             # Intentar usar model_dump() (Pydantic v2)
             if hasattr(message, 'model_dump'):
@@ -379,6 +382,9 @@ class LogManager:
         Prioriza los métodos de serialización nativos de LangChain y Pydantic
         para garantizar la máxima compatibilidad.
         """
+        # Mensajes ya serializados (el LogManager los entrega así al observador): no volver a convertirlos a texto
+        if isinstance(message, dict):
+            return message
         try:
             # Intentar usar model_dump() (Pydantic v2)
             if hasattr(message, 'model_dump'):
@@ -1,10 +1,14 @@
 import os
+import json
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from custom_types import QuestionType
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from chat_service import ChatService
+from admission_control import AdmissionRejected
+from idempotency import IdempotencyConflict
 from config import Config
 from middleware import create_middleware_stack
 
@@ -43,6 +47,16 @@ def _log_startup_config():
 # Inicializar el servicio de chat
 chat_service = ChatService()
 
+# Tareas de fondo (retención de checkpoints)
+@app.on_event("startup")
+async def _start_maintenance():
+    chat_service.start_maintenance()
+
+# Cerrar la conexión async del checkpointer al apagar
+@app.on_event("shutdown")
+async def _close_chat_service():
+    await chat_service.aclose()
+
 # Modelos de datos para la API
 class ChatRequest(BaseModel):
     message: str
@@ -54,20 +68,41 @@ class ChatResponse(BaseModel):
     agent_type: str
     session_id: str
 
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+    max_concurrency: Optional[int] = None
+
+class BatchChatItemResult(BaseModel):
+    index: int
+    response: str
+    agent_type: str
+    session_id: str
+    success: bool
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatItemResult]
+    succeeded: int
+    failed: int
+
 # Endpoints de la API
 @app.get("/")
 def read_root():
     return {"message": "Agente LangGraph API funcionando"}
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """Endpoint para chatear con el agente"""
+async def chat(request: ChatRequest, idempotency_key: Optional[str] = Header(default=None)):
+    """Endpoint para chatear con el agente
+    
+    Con el header Idempotency-Key, los reintentos del mismo pedido (misma sesión)
+    esperan o reciben la respuesta original en lugar de procesar otro turno.
+    """
     try:
         # Procesar el mensaje a través del servicio
-        result = chat_service.process_chat_message(
+        result = await chat_service.aprocess_chat_message(
             message=request.message,
             session_id=request.session_id,
-            question=request.question
+            question=request.question,
+            idempotency_key=idempotency_key
         )
         
         if result["success"]:
@@ -79,9 +114,85 @@ async def chat(request: ChatRequest):
         else:
             raise HTTPException(status_code=500, detail=result["response"])
         
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+def _overloaded(error: AdmissionRejected) -> HTTPException:
+    """Respuesta rápida 503 con Retry-After cuando no hay capacidad"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest):
+    """Endpoint para procesar un lote de mensajes (sesiones en paralelo, cada sesión en orden)"""
+    if len(request.items) > Config.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote supera el máximo de {Config.BATCH_MAX_ITEMS} ítems"
+        )
+    
+    results = await chat_service.process_batch(
+        [item.dict() for item in request.items],
+        max_concurrency=request.max_concurrency
+    )
+    succeeded = sum(1 for result in results if result["success"])
+    
+    return BatchChatResponse(
+        results=[BatchChatItemResult(**result) for result in results],
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    )
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Formatear un evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Endpoint para chatear con el agente recibiendo la respuesta token a token (SSE)"""
+    events = chat_service.astream_chat_message(
+        message=request.message,
+        session_id=request.session_id,
+        question=request.question
+    )
+    # Esperar el primer evento antes de responder: si no hay capacidad se devuelve 503
+    try:
+        first_event = await anext(events)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    
+    async def all_events():
+        yield first_event
+        async for event in events:
+            yield event
+    
+    async def event_stream():
+        async for event in all_events():
+            if event["type"] == "token":
+                yield _format_sse("token", {"content": event["content"], "node": event["node"]})
+            elif event["type"] == "final" and event["success"]:
+                # Mismos campos que ChatResponse
+                yield _format_sse("final", {
+                    "response": event["response"],
+                    "agent_type": event["agent_type"],
+                    "session_id": event["session_id"]
+                })
+            else:
+                yield _format_sse("error", {"detail": event["response"], "session_id": event["session_id"]})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/health")
 def health_check():
     """Endpoint de salud de la API"""
@@ -17,6 +17,7 @@ __all__ = [
     # Profesor agent prompts
     "PROFESOR_AGENT_CONFIG",
     "PROFESOR_WITH_SUMMARY_PROMPT",
+    "PROFESOR_WITH_CONTEXT_PROMPT",
     "PROFESOR_EXPLANATION_TYPES",
     
     # Summarizer agent prompts
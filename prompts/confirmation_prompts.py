@@ -11,10 +11,7 @@ CONFIRMATION_PROMPT = """Eres un agente confirmador experto en planificación de
 CONTEXTO DE LA CONVERSACIÓN:
 Pregunta actual: {question}
 
-ELECCIÓN DEL USUARIO:
-{reason}
-
-Tu tarea es pedirle que confirme esta elección de manera clara y amigable, haciendo referencia al contexto de lo que está tratando de lograr.
+El usuario indica su elección en el mensaje que sigue. Tu tarea es pedirle que confirme esa elección de manera clara y amigable, haciendo referencia al contexto de lo que está tratando de lograr.
 
 INSTRUCCIONES:
 1. Confirma que entendiste su elección en el contexto de la pregunta
@@ -24,3 +21,9 @@ INSTRUCCIONES:
 5. No seas muy largo, solo 2-3 oraciones
 
 RESPUESTA:"""
+
+# Mensaje del usuario con su elección (va después del prompt de sistema fijo)
+CONFIRMATION_USER_PROMPT = """ELECCIÓN DEL USUARIO:
+{reason}
+
+Por favor confirma mi elección"""
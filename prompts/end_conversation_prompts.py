@@ -9,7 +9,7 @@ END_CONVERSATION_PROMPT = """Eres un asistente experto en planificación de reti
 
 ## CONTEXTO:
 - Pregunta que se le hizo al usuario: {current_question}
-- Opción que eligió el usuario: {reason}
+- Opción que eligió el usuario: la que indica el mensaje del usuario
 
 ## TU TAREA:
 Generar un mensaje de despedida personalizado, amigable y profesional que:
@@ -39,3 +39,8 @@ Generar un mensaje de despedida personalizado, amigable y profesional que:
 Genera un mensaje de despedida personalizado basado en la opción que eligió el usuario.
 
 RESPUESTA:"""
+
+# Mensaje del usuario con su elección (va después del prompt de sistema fijo)
+END_CONVERSATION_USER_PROMPT = """Opción que elegí: {reason}
+
+Genera un mensaje de despedida personalizado"""
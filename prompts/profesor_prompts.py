@@ -17,6 +17,13 @@ PROFESOR_AGENT_CONFIG = {
 # Prompt con contexto de resumen
 PROFESOR_WITH_SUMMARY_PROMPT = "{base_prompt}\n\nResumen de la conversación anterior: {summary}"
 
+# Prompt con pasajes del documento del dominio (recuperación local)
+PROFESOR_WITH_CONTEXT_PROMPT = (
+    "{base_prompt}\n\n"
+    "Información de referencia del documento del dominio. Usala si es relevante para la pregunta, "
+    "sin citarla textualmente ni mencionar que proviene de un documento:\n\n{passages}"
+)
+
 # Tipos de explicaciones que puede dar el profesor
 PROFESOR_EXPLANATION_TYPES = {
     "conceptos_basicos": "conceptos financieros básicos",
@@ -0,0 +1,197 @@
+"""
+Registro de prompts compilados una sola vez al iniciar.
+
+Cada agente armaba su prompt de sistema en cada llamada: importaba el módulo de
+prompts, resolvía la pregunta en GREETING_BY_TYPE y formateaba plantillas
+grandes. PromptRegistry compila al inicio un plan por agente y QuestionType:
+
+- El prompt de sistema es un prefijo fijo (instrucciones y pregunta legible).
+  Lo que cambia en cada llamada (mensaje del usuario, razón elegida, resumen,
+  pasajes) va después: al final del prompt de sistema o en el mensaje humano.
+  Así el prefijo se repite idéntico entre llamadas y el proveedor lo puede
+  cachear.
+- Cada plan lleva el hash estable de su prefijo. El hash del agente combina
+  los de todos sus planes y es la versión de prompts del caché de respuestas.
+- `static_prefix` reconoce el prefijo fijo de un prompt ya armado; con eso se
+  mide qué fracción de cada llamada es cacheable (en /health).
+
+Uso:
+    python -m prompts.registry    # prefijos cacheables por agente y plan
+"""
+
+import sys
+import hashlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from custom_types import QuestionType
+from .greeting_prompts import GREETING_BY_TYPE
+from .validate_message_prompts import VALIDATE_MESSAGE_SYSTEM_PROMPT
+from .validate_reason_prompts import REASON_DETECTION_BY_TYPE, GENERIC_REASON_DETECTION_PROMPT
+from .evaluate_close_prompts import EVALUATE_CLOSE_PROMPT
+from .confirmation_prompts import CONFIRMATION_PROMPT
+from .end_conversation_prompts import END_CONVERSATION_PROMPT
+from .profesor_prompts import PROFESOR_AGENT_CONFIG, PROFESOR_BASE_BY_TYPE
+from .turn_analyzer_prompts import (
+    TURN_ANALYZER_PROMPT,
+    TURN_ANALYZER_NOT_APPLICABLE_REASON,
+    TURN_ANALYZER_NOT_APPLICABLE_CLOSE,
+)
+
+# Prefijo mínimo que cachea OpenAI (tokens)
+PROVIDER_CACHE_MIN_TOKENS = 1024
+
+# Variantes del TurnAnalyzer según qué clasificadores aplican en el turno
+TURN_ANALYZER_VARIANTS = ("", "reason", "close")
+
+
+class PromptPlan(NamedTuple):
+    """Prompt de sistema precompilado de un agente para un tipo de pregunta"""
+    agent: str
+    question_type: str
+    variant: str
+    system_prefix: str
+    hash: str
+
+
+def stable_hash(text: str) -> str:
+    """Hash estable de un prompt (16 hex de SHA-256)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def question_text(question_type: str) -> str:
+    """Pregunta legible del tipo ("question" de GREETING_BY_TYPE) o el mismo valor si no está"""
+    mapping = GREETING_BY_TYPE.get(question_type)
+    if isinstance(mapping, dict):
+        return mapping.get("question", question_type)
+    return mapping or question_type
+
+
+def _reason_criteria(question_type: str) -> str:
+    template = REASON_DETECTION_BY_TYPE.get(question_type, GENERIC_REASON_DETECTION_PROMPT)
+    return template.format(current_question=question_text(question_type))
+
+
+def _profesor_base(question_type: str) -> str:
+    template = PROFESOR_BASE_BY_TYPE.get(question_type, PROFESOR_AGENT_CONFIG["base_prompt"])
+    return template.format(question=question_text(question_type))
+
+
+def _turn_analyzer(question_type: str, variant: str) -> str:
+    return TURN_ANALYZER_PROMPT.format(
+        topic_criteria=VALIDATE_MESSAGE_SYSTEM_PROMPT,
+        reason_criteria=_reason_criteria(question_type) if variant == "reason" else TURN_ANALYZER_NOT_APPLICABLE_REASON,
+        close_criteria=EVALUATE_CLOSE_PROMPT.format() if variant == "close" else TURN_ANALYZER_NOT_APPLICABLE_CLOSE,
+    )
+
+
+# Compilador del prefijo de cada agente: (tipo de pregunta, variante) -> prompt de sistema
+_COMPILERS = {
+    "validate_message": lambda question_type, variant: VALIDATE_MESSAGE_SYSTEM_PROMPT,
+    "validate_reason": lambda question_type, variant: _reason_criteria(question_type),
+    "evaluate_close": lambda question_type, variant: EVALUATE_CLOSE_PROMPT.format(),
+    "confirmation": lambda question_type, variant: CONFIRMATION_PROMPT.format(
+        question=question_text(question_type) or "tu plan de retiro"
+    ),
+    "end_conversation": lambda question_type, variant: END_CONVERSATION_PROMPT.format(
+        current_question=question_text(question_type)
+    ),
+    "profesor": lambda question_type, variant: _profesor_base(question_type),
+    "profesor_openai": lambda question_type, variant: _profesor_base(question_type),
+    "turn_analyzer": _turn_analyzer,
+}
+
+# Agentes cuyo prompt no depende del tipo de pregunta (un solo plan)
+_QUESTION_INDEPENDENT = {"validate_message", "evaluate_close"}
+
+
+def _depends_on_question(agent: str, variant: str) -> bool:
+    """¿El prefijo cambia con el tipo de pregunta? (en el TurnAnalyzer solo con los criterios de respuesta)"""
+    if agent == "turn_analyzer":
+        return variant == "reason"
+    return agent not in _QUESTION_INDEPENDENT
+
+
+class PromptRegistry:
+    """Planes de prompt por (agente, tipo de pregunta, variante), compilados al iniciar"""
+
+    def __init__(self):
+        self._plans: Dict[Tuple[str, str, str], PromptPlan] = {}
+        # Solo se guardan planes de tipos conocidos: question llega del cliente como texto libre
+        self._known_types = {"", *(question.value for question in QuestionType)}
+        for agent in _COMPILERS:
+            for variant in TURN_ANALYZER_VARIANTS if agent == "turn_analyzer" else ("",):
+                if not _depends_on_question(agent, variant):
+                    self._compile(agent, "", variant)
+                    continue
+                # "" es el plan genérico para un estado sin pregunta
+                for question_type in ["", *(question.value for question in QuestionType)]:
+                    self._compile(agent, question_type, variant)
+        self._agent_hashes = {agent: self._combined_hash(agent) for agent in _COMPILERS}
+
+    def _compile(self, agent: str, question_type: str, variant: str, store: bool = True) -> PromptPlan:
+        system_prefix = _COMPILERS[agent](question_type, variant)
+        plan = PromptPlan(agent, question_type, variant, system_prefix, stable_hash(system_prefix))
+        if store:
+            self._plans[(agent, question_type, variant)] = plan
+        return plan
+
+    def _combined_hash(self, agent: str) -> str:
+        return stable_hash("\x1f".join(plan.hash for plan in self.plans(agent)))
+
+    def plan(self, agent: str, question_type: str = "", variant: str = "") -> PromptPlan:
+        """Plan del agente para el tipo de pregunta
+
+        Un tipo que no está en QuestionType se compila en cada llamada sin guardarse: si no,
+        cada texto distinto del cliente agrandaría el registro (y el recorrido de static_prefix).
+        """
+        if not _depends_on_question(agent, variant):
+            question_type = ""
+        plan = self._plans.get((agent, question_type, variant))
+        if plan is None:
+            plan = self._compile(agent, question_type, variant, store=question_type in self._known_types)
+        return plan
+
+    def plans(self, agent: Optional[str] = None) -> List[PromptPlan]:
+        return [plan for plan in list(self._plans.values()) if agent is None or plan.agent == agent]
+
+    def agent_hash(self, agent: str) -> str:
+        """Versión de los prompts del agente (cambia si cambia cualquiera de sus planes)"""
+        return self._agent_hashes[agent]
+
+    def static_prefix(self, agent: str, system_text: str) -> str:
+        """El prefijo fijo más largo del agente con el que empieza el prompt ("" si no hay)"""
+        best = ""
+        for plan in self.plans(agent):
+            if len(plan.system_prefix) > len(best) and system_text.startswith(plan.system_prefix):
+                best = plan.system_prefix
+        return best
+
+
+# Instancia global del registro
+_prompt_registry = None
+
+def get_prompt_registry() -> PromptRegistry:
+    """Obtener el registro global de prompts (se compila la primera vez)"""
+    global _prompt_registry
+    if _prompt_registry is None:
+        _prompt_registry = PromptRegistry()
+    return _prompt_registry
+
+
+def main(argv: List[str]) -> int:
+    from agents.agent_utils import estimate_tokens
+
+    registry = get_prompt_registry()
+    print(f"{'agente':<18}{'tipo de pregunta':<24}{'variante':<10}{'hash':<18}{'tokens':>7}  cacheable")
+    for agent in _COMPILERS:
+        for plan in registry.plans(agent):
+            tokens = estimate_tokens(plan.system_prefix)
+            cacheable = "sí" if tokens >= PROVIDER_CACHE_MIN_TOKENS else f"no (< {PROVIDER_CACHE_MIN_TOKENS})"
+            print(f"{agent:<18}{plan.question_type or '-':<24}{plan.variant or '-':<10}{plan.hash:<18}{tokens:>7}  {cacheable}")
+        print(f"{agent:<18}{'hash del agente':<34}{registry.agent_hash(agent)}")
+    print("La fracción cacheable de las llamadas reales por agente está en /health (context_tokens).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -19,5 +19,9 @@ SUMMARY_EXTEND_PROMPT = "Extiende el resumen teniendo en cuenta los nuevos mensa
 # Prompt para crear un nuevo resumen
 SUMMARY_CREATE_PROMPT = "Crea un resumen de la conversación arriba:"
 
+# Resumen agregado al final del prompt de sistema de los clasificadores cuando la
+# ventana del historial descarta mensajes (después del prefijo fijo, que sigue cacheable)
+WINDOW_SUMMARY_PROMPT = "\n\nResumen de la conversación anterior (mensajes que no están en el historial): {summary}"
+
 # Prompt completo para extender resumen con contexto
 SUMMARY_EXTEND_WITH_CONTEXT = "Este es el resumen de la conversación hasta ahora: {summary}\n\n{extend_prompt}"
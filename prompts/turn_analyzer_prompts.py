@@ -0,0 +1,25 @@
+"""
+Prompts para el agente TurnAnalyzer.
+
+El TurnAnalyzer reemplaza las tres llamadas de clasificación del turno
+(ValidateMessage, ValidateReason y EvaluateClose) por una sola. Sus criterios
+no se reescriben: se arman con los prompts de cada clasificador, así cualquier
+cambio en esos prompts se aplica también al modo combinado.
+"""
+
+TURN_ANALYZER_PROMPT = """Analizás el último mensaje del usuario en una conversación sobre planificación financiera y completás en un único JSON los tres campos que siguen.
+
+Cada sección trae los criterios de un clasificador individual: usá sus criterios, pero ignorá el formato de respuesta que piden y completá solo el esquema combinado.
+
+## 1. on_topic
+{topic_criteria}
+
+## 2. has_response y reason
+{reason_criteria}
+
+## 3. decision
+{close_criteria}"""
+
+TURN_ANALYZER_NOT_APPLICABLE_REASON = "No aplica en este turno: devolvé has_response false y reason null."
+
+TURN_ANALYZER_NOT_APPLICABLE_CLOSE = "No aplica en este turno: devolvé decision null."
@@ -4,13 +4,17 @@ Prompts para el agente ValidateReason.
 Este módulo contiene todos los prompts utilizados por el ValidateReasonAgent
 para detectar si hay una razón explícita en la respuesta del usuario
 y determinar el flujo inicial de la conversación.
+
+Las plantillas solo llevan {current_question}: el mensaje del usuario va como
+mensaje humano después del prompt de sistema, así el prompt de cada tipo de
+pregunta es fijo y el proveedor puede cachear el prefijo.
 """
 
 GENERIC_REASON_DETECTION_PROMPT = """Analiza si el usuario ha respondido a la pregunta.
 
 PREGUNTA: {current_question}
 
-RESPUESTA DEL USUARIO: {user_message}
+RESPUESTA DEL USUARIO: el último mensaje del usuario en la conversación
 
 INSTRUCCIÓN: Responde ÚNICAMENTE con un JSON en este formato exacto:
 {{"has_response": 1, "reason": "respuesta concreta del usuario"}} si la respuesta contesta claramente la pregunta
@@ -25,7 +29,7 @@ REASON_DETECTION_TIPO_OBJETIVO_PROMPT = """Analiza si el usuario ha respondido a
 
 PREGUNTA: {current_question}
 
-RESPUESTA DEL USUARIO: {user_message}
+RESPUESTA DEL USUARIO: el último mensaje del usuario en la conversación
 
 INSTRUCCIÓN: Responde ÚNICAMENTE con un JSON en este formato exacto:
 {{"has_response": 1, "reason": "Monto final"}} si el usuario elige la opción de monto final
@@ -52,7 +56,7 @@ REASON_DETECTION_OBJETIVO_MONTO_FINAL = """Analiza si el usuario ha especificado
 
 PREGUNTA: {current_question}
 
-RESPUESTA DEL USUARIO: {user_message}
+RESPUESTA DEL USUARIO: el último mensaje del usuario en la conversación
 
 INSTRUCCIÓN: Responde ÚNICAMENTE con un JSON en este formato exacto:
 {{"has_response": 1, "reason": "MONTO"}} donde MONTO es el valor numérico exacto que mencionó el usuario
@@ -82,7 +86,7 @@ REASON_DETECTION_OBJETIVO_RENTA = """Analiza si el usuario ha especificado un mo
 
 PREGUNTA: {current_question}
 
-RESPUESTA DEL USUARIO: {user_message}
+RESPUESTA DEL USUARIO: el último mensaje del usuario en la conversación
 
 INSTRUCCIÓN: Responde ÚNICAMENTE con un JSON en este formato exacto:
 {{"has_response": 1, "reason": "MONTO"}} donde MONTO es el valor numérico mensual exacto que mencionó el usuario
@@ -112,7 +116,7 @@ REASON_DETECTION_OBJETIVO_DURACION = """Analiza si el usuario ha especificado un
 
 PREGUNTA: {current_question}
 
-RESPUESTA DEL USUARIO: {user_message}
+RESPUESTA DEL USUARIO: el último mensaje del usuario en la conversación
 
 INSTRUCCIÓN: Responde ÚNICAMENTE con un JSON en este formato exacto:
 {{"has_response": 1, "reason": "AÑOS"}} donde AÑOS es el número de años especificado por el usuario
@@ -143,7 +147,7 @@ REASON_DETECTION_MONTO_INICIAL = """Analiza si el usuario ha especificado un mon
 
 PREGUNTA: {current_question}
 
-RESPUESTA DEL USUARIO: {user_message}
+RESPUESTA DEL USUARIO: el último mensaje del usuario en la conversación
 
 INSTRUCCIÓN: Responde ÚNICAMENTE con un JSON en este formato exacto:
 {{"has_response": 1, "reason": "MONTO"}} donde MONTO es el valor numérico exacto que mencionó el usuario
@@ -174,7 +178,7 @@ REASON_DETECTION_APORTE_MENSUAL = """Analiza si el usuario ha especificado un mo
 
 PREGUNTA: {current_question}
 
-RESPUESTA DEL USUARIO: {user_message}
+RESPUESTA DEL USUARIO: el último mensaje del usuario en la conversación
 
 INSTRUCCIÓN: Responde ÚNICAMENTE con un JSON en este formato exacto:
 {{"has_response": 1, "reason": "MONTO"}} donde MONTO es el valor numérico mensual exacto que mencionó el usuario
@@ -0,0 +1,128 @@
+"""
+Tabla de locks por sesión para el grafo LangGraph.
+
+Garantiza que los turnos de una misma sesión (thread_id) se ejecuten
+estrictamente en orden, mientras que sesiones distintas corren en paralelo.
+Las entradas sin dueño ni espera se eliminan al liberarse, y se registran
+métricas del tiempo de espera por el lock.
+
+`hold` es para el camino async (la API); `hold_sync` para process_message, que
+puede llamarse desde varios threads. Son locks distintos: los dos caminos no se
+excluyen entre sí, así que un mismo proceso debe usar uno solo.
+"""
+
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, AsyncIterator, Iterator
+
+
+class _SessionLockEntry:
+    """Lock de una sesión y cantidad de turnos que lo usan (dueño + en espera)"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self, lock=None):
+        self.lock = lock if lock is not None else asyncio.Lock()
+        self.users = 0
+
+
+class SessionLockTable:
+    """Tabla de locks async indexada por session_id"""
+
+    def __init__(self):
+        self._entries: Dict[str, _SessionLockEntry] = {}
+        # Locks del camino sync (threading.Lock) y el mutex que protege su tabla
+        self._sync_entries: Dict[str, _SessionLockEntry] = {}
+        self._sync_mutex = threading.Lock()
+        # Métricas
+        self.acquisitions = 0
+        self.contended = 0
+        self.evictions = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        """Mantener el lock de la sesión mientras dure el bloque
+
+        asyncio.Lock despierta a los que esperan en orden FIFO, por lo que los
+        turnos de una sesión se procesan en el orden en que llegaron.
+        """
+        entry = self._entries.get(session_id)
+        if entry is None:
+            entry = _SessionLockEntry()
+            self._entries[session_id] = entry
+        entry.users += 1
+
+        start_time = time.perf_counter()
+        if entry.lock.locked():
+            self.contended += 1
+        try:
+            await entry.lock.acquire()
+        except BaseException:
+            # Cancelado mientras esperaba: liberar la referencia
+            self._release_entry(session_id, entry)
+            raise
+
+        self._record_wait(session_id, time.perf_counter() - start_time)
+
+        try:
+            yield
+        finally:
+            entry.lock.release()
+            self._release_entry(session_id, entry)
+
+    @contextmanager
+    def hold_sync(self, session_id: str) -> Iterator[None]:
+        """Versión sync de hold() para process_message (threading.Lock por sesión)"""
+        with self._sync_mutex:
+            entry = self._sync_entries.get(session_id)
+            if entry is None:
+                entry = _SessionLockEntry(threading.Lock())
+                self._sync_entries[session_id] = entry
+            entry.users += 1
+            if entry.lock.locked():
+                self.contended += 1
+
+        start_time = time.perf_counter()
+        entry.lock.acquire()
+        with self._sync_mutex:
+            self._record_wait(session_id, time.perf_counter() - start_time)
+
+        try:
+            yield
+        finally:
+            entry.lock.release()
+            with self._sync_mutex:
+                entry.users -= 1
+                if entry.users == 0 and self._sync_entries.get(session_id) is entry:
+                    del self._sync_entries[session_id]
+                    self.evictions += 1
+
+    def _record_wait(self, session_id: str, wait_time: float):
+        """Registrar una adquisición y su tiempo de espera"""
+        self.acquisitions += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        if wait_time > 1.0:
+            print(f"[SessionLocks] Sesión {session_id} esperó {wait_time:.3f}s por su turno")
+
+    def _release_entry(self, session_id: str, entry: _SessionLockEntry):
+        """Descontar un uso y eliminar la entrada si quedó ociosa"""
+        entry.users -= 1
+        if entry.users == 0 and self._entries.get(session_id) is entry:
+            del self._entries[session_id]
+            self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de la tabla de locks"""
+        return {
+            "active_sessions": len(self._entries) + len(self._sync_entries),
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "evictions": self.evictions,
+            "avg_wait_ms": (self.total_wait_time / self.acquisitions * 1000) if self.acquisitions else 0.0,
+            "max_wait_ms": self.max_wait_time * 1000,
+        }
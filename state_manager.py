@@ -5,7 +5,7 @@ Este módulo proporciona una interfaz centralizada para gestionar el estado
 de las conversaciones, incluyendo timestamps, status, y otros campos.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, TypeVar
 from datetime import datetime
 from enum import Enum
 from langchain_core.messages import HumanMessage
@@ -19,6 +19,12 @@ class ConversationStatus(Enum):
     CONFIRMED = "confirmed"
     END_CONVERSATION = "end_conversation"
 
+T = TypeVar("T")
+
+def keep_first(current: Optional[T], new: Optional[T]) -> Optional[T]:
+    """Reducer: conservar el primer valor no vacío del campo (created_at, user)"""
+    return current if current else new
+
 class StateManager:
     """Manager para manejar todas las modificaciones del estado"""
     
@@ -40,6 +46,24 @@ class StateManager:
             "last_agent": None  # Agregar campo para trackear el último agente que respondió
         }
     
+    @staticmethod
+    def create_turn_input(user_message: HumanMessage, question: Optional[str], user: Optional[str] = None) -> Dict[str, Any]:
+        """Crear la entrada de un turno: solo lo que cambia respecto del checkpoint
+        
+        LangGraph la combina con el estado guardado (add_messages agrega el mensaje).
+        created_at y user se conservan si la sesión ya existe (ver keep_first); en una
+        sesión nueva el resto de los campos se leen con sus valores por defecto.
+        """
+        current_time = datetime.now()
+        
+        return {
+            "messages": [user_message],
+            "question": question,
+            "created_at": current_time,
+            "updated_at": current_time,
+            "user": user
+        }
+    
     @staticmethod
     def update_timestamp(state: Dict[str, Any]) -> Dict[str, Any]:
         """Actualizar el timestamp de updated_at en el estado"""
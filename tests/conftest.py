@@ -0,0 +1,14 @@
+"""
+Configuración común de los tests.
+
+Los tests importan los módulos desde la raíz del repo y no llaman a ningún
+proveedor: las claves de API son de mentira, solo para que Config cargue.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
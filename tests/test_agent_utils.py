@@ -0,0 +1,28 @@
+"""Ventana del historial por presupuesto de tokens (agents/agent_utils.py)"""
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.agent_utils import TRUNCATION_MARKER, fit_messages_to_budget, message_tokens
+
+
+def test_ultimo_mensaje_siempre_completo():
+    last = HumanMessage(content="pregunta " * 100)
+    window, dropped, truncated = fit_messages_to_budget([HumanMessage(content="hola"), last], 10, 5)
+    assert window == [last]
+    assert (dropped, truncated) == (1, 0)
+
+
+def test_recorta_respuestas_largas_y_descarta_las_viejas():
+    history = [
+        HumanMessage(content="primera pregunta"),
+        AIMessage(content="respuesta larga " * 200),
+        HumanMessage(content="segunda pregunta"),
+        AIMessage(content="otra respuesta larga " * 200),
+        HumanMessage(content="¿y eso?"),
+    ]
+    window, dropped, truncated = fit_messages_to_budget(history, 80, 40)
+    assert window[-1] is history[-1]
+    assert window[-2].content.endswith(TRUNCATION_MARKER)
+    assert sum(message_tokens(message) for message in window) <= 80
+    assert dropped == len(history) - len(window)
+    assert truncated == sum(1 for message in window if message.content.endswith(TRUNCATION_MARKER))
@@ -0,0 +1,21 @@
+"""Creación del caché de sesiones (checkpoint_cache.py)"""
+
+from checkpoint_cache import SessionStateCache, create_state_cache
+from config import Config
+
+
+def test_deshabilitado_por_defecto(monkeypatch):
+    monkeypatch.setattr(Config, "STATE_CACHE_ENABLED", False)
+    assert create_state_cache() is None
+
+
+def test_se_ignora_con_varios_workers(monkeypatch):
+    monkeypatch.setattr(Config, "STATE_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "WEB_CONCURRENCY", 4)
+    assert create_state_cache() is None
+
+
+def test_un_solo_worker(monkeypatch):
+    monkeypatch.setattr(Config, "STATE_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "WEB_CONCURRENCY", 1)
+    assert isinstance(create_state_cache(), SessionStateCache)
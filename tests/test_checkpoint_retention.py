@@ -0,0 +1,43 @@
+"""Retención y VACUUM de checkpoints (checkpoint_retention.py)"""
+
+import sqlite3
+
+from checkpoint_retention import CheckpointRetention
+
+
+def make_db(path, checkpoints):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE checkpoints (thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT)")
+    conn.execute("CREATE TABLE writes (thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT)")
+    for i in range(checkpoints):
+        conn.execute("INSERT INTO checkpoints VALUES ('s', '', ?)", (f"{i:04d}",))
+        conn.execute("INSERT INTO writes VALUES ('s', '', ?)", (f"{i:04d}",))
+    conn.commit()
+    conn.close()
+
+
+def auto_vacuum(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_conserva_los_ultimos(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    make_db(path, 15)
+    result = CheckpointRetention(path, 10, 3600, 60, 1 << 30).run(vacuum=False)
+    assert (result["deleted_checkpoints"], result["deleted_writes"]) == (5, 5)
+
+
+def test_la_tarea_de_fondo_no_convierte_la_base(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    make_db(path, 3)
+    retention = CheckpointRetention(path, 10, 3600, 60, 1 << 30)
+    assert retention.run()["vacuumed"] is False
+    assert auto_vacuum(path) == 0
+    # Solo con la conversión explícita (CLI --enable-auto-vacuum)
+    assert retention.run(convert=True)["vacuumed"] is True
+    assert auto_vacuum(path) == 2
+    assert retention.run()["vacuumed"] is True
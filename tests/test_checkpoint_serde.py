@@ -0,0 +1,60 @@
+"""Serializer comprimido de checkpoints (checkpoint_serde.py)"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from checkpoint_serde import CompressionCodec, create_checkpoint_serializer, zstandard
+
+CODECS = ["zlib"] + (["zstd"] if zstandard is not None else [])
+STATE = {"messages": ["Hola, ¿cómo puedo ayudarte con tu retiro? " * 40], "summary": ""}
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_ida_y_vuelta(codec):
+    serde = create_checkpoint_serializer(codec=codec, level=None, min_bytes=256)
+    typed = serde.dumps_typed(STATE)
+    assert typed[0] == f"msgpack+{codec}"
+    assert serde.loads_typed(typed) == STATE
+
+
+def test_blobs_chicos_sin_comprimir():
+    serde = create_checkpoint_serializer(codec="zlib", level=None, min_bytes=256)
+    typed = serde.dumps_typed({"a": 1})
+    assert typed[0] == "msgpack+raw"
+    assert serde.loads_typed(typed) == {"a": 1}
+
+
+def test_lee_checkpoints_viejos_sin_comprimir():
+    old = JsonPlusSerializer().dumps_typed(STATE)
+    assert create_checkpoint_serializer(codec="zlib").loads_typed(old) == STATE
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_none_escribe_sin_comprimir_y_lee_comprimidos(codec):
+    stored = create_checkpoint_serializer(codec=codec, min_bytes=0).dumps_typed(STATE)
+    serde = create_checkpoint_serializer(codec="none")
+    assert serde.loads_typed(stored) == STATE
+    typed = serde.dumps_typed(STATE)
+    assert typed[0] == "msgpack"
+    assert JsonPlusSerializer().loads_typed(typed) == STATE
+
+
+def test_codec_desconocido():
+    with pytest.raises(ValueError):
+        CompressionCodec(codec="lz4")
+    with pytest.raises(ValueError):
+        CompressionCodec(codec="zlib").decrypt("lz4", b"")
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_codec_desde_varios_threads(codec):
+    serde = create_checkpoint_serializer(codec=codec, min_bytes=0)
+
+    def roundtrip(i):
+        state = {"i": i, "text": "x" * (1000 + i)}
+        return serde.loads_typed(serde.dumps_typed(state)) == state
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(roundtrip, range(400)))
@@ -0,0 +1,71 @@
+"""Checkpointer async con pool de lectura (checkpoint_store.py)"""
+
+import asyncio
+
+import aiosqlite
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from checkpoint_store import AsyncSqliteConnectionPool, PooledAsyncSqliteSaver, create_async_sqlite_connection
+
+
+async def make_saver(path, size=2):
+    conn = await create_async_sqlite_connection(path)
+    return PooledAsyncSqliteSaver(conn, pool=AsyncSqliteConnectionPool(path, size))
+
+
+async def put_checkpoint(saver, thread_id):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    checkpoint = empty_checkpoint()
+    return await saver.aput(config, checkpoint, {"step": 1}, {})
+
+
+def test_lee_del_pool_lo_que_escribe_la_conexion_principal(tmp_path):
+    async def scenario():
+        saver = await make_saver(str(tmp_path / "db.sqlite"))
+        try:
+            saved = await put_checkpoint(saver, "s1")
+            found = await saver.aget_tuple({"configurable": {"thread_id": "s1"}})
+            listed = [item async for item in saver.alist({"configurable": {"thread_id": "s1"}})]
+            return saved, found, listed, saver.get_stats()
+        finally:
+            await saver.aclose()
+
+    saved, found, listed, stats = asyncio.run(scenario())
+    assert found.config["configurable"]["checkpoint_id"] == saved["configurable"]["checkpoint_id"]
+    assert len(listed) == 1
+    assert stats["checkouts"] == 2
+    assert stats["open"] == 1
+
+
+def test_las_conexiones_del_pool_son_de_solo_lectura(tmp_path):
+    async def scenario():
+        saver = await make_saver(str(tmp_path / "db.sqlite"))
+        try:
+            await saver.setup()
+            async with saver.pool.reader(saver) as reader:
+                await reader.conn.execute("DELETE FROM checkpoints")
+        finally:
+            await saver.aclose()
+
+    with pytest.raises(aiosqlite.OperationalError):
+        asyncio.run(scenario())
+
+
+def test_lecturas_concurrentes_respetan_el_tamano_del_pool(tmp_path):
+    async def scenario():
+        saver = await make_saver(str(tmp_path / "db.sqlite"), size=2)
+        try:
+            for i in range(4):
+                await put_checkpoint(saver, f"s{i}")
+            results = await asyncio.gather(*[
+                saver.aget_tuple({"configurable": {"thread_id": f"s{i % 4}"}}) for i in range(12)
+            ])
+            return results, saver.get_stats()
+        finally:
+            await saver.aclose()
+
+    results, stats = asyncio.run(scenario())
+    assert all(result is not None for result in results)
+    assert stats["open"] == 2
+    assert stats["idle"] == 2
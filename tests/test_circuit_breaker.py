@@ -0,0 +1,181 @@
+"""Circuit breaker y failover entre proveedores (agents/circuit_breaker.py)"""
+
+import time
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from agents.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, FailoverChatModel
+
+
+def make_breaker(**kwargs):
+    params = dict(error_rate=0.5, slow_call_seconds=1.0, slow_rate=0.5, window=10, min_calls=4,
+                  open_seconds=30.0, half_open_probes=1)
+    params.update(kwargs)
+    return CircuitBreaker("groq", **params)
+
+
+def test_se_abre_por_tasa_de_errores():
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    # Todavía por debajo de min_calls
+    assert breaker.state == CLOSED
+    breaker.record_success(0.1)
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+
+
+def test_se_abre_por_llamadas_lentas():
+    breaker = make_breaker()
+    for latency in (2.0, 2.0, 0.1, 0.1):
+        breaker.record_success(latency)
+    assert breaker.state == OPEN
+
+
+def test_half_open_cierra_o_vuelve_a_abrir(monkeypatch):
+    breaker = make_breaker(min_calls=1, error_rate=1.0)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    # Una sola prueba a la vez
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 62)
+    assert breaker.allow() is True
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_cancelada_libera_la_prueba(monkeypatch):
+    breaker = make_breaker(min_calls=1, error_rate=1.0)
+    breaker.record_failure()
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert breaker.allow() is True
+    breaker.record_cancelled()
+    assert breaker.allow() is True
+
+
+class FailingModel:
+    def __init__(self, chunks_before_error=0):
+        self.chunks_before_error = chunks_before_error
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        raise RuntimeError("groq caído")
+
+    def stream(self, messages):
+        self.calls += 1
+        for i in range(self.chunks_before_error):
+            yield AIMessageChunk(content=f"t{i} ")
+        raise RuntimeError("groq caído")
+
+    async def astream(self, messages):
+        self.calls += 1
+        for i in range(self.chunks_before_error):
+            yield AIMessageChunk(content=f"t{i} ")
+        raise RuntimeError("groq caído")
+
+
+class FallbackModel:
+    def invoke(self, messages):
+        return AIMessage(content="respaldo")
+
+    async def ainvoke(self, messages):
+        return AIMessage(content="respaldo")
+
+
+def test_failover_ante_error():
+    model = FailoverChatModel(FailingModel(), FallbackModel(), make_breaker())
+    assert model.invoke([]).content == "respaldo"
+    assert model.failovers == 1
+
+
+def test_circuito_abierto_no_llama_al_principal():
+    primary = FailingModel()
+    breaker = make_breaker(min_calls=1, error_rate=1.0)
+    breaker.record_failure()
+    model = FailoverChatModel(primary, FallbackModel(), breaker)
+    assert model.invoke([]).content == "respaldo"
+    assert primary.calls == 0
+
+
+def test_stream_falla_antes_del_primer_chunk():
+    model = FailoverChatModel(FailingModel(0), FallbackModel(), make_breaker(), streamed=True)
+    assert model.invoke([]).content == "respaldo"
+    assert asyncio.run(model.ainvoke([])).content == "respaldo"
+
+
+def test_stream_falla_a_mitad_sin_respaldo():
+    model = FailoverChatModel(FailingModel(2), FallbackModel(), make_breaker(), streamed=True)
+    with pytest.raises(RuntimeError):
+        model.invoke([])
+    with pytest.raises(RuntimeError):
+        asyncio.run(model.ainvoke([]))
+    assert model.failovers == 0
+
+
+def test_stream_completo_devuelve_mensaje():
+    class StreamingModel:
+        def stream(self, messages):
+            yield AIMessageChunk(content="Hola ")
+            yield AIMessageChunk(content="mundo")
+
+    response = FailoverChatModel(StreamingModel(), FallbackModel(), make_breaker(), streamed=True).invoke([])
+    assert isinstance(response, AIMessage)
+    assert response.content == "Hola mundo"
+
+
+class SlowHealthyStream:
+    """Stream sano y largo: primer chunk rápido, respuesta completa lenta"""
+
+    def __init__(self, monkeypatch):
+        self.clock = [0.0]
+        monkeypatch.setattr(time, "perf_counter", lambda: self.clock[0])
+
+    def stream(self, messages):
+        self.clock[0] += 0.2
+        yield AIMessageChunk(content="Hola ")
+        self.clock[0] += 30.0
+        yield AIMessageChunk(content="mundo")
+
+    async def astream(self, messages):
+        for chunk in self.stream(messages):
+            yield chunk
+
+    def invoke(self, messages):
+        self.clock[0] += 30.0
+        return AIMessage(content="resumen")
+
+
+def test_streams_largos_sanos_no_abren_el_circuito(monkeypatch):
+    primary = SlowHealthyStream(monkeypatch)
+    breaker = make_breaker(slow_call_seconds=5.0)
+    model = FailoverChatModel(primary, FallbackModel(), breaker, streamed=True)
+    for _ in range(10):
+        assert model.invoke([]).content == "Hola mundo"
+        assert asyncio.run(model.ainvoke([])).content == "Hola mundo"
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["slow_rate"] == 0.0
+
+
+def test_generaciones_largas_no_cuentan_como_lentas(monkeypatch):
+    primary = SlowHealthyStream(monkeypatch)
+    breaker = make_breaker(slow_call_seconds=5.0)
+    model = FailoverChatModel(primary, FallbackModel(), breaker, long_generation=True)
+    for _ in range(10):
+        model.invoke([])
+    assert breaker.state == CLOSED
+    # Un clasificador igual de lento sí abre el circuito
+    classifier = FailoverChatModel(primary, FallbackModel(), breaker)
+    for _ in range(10):
+        classifier.invoke([])
+    assert breaker.state == OPEN
@@ -0,0 +1,10 @@
+"""Corpus de ejemplos del clasificador de cierre (agents/close_classifier.py)"""
+
+import pytest
+
+from agents.close_classifier import EXAMPLES, classify_close
+
+
+@pytest.mark.parametrize("message, expected", EXAMPLES)
+def test_ejemplos(message, expected):
+    assert classify_close(message) == expected
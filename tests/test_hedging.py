@@ -0,0 +1,62 @@
+"""Hedging de llamadas cortas (agents/hedging.py)"""
+
+import time
+import asyncio
+
+from agents.hedging import MIN_SAMPLES, HedgedChatModel
+
+
+class SlowModel:
+    def __init__(self, delay, answer):
+        self.delay = delay
+        self.answer = answer
+
+    def invoke(self, messages):
+        time.sleep(self.delay)
+        return self.answer
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.delay)
+        return self.answer
+
+
+class CancelledModel:
+    async def ainvoke(self, messages):
+        raise asyncio.CancelledError()
+
+
+def make_hedged(primary, alternate=None, max_rate=1.0):
+    return HedgedChatModel(primary, alternate=alternate, percentile=0.9, initial_delay=0.01,
+                           min_delay=0.01, max_rate=max_rate, window=100)
+
+
+def test_sin_duplicado_si_responde_a_tiempo():
+    model = make_hedged(SlowModel(0, "principal"))
+    assert asyncio.run(model.ainvoke([])) == "principal"
+    assert model.hedged == 0
+
+
+def test_gana_el_duplicado():
+    model = make_hedged(SlowModel(0.5, "principal"), SlowModel(0, "duplicado"))
+    assert asyncio.run(model.ainvoke([])) == "duplicado"
+    assert model.invoke([]) == "duplicado"
+    assert (model.hedged, model.hedge_wins) == (2, 2)
+
+
+def test_duplicado_cancelado_no_rompe_la_llamada():
+    model = make_hedged(SlowModel(0.1, "principal"), CancelledModel())
+    assert asyncio.run(model.ainvoke([])) == "principal"
+    assert model.hedge_wins == 0
+
+
+def test_tope_sobre_las_llamadas_registradas():
+    model = make_hedged(SlowModel(0.05, "principal"), max_rate=0.1)
+
+    async def run_calls():
+        for _ in range(MIN_SAMPLES):
+            await model.ainvoke([])
+
+    asyncio.run(run_calls())
+    # Con pocas muestras el tope se calcula sobre MIN_SAMPLES, no sobre el tamaño de la ventana
+    assert model.hedged == int(0.1 * MIN_SAMPLES)
+    assert model.capped == MIN_SAMPLES - model.hedged
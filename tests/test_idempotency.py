@@ -0,0 +1,78 @@
+"""Claves de idempotencia y coalescencia de pedidos en curso (idempotency.py)"""
+
+import asyncio
+
+import pytest
+
+from idempotency import IdempotencyConflict, IdempotencyStore
+
+
+def make_factory(calls, delay=0.05, success=True):
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"success": success, "response": f"respuesta {len(calls)}"}
+    return factory
+
+
+def test_respuesta_guardada():
+    async def scenario():
+        store, calls = IdempotencyStore(60, 10), []
+        first = await store.run("s", "k", "f", make_factory(calls))
+        again = await store.run("s", "k", "f", make_factory(calls))
+        return store, calls, first, again
+
+    store, calls, first, again = asyncio.run(scenario())
+    assert first == again
+    assert len(calls) == 1
+    assert store.hits == 1
+
+
+def test_fallidas_no_se_guardan():
+    async def scenario():
+        store, calls = IdempotencyStore(60, 10), []
+        await store.run("s", "k", "f", make_factory(calls, success=False))
+        await store.run("s", "k", "f", make_factory(calls, success=False))
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
+
+
+def test_reintento_en_curso_espera_al_original():
+    async def scenario():
+        store, calls = IdempotencyStore(60, 10), []
+        results = await asyncio.gather(*(store.run("s", "k", "f", make_factory(calls)) for _ in range(3)))
+        return store, calls, results
+
+    store, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results[0] == results[1] == results[2]
+    assert store.coalesced == 2
+
+
+def test_clave_reutilizada_con_otro_pedido():
+    async def scenario():
+        store, calls = IdempotencyStore(60, 10), []
+        await store.run("s", "k", "f1", make_factory(calls))
+        await store.run("s", "k", "f2", make_factory(calls))
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(scenario())
+
+
+def test_original_cancelado_reintentos_vuelven_a_ejecutar():
+    async def scenario():
+        store, calls = IdempotencyStore(60, 10), []
+        leader = asyncio.create_task(store.run("s", "k", "f", make_factory(calls)))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(store.run("s", "k", "f", make_factory(calls))) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        return store, calls, results
+
+    store, calls, results = asyncio.run(scenario())
+    # El original más una sola re-ejecución para los dos reintentos
+    assert len(calls) == 2
+    assert results[0] == results[1]
+    assert store.reruns == 2
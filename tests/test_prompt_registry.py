@@ -0,0 +1,26 @@
+"""Registro de prompts precompilados (prompts/registry.py)"""
+
+from custom_types import QuestionType
+from prompts.registry import PromptRegistry
+
+
+def test_planes_por_tipo_de_pregunta():
+    registry = PromptRegistry()
+    question_type = next(iter(QuestionType)).value
+    plan = registry.plan("validate_reason", question_type)
+    assert plan is registry.plan("validate_reason", question_type)
+    assert registry.static_prefix("validate_reason", plan.system_prefix + "\n\nvariable") == plan.system_prefix
+
+
+def test_tipos_desconocidos_no_se_guardan():
+    registry = PromptRegistry()
+    stored = len(registry.plans())
+    for i in range(50):
+        plan = registry.plan("validate_reason", f"pregunta inventada {i}")
+        assert plan.question_type == f"pregunta inventada {i}"
+    assert len(registry.plans()) == stored
+
+
+def test_agentes_independientes_de_la_pregunta():
+    registry = PromptRegistry()
+    assert registry.plan("validate_message", "cualquiera") is registry.plan("validate_message")
@@ -0,0 +1,22 @@
+"""Corpus de ejemplos del parser de respuestas (agents/reason_parser.py)"""
+
+import pytest
+
+from agents.reason_parser import EXAMPLES, parse_reason
+
+
+@pytest.mark.parametrize("question, message, expected", EXAMPLES)
+def test_ejemplos(question, message, expected):
+    assert parse_reason(question, message) == expected
+
+
+@pytest.mark.parametrize("question, message", [
+    ("objetivo_monto_final", "dos mil quinientos"),
+    ("objetivo_monto_final", "un millón y medio"),
+    ("objetivo_duracion", "en 2 o 3 años"),
+    ("objetivo_duracion", "en 2035 o 2040"),
+    ("objetivo_renta", "10% del sueldo por mes"),
+    ("monto_inicial", "tengo 2 autos"),
+])
+def test_ambiguos_van_al_llm(question, message):
+    assert parse_reason(question, message) is None
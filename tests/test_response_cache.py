@@ -0,0 +1,117 @@
+"""Caché de respuestas de los clasificadores (agents/response_cache.py)"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents import base_agent
+from agents.base_agent import BaseAgent
+from agents.response_cache import ClassifierResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ClassifierResponseCache(str(tmp_path / "cache.db"), max_entries=2, max_rows=100, ttl_seconds=60)
+
+
+def test_fallo_y_acierto_en_memoria(cache):
+    key = cache.make_key("validate_reason", "h1", "modelo", "renta", "renta")
+    assert cache.get("validate_reason", key) is None
+    cache.put("validate_reason", "h1", key, '{"has_response": true}')
+    assert cache.get("validate_reason", key) == '{"has_response": true}'
+    stats = cache.get_stats()["agents"]["validate_reason"]
+    assert (stats["misses"], stats["memory_hits"]) == (1, 1)
+
+
+def test_lru_cae_a_disco(cache):
+    keys = [cache.make_key("a", "h", "m", str(i)) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put("a", "h", key, str(i))
+    # La primera salió del LRU (tamaño 2) pero sigue en SQLite
+    assert cache.get("a", keys[0]) == "0"
+    assert cache.get_stats()["agents"]["a"]["disk_hits"] == 1
+
+
+def test_ttl_vencido(tmp_path, monkeypatch):
+    cache = ClassifierResponseCache(str(tmp_path / "cache.db"), max_entries=2, max_rows=100, ttl_seconds=10)
+    key = cache.make_key("a", "h", "m", "x")
+    cache.put("a", "h", key, "r")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("a", key) is None
+
+
+def test_cambio_de_prompt_invalida(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = ClassifierResponseCache(db_path, max_entries=2, max_rows=100, ttl_seconds=60)
+    key = cache.make_key("a", "viejo", "m", "x")
+    cache.register_prompts("a", "viejo")
+    cache.put("a", "viejo", key, "r")
+    # Otro proceso con el prompt nuevo borra las filas del hash viejo
+    fresh = ClassifierResponseCache(db_path, max_entries=2, max_rows=100, ttl_seconds=60)
+    fresh.register_prompts("a", "nuevo")
+    assert fresh.get("a", key) is None
+    assert fresh.get_stats()["disk_rows"] == 0
+
+
+def test_la_clave_depende_de_todas_las_partes():
+    base = ClassifierResponseCache.make_key("a", "h", "m", "renta", "hola")
+    assert base == ClassifierResponseCache.make_key("a", "h", "m", "renta", "hola")
+    assert base != ClassifierResponseCache.make_key("a", "h2", "m", "renta", "hola")
+    assert base != ClassifierResponseCache.make_key("a", "h", "m", "renta", "chau")
+
+
+class ThreadRecordingCache(ClassifierResponseCache):
+    """Anota en qué thread se consulta y escribe el caché"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = []
+
+    def get(self, agent, key):
+        self.threads.append(threading.get_ident())
+        return super().get(agent, key)
+
+    def put(self, agent, agent_prompt_hash, key, response):
+        self.threads.append(threading.get_ident())
+        super().put(agent, agent_prompt_hash, key, response)
+
+
+class FakeModel:
+    model_name = "modelo"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content="clasificado")
+
+
+class CachedAgent(BaseAgent):
+    def _process_state(self, state):
+        return state
+
+
+def test_ainvoke_usa_el_cache_fuera_del_event_loop(tmp_path, monkeypatch):
+    cache = ThreadRecordingCache(str(tmp_path / "cache.db"), max_entries=2, max_rows=100, ttl_seconds=60)
+    monkeypatch.setattr(base_agent, "get_response_cache", lambda: cache)
+    model = FakeModel()
+    agent = CachedAgent(model, "validate_reason")
+    agent.prompt_hash = "h1"
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        first = await agent._ainvoke_model_cached([HumanMessage(content="Renta")], "renta", "renta")
+        second = await agent._ainvoke_model_cached([HumanMessage(content="Renta")], "renta", "renta")
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(scenario())
+    assert first.content == second.content == "clasificado"
+    assert model.calls == 1
+    # fallo, escritura y acierto
+    assert len(cache.threads) == 3
+    assert loop_thread not in cache.threads
@@ -0,0 +1,46 @@
+"""Locks por sesión (session_locks.py)"""
+
+import time
+import asyncio
+import threading
+
+from session_locks import SessionLockTable
+
+
+def test_turnos_de_una_sesion_en_orden():
+    async def scenario():
+        locks, order = SessionLockTable(), []
+
+        async def turn(i):
+            async with locks.hold("s"):
+                order.append(("start", i))
+                await asyncio.sleep(0.01)
+                order.append(("end", i))
+
+        await asyncio.gather(*(turn(i) for i in range(3)))
+        return locks, order
+
+    locks, order = asyncio.run(scenario())
+    assert order == [(event, i) for i in range(3) for event in ("start", "end")]
+    assert locks.get_stats()["active_sessions"] == 0
+
+
+def test_hold_sync_excluye_entre_threads():
+    locks, active, peak = SessionLockTable(), [0], [0]
+
+    def turn():
+        with locks.hold_sync("s"):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            active[0] -= 1
+
+    threads = [threading.Thread(target=turn) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 1
+    stats = locks.get_stats()
+    assert stats["acquisitions"] == 6
+    assert stats["active_sessions"] == 0
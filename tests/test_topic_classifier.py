@@ -0,0 +1,58 @@
+"""Pre-filtro de tópico y lectura de ejemplos de entrenamiento (agents/topic_classifier.py)"""
+
+import json
+
+import pytest
+
+from agents.topic_classifier import HashedNgramClassifier, TopicPrefilter, load_training_examples
+
+
+def test_reglas_sin_modelo():
+    prefilter = TopicPrefilter(None, low=0.1, high=0.9)
+    assert prefilter.classify("mirá https://example.com").source == "url_rule"
+    assert prefilter.classify("mirá https://example.com").on_topic is False
+    assert prefilter.classify("quiero invertir para mi jubilación").on_topic is True
+    # Sin modelo, lo que no cubren las reglas va al LLM
+    assert prefilter.classify("qué lindo día").on_topic is None
+
+
+@pytest.mark.parametrize("message", ["Sí.Me parece bien", "dale.es lo que quiero"])
+def test_punto_sin_espacio_no_es_enlace(message):
+    assert TopicPrefilter(None, low=0.1, high=0.9).classify(message).source != "url_rule"
+
+
+@pytest.mark.parametrize("message", ["mirá google.com", "entrá a ejemplo.com.ar/ofertas", "WWW.EJEMPLO.ORG"])
+def test_enlaces(message):
+    assert TopicPrefilter(None, low=0.1, high=0.9).classify(message) == (False, "url_rule", None)
+
+
+@pytest.mark.parametrize("message", [
+    "cual es la capital de Francia?",
+    "cuál es el riesgo de fumar?",
+    "mi objetivo es aprender a cocinar",
+])
+def test_palabras_genericas_van_al_llm(message):
+    assert TopicPrefilter(None, low=0.1, high=0.9).classify(message).on_topic is None
+
+
+def test_modelo_entrenado_decide_fuera_de_la_banda():
+    examples = [("cuánto tengo que ahorrar por mes", True), ("quién ganó el partido", False)] * 20
+    prefilter = TopicPrefilter(HashedNgramClassifier.fit(examples), low=0.3, high=0.7)
+    assert prefilter.classify("quién ganó el partido").on_topic is False
+
+
+def _entry(event_type, state):
+    return json.dumps({"agent_name": "validate_message", "event_type": event_type, "state": state})
+
+
+def test_entrenamiento_solo_con_decisiones_del_llm(tmp_path):
+    log_path = tmp_path / "graph_logs.jsonl"
+    before = {"messages": [{"type": "human", "content": "quién ganó el partido"}]}
+    lines = [
+        _entry("BEFORE", before), _entry("AFTER", {"onTopic": False, "topic_source": "llm"}),
+        _entry("BEFORE", before), _entry("AFTER", {"onTopic": True, "topic_source": "fallback"}),
+        _entry("BEFORE", before), _entry("AFTER", {"onTopic": True, "topic_source": "vocabulary"}),
+        _entry("BEFORE", before), _entry("AFTER", {"onTopic": True}),
+    ]
+    log_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    assert load_training_examples(str(log_path)) == [("quién ganó el partido", False)]